@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Time refreshing a session that PSTrace keeps appending to.
+
+Writes synthetic sessions of growing size, parses each, appends a few
+measurements and times the incremental refresh against a full re-parse of
+the same file, for wide and normalized tables. The refresh should stay
+flat as sessions grow, and must give the same tables as the re-parse: the
+exit status is 1 when it does not.
+
+    python benchmarks/bench_append.py --sizes 10,40,160 --append 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from psession.enrichments import default_enrichments
+from psession.parse import parse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synth import session, write_session  # noqa: E402
+
+
+MODES = {"wide": {}, "normalized": {"normalize": True}}
+
+
+def timed_parse(fp: str, **kwargs) -> tuple:
+    t0 = time.perf_counter()
+    measurements = parse(fp, enrichments=default_enrichments(), **kwargs)
+    measurements.load_all()
+    seconds = time.perf_counter() - t0
+    return seconds, {k: measurements.table(k) for k in measurements.keys()}
+
+
+def same_tables(a: dict, b: dict) -> bool:
+    return a.keys() == b.keys() and all(a[k].equals(b[k]) for k in a)
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", type=str, default="10,40,160")
+    p.add_argument("--append", type=int, default=2)
+    p.add_argument("--channels", type=int, default=4)
+    p.add_argument("--points", type=int, default=200)
+    args = p.parse_args(argv)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in map(int, args.sizes.split(",")):
+            data = session(
+                measurements=size + args.append,
+                channels=args.channels,
+                points=args.points,
+                seed=size,
+            )
+            before = copy.copy(data)
+            before["Measurements"] = data["Measurements"][:size]
+
+            for mode, opts in MODES.items():
+                fp = os.path.join(tmp, f"append_{size}_{mode}.pssession")
+                write_session(fp, before)
+                timed_parse(fp, opts=opts)
+                write_session(fp, data)
+                refresh, refreshed = timed_parse(fp, opts=opts)
+                full, reparsed = timed_parse(fp, opts=opts, force_reload=True)
+                rows.append(
+                    {
+                        "measurements": size,
+                        "tables": mode,
+                        "appended": args.append,
+                        "refresh_ms": refresh * 1e3,
+                        "full_ms": full * 1e3,
+                        "speedup": full / refresh,
+                        "exact": same_tables(refreshed, reparsed),
+                    }
+                )
+
+    df = pd.DataFrame(rows)
+    print(df.to_string(index=False, float_format="%.2f"))
+    return 0 if df["exact"].all() else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
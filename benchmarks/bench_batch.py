@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Time `parse_many` serially and on a process pool, and check errors stay
+with their file.
+
+Parses `--files` synthetic sessions, one of them titled `boom`, with an
+enrichment that raises on that title. Both paths must list that file in
+`BatchResult.errors` and still return the others' rows; the exit status
+is 1 when either aborts the batch or loses the error instead.
+
+    python benchmarks/bench_batch.py --files 8 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synth import generate  # noqa: E402
+
+from psession.enrichments import ColumnEnrichment  # noqa: E402
+from psession.parse import parse_many  # noqa: E402
+
+BAD_TITLE = "boom"
+
+
+def explode(df):
+    # module level, so the process pool can pickle it
+    if (df["title"] == BAD_TITLE).any():
+        raise RuntimeError(BAD_TITLE)
+    return {}
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--files", type=int, default=4)
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--measurements", type=int, default=12)
+    p.add_argument("--points", type=int, default=200)
+    args = p.parse_args(argv)
+
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        bad = None
+        for i in range(args.files):
+            title = BAD_TITLE if i == args.files - 1 else f"run {i}"
+            fp = generate(
+                os.path.join(tmp, f"s{i:02d}.pssession"),
+                measurements=args.measurements,
+                points=args.points,
+                seed=i,
+                titles=(title,),
+            )
+            bad = fp if title == BAD_TITLE else bad
+
+        print(f"{'path':<10} {'seconds':>8} {'rows':>8}  errors")
+        for name, workers in (("serial", None), ("pool", args.workers)):
+            t0 = time.perf_counter()
+            try:
+                result = parse_many(
+                    tmp,
+                    enrichments=[ColumnEnrichment(explode)],
+                    force_reload=True,
+                    workers=workers,
+                )
+            except Exception as e:
+                failed.append(name)
+                print(f"{name:<10} aborted: {type(e).__name__}: {e}")
+                continue
+            seconds = time.perf_counter() - t0
+            rows = sum(len(result.measurements.table(k)) for k in ("eis", "cv"))
+            print(f"{name:<10} {seconds:>8.2f} {rows:>8}  {result.errors}")
+            if list(result.errors) != [bad] or not rows:
+                failed.append(name)
+
+    if failed:
+        print(f"Errors not reported per file in: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Compare cache hit latency across table serializers.
+
+Parses a session once, writes every technique table with each available
+serializer and times full and column-subset reads.
+
+    python benchmarks/bench_cache.py data/data.pssession --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from psession.parse import parse
+from psession.serializers import SERIALIZERS
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("file", help="Path to a .pssession file")
+    p.add_argument("--repeat", type=int, default=10)
+    p.add_argument(
+        "--columns",
+        type=str,
+        default="date,channel,voltage,current",
+        help="Comma separated subset for the partial read",
+    )
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        measurements = parse(args.file, force_reload=True, cache_path=tmp)
+        tables = {
+            name: getattr(measurements, name)
+            for name in ("EIS", "LSV", "CV")
+            if not getattr(measurements, name).empty
+        }
+
+        rows = []
+        for serializer in SERIALIZERS.values():
+            if not serializer.available():
+                print(f"skipping {serializer}: needs {serializer.requires}")
+                continue
+            for name, df in tables.items():
+                fp = os.path.join(tmp, f"{name}.{serializer.suffix}")
+                write_s = best_of(lambda: serializer.write(df, fp), args.repeat)
+                read_s = best_of(lambda: serializer.read(fp), args.repeat)
+                subset = [c for c in args.columns.split(",") if c in df.columns]
+                subset_s = best_of(
+                    lambda: serializer.read(fp, columns=subset), args.repeat
+                )
+                back = serializer.read(fp)
+                rows.append(
+                    {
+                        "format": serializer.name,
+                        "table": name,
+                        "rows": len(df),
+                        "bytes": os.path.getsize(fp),
+                        "write_ms": write_s * 1e3,
+                        "read_ms": read_s * 1e3,
+                        "read_subset_ms": subset_s * 1e3,
+                        "dtypes_match": back.dtypes.equals(df.dtypes),
+                    }
+                )
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format="%.2f"))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Segmented CV/LSV charge kernels against the per-curve reference.
+
+Builds synthetic triangle-sweep curves, computes sweep direction and charge
+curve by curve with `cv.add_sweep_direction`/`compute_charge`/
+`normalize_charge` and `lsv.compute_charge`, then with the whole-table
+kernels, checks the results are bit-identical and reports both timings.
+
+    python benchmarks/bench_charge.py --curves 2000 --points 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from psession.parsers import cv, lsv
+
+
+def make_curves(n_curves: int, points: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    # a few distinct lengths, as in sessions mixing scan settings
+    lengths = rng.choice([points, points // 2 + 1, points + 7], size=n_curves)
+    voltages, currents = [], []
+    for n in lengths:
+        t = np.linspace(0.0, 2.0, n)
+        v = np.where(t < 1.0, t, 2.0 - t) * rng.uniform(0.5, 1.5) - 0.5
+        i = np.sin(3 * v) * 1e-6 + rng.normal(0, 1e-8, n)
+        voltages.append(v)
+        currents.append(i)
+    return lengths.astype(np.int64), voltages, currents
+
+
+def cv_reference(voltages, currents, scan_rate):
+    out = []
+    for v, i in zip(voltages, currents):
+        df = pd.DataFrame({"voltage": v, "current": i})
+        df = cv.add_sweep_direction(df)
+        df = cv.compute_charge(df, scan_rate)
+        df["q_norm"] = df.groupby("sweep_dir")["charge_segment"].transform(
+            cv.normalize_charge
+        )
+        out.append(df)
+    return pd.concat(out, ignore_index=True)
+
+
+def lsv_reference(voltages, currents, scan_rate):
+    out = []
+    for v, i in zip(voltages, currents):
+        df = pd.DataFrame({"voltage": v, "current": i})
+        out.append(lsv.compute_charge(df, scan_rate))
+    return pd.concat(out, ignore_index=True)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--curves", type=int, default=1000)
+    p.add_argument("--points", type=int, default=400)
+    p.add_argument("--scan-rate", type=float, default=0.1)
+    args = p.parse_args(argv)
+
+    lengths, voltages, currents = make_curves(args.curves, args.points)
+    voltage, current = np.concatenate(voltages), np.concatenate(currents)
+    scan_rates = np.full(len(voltage), args.scan_rate)
+
+    ref, ref_s = timed(lambda: cv_reference(voltages, currents, args.scan_rate))
+    new, new_s = timed(
+        lambda: cv.sweep_columns(voltage, current, lengths, scan_rates)
+    )
+    cv_exact = all(
+        np.array_equal(ref[c].to_numpy(), new[c], equal_nan=True)
+        for c in ("sweep_dir", "charge", "charge_segment", "q_norm")
+    )
+
+    lref, lref_s = timed(lambda: lsv_reference(voltages, currents, args.scan_rate))
+    lnew, lnew_s = timed(
+        lambda: lsv.curve_charge(voltage, current, lengths, args.scan_rate)
+    )
+    lsv_exact = np.array_equal(lref["charge"].to_numpy(), lnew, equal_nan=True)
+
+    rows = [
+        {"kernel": "cv", "rows": len(voltage), "per_curve_ms": ref_s * 1e3,
+         "segmented_ms": new_s * 1e3, "exact": cv_exact},
+        {"kernel": "lsv", "rows": len(voltage), "per_curve_ms": lref_s * 1e3,
+         "segmented_ms": lnew_s * 1e3, "exact": lsv_exact},
+    ]
+    print(pd.DataFrame(rows).to_string(index=False, float_format="%.2f"))
+    return 0 if cv_exact and lsv_exact else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Time CLI and API startup, and check what each path imports.
+
+Runs every scenario in a fresh interpreter, best of `--repeat`, and reports
+whether it imported numpy or pandas. `--info`, `--explore` and `info()`
+read JSON and the sidecar index only, so they must not: the exit status is
+1 when one of them does, which keeps table code from creeping back into
+their imports.
+
+    python benchmarks/bench_import.py --repeat 5
+    python benchmarks/bench_import.py data/data.pssession
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synth import generate  # noqa: E402
+
+HEAVY = ("numpy", "pandas")
+
+# name -> (code run in the child, whether it may import HEAVY)
+SCENARIOS = {
+    "python": ("pass", True),
+    "import psession": ("import psession", False),
+    "info()": ("from psession import info; info(FP)", False),
+    "psession --info": ("from psession.cli import main; main([FP, '--info'])", False),
+    "psession --explore": (
+        "from psession.cli import main; main([FP, '--explore'])",
+        False,
+    ),
+    "parse() eis": (
+        "from psession import parse; parse(FP, methods=['eis']).table('eis')",
+        True,
+    ),
+}
+
+REPORT = """
+import json, sys
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]), file=sys.stderr)
+"""
+
+
+def run(code: str, fp: str) -> tuple:
+    script = f"FP = {fp!r}\n{code}\n" + REPORT.format(heavy=HEAVY)
+    t0 = time.perf_counter()
+    done = subprocess.run(
+        [sys.executable, "-c", script],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    seconds = time.perf_counter() - t0
+    return seconds, json.loads(done.stderr.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument(
+        "file", nargs="?", default=None, help="Session to use (default: synthetic)"
+    )
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args(argv)
+
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fp = os.path.join(tmp, "startup.pssession")
+        if args.file is None:
+            generate(fp, measurements=12, channels=4, points=200)
+        else:
+            shutil.copy(args.file, fp)
+        # decode and index once, so every scenario starts from a warm cache
+        run(SCENARIOS["info()"][0], fp)
+
+        print(f"{'scenario':<20} {'best_ms':>9}  imports")
+        for name, (code, heavy_ok) in SCENARIOS.items():
+            best, imported = float("inf"), []
+            for _ in range(args.repeat):
+                seconds, imported = run(code, fp)
+                best = min(best, seconds)
+            flag = ""
+            if imported and not heavy_ok:
+                failed.append(name)
+                flag = "  <- should not import these"
+            print(
+                f"{name:<20} {best * 1e3:>9.1f}  "
+                f"{', '.join(imported) or '-'}{flag}"
+            )
+
+    if failed:
+        print(f"Heavy imports in: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Peak memory of table assembly relative to the final table size.
+
+Decodes a session once, optionally scales it up by repeating channels and
+measurements, then builds each technique table under tracemalloc and
+reports peak traced memory divided by the memory still held by the result.
+A copy-free build keeps the ratio close to 1.
+
+    python benchmarks/bench_memory.py data/data.pssession --channels 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import tracemalloc
+
+import pandas as pd
+
+from psession.measurements import Parsers
+from psession.parse import parse_pssession_file
+from psession.parsers.parser import PARSERS
+
+CHANNEL_KEYS = ("Curves", "EISDataList")
+
+
+def scale_session(measurements: list, channels: int, repeat: int) -> list:
+    out = []
+    for _ in range(repeat):
+        for m in measurements:
+            m = copy.copy(m)
+            for key in CHANNEL_KEYS:
+                if m.get(key):
+                    m[key] = m[key] * channels
+            out.append(m)
+    return out
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("file", help="Path to a .pssession file")
+    p.add_argument("--channels", type=int, default=1, help="Repeat channels")
+    p.add_argument("--repeat", type=int, default=1, help="Repeat measurements")
+    args = p.parse_args(argv)
+
+    data = parse_pssession_file(args.file)
+    measurements = scale_session(
+        data.get("Measurements", []), args.channels, args.repeat
+    )
+
+    rows = []
+    for parser in PARSERS.values():
+        parsers = Parsers()
+        tracemalloc.start()
+        df = parsers.parse_measurement_data(parser, measurements, [], {})
+        # measured while `df` is alive: repeated metadata strings are shared,
+        # which `memory_usage(deep=True)` would count once per row
+        final, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if df is None or df.empty:
+            continue
+        rows.append(
+            {
+                "table": str(parser),
+                "rows": len(df),
+                "final_mb": final / 1e6,
+                "peak_mb": peak / 1e6,
+                "peak_to_final": peak / final,
+            }
+        )
+
+    print(pd.DataFrame(rows).to_string(index=False, float_format="%.2f"))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Time and memory-profile each parsing stage on synthetic sessions.
+
+For every size preset a session is generated with `synth.py`, then each
+stage (decode, JSON load, Method parsing, table assembly, enrichment,
+summary, sort, cache write/read) runs on its own: wall time is the best of
+`--repeat` runs, peak memory comes from one extra run under tracemalloc.
+
+Results can be saved as JSON and compared with a previous run; stages
+slower than `--tolerance` times the baseline are reported and make the
+script exit with status 1.
+
+    python benchmarks/bench_stages.py --sizes small,medium --save base.json
+    python benchmarks/bench_stages.py --sizes small,medium --compare base.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synth  # noqa: E402
+
+from psession import __version__  # noqa: E402
+from psession.enrichments import default_enrichments  # noqa: E402
+from psession.measurements import Parsers, enrich_df  # noqa: E402
+from psession.parse import (  # noqa: E402
+    detect_bom,
+    load_json_prefix,
+    stream_decode,
+)
+from psession.parsers.common import clear_method_cache  # noqa: E402
+from psession.parsers.parser import PARSERS  # noqa: E402
+from psession.parsers.sorting import sort_table  # noqa: E402
+from psession.serializers import SERIALIZERS  # noqa: E402
+
+# measurements, channels, points per curve
+SIZES = {
+    "small": (6, 2, 200),
+    "medium": (30, 8, 400),
+    "large": (60, 16, 1000),
+}
+
+
+@dataclass
+class Result:
+    size: str
+    stage: str
+    technique: str
+    seconds: float
+    peak_mb: float
+    rows: int
+    bytes: int
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[], object]
+    technique: str = ""
+    # fresh inputs for stages that modify them, built outside the timing
+    setup: Optional[Callable[[], tuple]] = None
+    bytes: int = 0
+
+
+def measure(stage: Stage, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        args = stage.setup() if stage.setup else ()
+        t0 = time.perf_counter()
+        out = stage.run(*args)
+        best = min(best, time.perf_counter() - t0)
+
+    args = stage.setup() if stage.setup else ()
+    tracemalloc.start()
+    stage.run(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rows = len(out) if hasattr(out, "__len__") else 0
+    return best, peak, rows
+
+
+def session_stages(fp: str, tmp: str) -> List[Stage]:
+    encoding, offset = detect_bom(fp)
+    size = os.path.getsize(fp)
+    text = stream_decode(fp, encoding, offset=offset)
+    data, _ = load_json_prefix(text)
+    measurements = data["Measurements"]
+    parsers = Parsers()
+
+    def classify():
+        clear_method_cache()
+        return parsers.classify(measurements)
+
+    stages = [
+        Stage("decode", lambda: stream_decode(fp, encoding, offset), bytes=size),
+        Stage("json", lambda: load_json_prefix(text)[0]["Measurements"]),
+        Stage("method", classify),
+    ]
+
+    by_method = parsers.classify(measurements)
+    enrichments = default_enrichments()
+    for mid, parser in PARSERS.items():
+        ms, methods = by_method.get(mid, ([], []))
+        if not ms:
+            continue
+        tech = str(parser)
+
+        def assemble(parser=parser, ms=ms, methods=methods):
+            return parsers.assemble(parser, ms, methods, False)[0]
+
+        raw, lengths, _ = parsers.assemble(parser, ms, methods, False)
+        df = enrich_df(raw, enrichments)
+        stages.append(Stage("build", assemble, tech))
+        stages.append(
+            Stage(
+                "enrich",
+                lambda d: enrich_df(d, enrichments, inplace=True),
+                tech,
+                setup=lambda raw=raw: (raw.copy(),),
+            )
+        )
+        if parser.summarize is not None:
+            stages.append(
+                Stage(
+                    "summarize",
+                    lambda p=parser, d=df, n=lengths: p.summarize(d, n),
+                    tech,
+                )
+            )
+        stages.append(
+            Stage(
+                "sort",
+                lambda d, p=parser, n=lengths: sort_table(d, p.sort_keys, n),
+                tech,
+                setup=lambda df=df: (df.copy(),),
+            )
+        )
+
+        for serializer in SERIALIZERS.values():
+            if not serializer.available():
+                continue
+            path = os.path.join(tmp, f"{tech}.{serializer.suffix}")
+            serializer.write(df, path)
+            n_bytes = os.path.getsize(path)
+            stages.append(
+                Stage(
+                    f"cache_write_{serializer.name}",
+                    lambda s=serializer, p=path, d=df: s.write(d, p) or d,
+                    tech,
+                    bytes=n_bytes,
+                )
+            )
+            stages.append(
+                Stage(
+                    f"cache_read_{serializer.name}",
+                    lambda s=serializer, p=path: s.read(p),
+                    tech,
+                    bytes=n_bytes,
+                )
+            )
+    return stages
+
+
+def run(sizes: List[str], repeat: int, seed: int) -> List[Result]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            n_meas, channels, points = SIZES[size]
+            fp = os.path.join(tmp, f"{size}.pssession")
+            synth.generate(
+                fp,
+                measurements=n_meas,
+                channels=channels,
+                points=points,
+                seed=seed,
+            )
+            for stage in session_stages(fp, tmp):
+                seconds, peak, rows = measure(stage, repeat)
+                result = Result(
+                    size,
+                    stage.name,
+                    stage.technique,
+                    seconds,
+                    peak / 1e6,
+                    rows,
+                    stage.bytes,
+                )
+                results.append(result)
+                print(f"{size:>6} {stage.name:<18} {stage.technique:<4} {seconds:.4f}s")
+    return results
+
+
+def metadata() -> Dict[str, str]:
+    return {
+        "psession": __version__,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def compare(
+    results: List[Result], fp: str, tolerance: float, min_seconds: float
+) -> bool:
+    """Print current vs baseline; True when no stage regressed.
+
+    Stages faster than `min_seconds` in the baseline are too noisy to flag.
+    """
+    with open(fp) as f:
+        base = json.load(f)
+    key = ["size", "stage", "technique"]
+    old = pd.DataFrame(base["results"]).set_index(key)
+    new = pd.DataFrame([asdict(r) for r in results]).set_index(key)
+    both = new.join(old, rsuffix="_base", how="inner")
+    both["time_ratio"] = both["seconds"] / both["seconds_base"]
+    both["peak_ratio"] = both["peak_mb"] / both["peak_mb_base"]
+    both["regressed"] = (both["time_ratio"] > tolerance) & (
+        both["seconds_base"] >= min_seconds
+    )
+    cols = [
+        "seconds_base",
+        "seconds",
+        "time_ratio",
+        "peak_mb_base",
+        "peak_mb",
+        "peak_ratio",
+        "regressed",
+    ]
+    print(both[cols].to_string(float_format="%.4f"))
+    return not both["regressed"].any()
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", default="small,medium", help="Comma separated presets")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--save", help="Write results as JSON to this path")
+    p.add_argument("--compare", help="Baseline JSON from a previous --save")
+    p.add_argument("--tolerance", type=float, default=1.25)
+    p.add_argument("--min-seconds", type=float, default=0.005)
+    args = p.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        p.error(f"unknown sizes {unknown}, expected some of {sorted(SIZES)}")
+
+    results = run(sizes, args.repeat, args.seed)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            rows = [asdict(r) for r in results]
+            json.dump({"meta": metadata(), "results": rows}, f, indent=1)
+    if args.compare:
+        ok = compare(results, args.compare, args.tolerance, args.min_seconds)
+        return 0 if ok else 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
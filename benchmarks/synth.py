@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Write synthetic PalmSens .pssession files.
+
+Sessions mirror what PSTrace saves: a UTF-16 (LE, with BOM) JSON document
+holding measurements with a Method script, CV/LSV `Curves` or EIS
+`EISDataList` channels whose points are `{"V", "S", "C"/"R"}` dicts, and
+optionally trailing garbage after the JSON (real files end in a stray BOM).
+
+    python benchmarks/synth.py out.pssession --measurements 40 --channels 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+from datetime import datetime, timedelta
+from typing import List, Sequence
+
+TECHNIQUES = ("cv", "lsv", "eis")
+TICKS_PER_SECOND = 10_000_000
+EPOCH = datetime(1, 1, 1)
+
+METHOD_HEADER = """#PSTrace, Version=5.11.1006.19013
+#{stamp}
+#
+#Method file version
+METHOD_VERSION=1
+#Technique and application
+METHOD_ID={method_id}
+TECHNIQUE={technique}
+NOTES=
+#Pretreatment and standby
+E_COND=0.0000000E+000
+T_COND=0.0000000E+000
+E_DEP=0.0000000E+000
+T_DEP=0.0000000E+000
+T_EQUIL=0.0000000E+000
+#Current ranges
+IRANGE_MIN=0
+IRANGE_MAX=6
+IRANGE_START=5
+#Mux Settings
+MUX_METHOD=0
+USE_MUX_CH={channels}
+MUX_SETTINGS=0|False|False|False|False
+"""
+
+METHOD_PARAMS = {
+    "cv": """#Potential method parameters
+E_BEGIN={e_begin:.7E}
+E_END={e_end:.7E}
+E_STEP={e_step:.7E}
+#Cyclic voltammetry parameters
+N_SCANS={n_scans}
+SCAN_RATE={scan_rate:.7E}
+E_VTX1={e_vtx1:.7E}
+E_VTX2={e_vtx2:.7E}
+""",
+    "lsv": """#Potential method parameters
+E_BEGIN={e_begin:.7E}
+E_END={e_end:.7E}
+E_STEP={e_step:.7E}
+#Linear sweep parameters
+N_SCANS=1
+SCAN_RATE={scan_rate:.7E}
+""",
+    "eis": """#Impedance parameters
+SCAN_TYPE=2
+FREQ_TYPE=1
+E_DC=0.0000000E+000
+E_AC=1.0000000E-002
+N_FREQ={n_freq}
+MAX_FREQ={max_freq:.7E}
+MIN_FREQ={min_freq:.7E}
+""",
+}
+TECHNIQUE_NUMBERS = {"cv": 5, "lsv": 0, "eis": 14}
+
+POTENTIAL_UNIT = {"Type": "PalmSens.Units.Volt", "S": "V", "Q": "Potential", "A": "E"}
+CURRENT_UNIT = {
+    "Type": "PalmSens.Units.MicroAmpere",
+    "S": "A",
+    "Q": "Current",
+    "A": "i",
+}
+EIS_ARRAYS = [
+    ("Idc", CURRENT_UNIT),
+    ("Frequency", {"Type": "PalmSens.Units.Hertz", "S": "Hz", "Q": "Frequency"}),
+    ("ZRe", {"Type": "PalmSens.Units.ZRe", "S": "Ω", "Q": "Z'"}),
+    ("ZIm", {"Type": "PalmSens.Units.ZIm", "S": "Ω", "Q": "-Z''"}),
+    ("Z", {"Type": "PalmSens.Units.Z", "S": "Ω", "Q": "Z"}),
+    ("Phase", {"Type": "PalmSens.Units.Phase", "S": "°", "Q": "-Phase"}),
+    ("Capacitance", {"Type": "PalmSens.Units.Capacitance", "S": "F"}),
+    ("Capacitance'", {"Type": "PalmSens.Units.Capacitance", "S": "F"}),
+    ("Capacitance''", {"Type": "PalmSens.Units.Capacitance", "S": "F"}),
+]
+
+
+def to_ticks(dt: datetime) -> int:
+    delta = dt - EPOCH
+    seconds = delta.days * 86400 + delta.seconds
+    return seconds * TICKS_PER_SECOND + delta.microseconds * 10
+
+
+def method_text(method_id: str, channels: int, stamp: datetime, params: dict) -> str:
+    text = METHOD_HEADER.format(
+        stamp=stamp.strftime("%Y-%m-%d %H:%M:%S"),
+        method_id=method_id,
+        technique=TECHNIQUE_NUMBERS[method_id],
+        channels=channels,
+    ) + METHOD_PARAMS[method_id].format(**params)
+    return text.replace("\n", "\r\n")
+
+
+def data_array(description: str, unit: dict, points: List[dict], kind: str) -> dict:
+    return {
+        "Type": f"PalmSens.Data.{kind}",
+        "ArrayType": 1,
+        "Description": description,
+        "DataValueType": "PalmSens.Data.GenericValue",
+        "Unit": unit,
+        "DataValues": points,
+    }
+
+
+def potentials(values: Sequence[float]) -> List[dict]:
+    return [{"V": v, "S": 0, "R": 7} for v in values]
+
+
+def currents(values: Sequence[float]) -> List[dict]:
+    return [{"V": v, "C": 5, "S": 2} for v in values]
+
+
+def curve(title: str, voltage: Sequence[float], current: Sequence[float], rng) -> dict:
+    return {
+        "Appearance": {"Type": "PalmSens.Plottables.VisualSettings", "LineWidth": 2},
+        "Title": title,
+        "Hash": [rng.randrange(256) for _ in range(48)],
+        "Type": "PalmSens.Plottables.Curve",
+        "XAxis": 0,
+        "YAxis": 0,
+        "MeasType": 1,
+        "XAxisDataArray": data_array(
+            "potential", POTENTIAL_UNIT, potentials(voltage), "DataArrayPotentials"
+        ),
+        "YAxisDataArray": data_array(
+            "current", CURRENT_UNIT, currents(current), "DataArray"
+        ),
+    }
+
+
+def cv_channels(channels: int, points: int, params: dict, rng) -> List[dict]:
+    hi, lo = params["e_vtx1"], params["e_vtx2"]
+    out = []
+    for ch in range(1, channels + 1):
+        gain = rng.uniform(0.5, 2.0)
+        for scan in range(1, params["n_scans"] + 1):
+            voltage, current = [], []
+            for k in range(points):
+                t = k / max(1, points - 1)
+                # begin at 0, up to vtx1, down to vtx2, back to 0
+                if t < 0.25:
+                    v = hi * t / 0.25
+                elif t < 0.75:
+                    v = hi + (lo - hi) * (t - 0.25) / 0.5
+                else:
+                    v = lo * (1.0 - (t - 0.75) / 0.25)
+                up = 1.0 if t < 0.25 or t >= 0.75 else -1.0
+                i = gain * (20 * math.tanh(3 * v) + 5 * up) + rng.gauss(0, 0.05)
+                voltage.append(v)
+                current.append(i)
+            title = f"CV i vs E Scan {scan} Channel {ch}"
+            out.append(curve(title, voltage, current, rng))
+    return out
+
+
+def lsv_channels(channels: int, points: int, params: dict, rng) -> List[dict]:
+    e0, e1 = params["e_begin"], params["e_end"]
+    out = []
+    for ch in range(1, channels + 1):
+        gain = rng.uniform(0.1, 5.0)
+        voltage = [e0 + (e1 - e0) * k / max(1, points - 1) for k in range(points)]
+        current = [gain * math.exp(2 * v) + rng.gauss(0, 0.01) for v in voltage]
+        out.append(curve(f"LSV i vs E Channel {ch}", voltage, current, rng))
+    return out
+
+
+def eis_channels(channels: int, points: int, params: dict, rng) -> List[dict]:
+    n = points
+    fmax, fmin = params["max_freq"], params["min_freq"]
+    out = []
+    for ch in range(1, channels + 1):
+        r_s, r_ct, c_dl = rng.uniform(50, 200), rng.uniform(1e3, 1e5), 1e-6
+        freq = [fmax * (fmin / fmax) ** (k / max(1, n - 1)) for k in range(n)]
+        cols = {name: [] for name, _ in EIS_ARRAYS}
+        for f in freq:
+            w = 2 * math.pi * f
+            z = complex(r_s) + r_ct / complex(1, w * r_ct * c_dl)
+            c = 1 / (w * abs(z))
+            cols["Idc"].append(rng.gauss(0, 1))
+            cols["Frequency"].append(f)
+            cols["ZRe"].append(z.real)
+            cols["ZIm"].append(-z.imag)
+            cols["Z"].append(abs(z))
+            cols["Phase"].append(-math.degrees(math.atan2(z.imag, z.real)))
+            cols["Capacitance"].append(c)
+            cols["Capacitance'"].append(c * 0.9)
+            cols["Capacitance''"].append(c * 0.1)
+        values = [
+            data_array(name, unit, [{"V": v} for v in cols[name]], "DataArray")
+            for name, unit in EIS_ARRAYS
+        ]
+        out.append(
+            {
+                "Title": f"CH {ch}: {n} freqs",
+                "Hash": [rng.randrange(256) for _ in range(48)],
+                "Type": "PalmSens.Plottables.EISData",
+                "ScanType": 2,
+                "FreqType": 1,
+                "CDC": None,
+                "FitValues": [],
+                "DataSet": {"Type": "PalmSens.Data.DataSetEIS", "Values": values},
+            }
+        )
+    return out
+
+
+def technique_params(method_id: str, points: int, rng) -> dict:
+    if method_id == "cv":
+        return {
+            "e_begin": 0.0,
+            "e_end": 0.5,
+            "e_step": 0.02,
+            "n_scans": rng.choice([1, 3, 5]),
+            "scan_rate": rng.choice([0.1, 0.5, 2.0]),
+            "e_vtx1": 1.0,
+            "e_vtx2": -1.0,
+        }
+    if method_id == "lsv":
+        return {"e_begin": 0.0, "e_end": 2.0, "e_step": 0.01, "scan_rate": 1.0}
+    return {"n_freq": points, "max_freq": 1e5, "min_freq": 1.0}
+
+
+def measurement(
+    method_id: str,
+    index: int,
+    channels: int,
+    points: int,
+    stamp: datetime,
+    rng,
+    title: str = None,
+) -> dict:
+    params = technique_params(method_id, points, rng)
+    builder = {"cv": cv_channels, "lsv": lsv_channels, "eis": eis_channels}
+    data = builder[method_id](channels, points, params, rng)
+    names = {"cv": "Cyclic Voltammetry", "lsv": "Linear Sweep Voltammetry"}
+    m = {
+        "Title": title or f"{names.get(method_id, 'Impedance Spectroscopy')} [{index}]",
+        "TimeStamp": to_ticks(stamp),
+        "UTCTimeStamp": to_ticks(stamp - timedelta(hours=2)),
+        "DeviceUsed": "9",
+        "DeviceSerial": "PS4SYNTH0001",
+        "DeviceFW": "1.7 Aug  8 2024 15:42:56",
+        "Type": "PalmSens.Comm.GenericCommMeasurement",
+        "DataSet": {"Type": "PalmSens.Data.DataSetCommon", "Values": []},
+        "Method": method_text(method_id, channels, stamp, params),
+        "Curves": [],
+        "EISDataList": [],
+    }
+    m["EISDataList" if method_id == "eis" else "Curves"] = data
+    return m
+
+
+def session(
+    measurements: int = 6,
+    channels: int = 2,
+    points: int = 200,
+    techniques: Sequence[str] = TECHNIQUES,
+    seed: int = 0,
+    start: datetime = datetime(2025, 8, 27, 16, 38),
+    titles: Sequence[str] = (),
+) -> dict:
+    """A session dict with `measurements` measurements cycling through
+    `techniques`, each with `channels` channels of `points` points (EIS:
+    frequencies). `titles`, when given, are used in turn as titles."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(measurements):
+        method_id = techniques[i % len(techniques)]
+        stamp = start + timedelta(seconds=45 * i, microseconds=rng.randrange(10**6))
+        title = titles[i % len(titles)] if titles else None
+        out.append(measurement(method_id, i, channels, points, stamp, rng, title))
+    return {
+        "Type": "PalmSens.DataFiles.SessionFile",
+        "CoreVersion": "5.11.1006.0",
+        "MethodForMeasurement": out[0]["Method"] if out else "",
+        "Measurements": out,
+    }
+
+
+def write_session(fp: str, data: dict, garbage: int = 1, encoding: str = "utf-16"):
+    """Write `data` as PSTrace does, followed by `garbage` stray BOMs."""
+    text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    with open(fp, "wb") as f:
+        f.write(text.encode(encoding))
+        f.write("﻿".encode("utf-16-le") * garbage)
+
+
+def generate(fp: str, garbage: int = 1, **kwargs) -> str:
+    write_session(fp, session(**kwargs), garbage=garbage)
+    return fp
+
+
+def _techniques(s: str) -> List[str]:
+    out = [t.strip().lower() for t in s.split(",") if t.strip()]
+    unknown = [t for t in out if t not in TECHNIQUES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown techniques: {unknown}")
+    return out
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("out", help="Output .pssession path")
+    p.add_argument("--measurements", type=int, default=6)
+    p.add_argument("--channels", type=int, default=2)
+    p.add_argument("--points", type=int, default=200, help="Points per curve")
+    p.add_argument("--techniques", type=_techniques, default=list(TECHNIQUES))
+    p.add_argument("--garbage", type=int, default=1, help="Trailing stray BOMs")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    generate(
+        args.out,
+        garbage=args.garbage,
+        measurements=args.measurements,
+        channels=args.channels,
+        points=args.points,
+        techniques=args.techniques,
+        seed=args.seed,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
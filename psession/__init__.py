@@ -1,9 +1,47 @@
 """psession public API.
 
 Lightweight helpers to parse PalmSens `.pssession` files.
+
+Importing the package is cheap: numpy and pandas are imported once tables
+are built, and the asyncio and SQLite front ends on first access.
 """
 
-from .parse import parse, info
+from importlib import import_module
+
+from .parse import parse, parse_many, info
+from .profiling import Profiler, Span, add_callback, profile, remove_callback
 
-__all__ = ["parse", "info"]
+__all__ = [
+    "parse",
+    "parse_many",
+    "info",
+    "aparse",
+    "ainfo",
+    "Catalog",
+    "profile",
+    "Profiler",
+    "Span",
+    "add_callback",
+    "remove_callback",
+]
 __version__ = "0.1.0"
+
+# public name -> module defining it, imported on first access
+_LAZY = {
+    "aparse": "aio",
+    "ainfo": "aio",
+    "Catalog": "catalog",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
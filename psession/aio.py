@@ -0,0 +1,122 @@
+"""Asyncio front end of `parse` and `info`.
+
+The standard library has no asynchronous file API, so the blocking work is
+moved off the event loop instead: `ainfo`, which only reads a session's
+sidecar index once it has one, runs on the loop's default thread pool, and
+`aparse` runs the whole parse (file I/O, decoding and building every
+requested table) on a configurable executor. A process pool works too,
+as long as enrichments are picklable (module-level functions).
+
+At most `max_concurrency` parses run at once per event loop, and
+concurrent requests for the same file with the same arguments share one
+in-flight parse, so they also share its `Measurements`: treat its tables as
+read-only, or copy them before changing them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import weakref
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .cache import config_key
+from .parse import info, parse
+
+if TYPE_CHECKING:
+    from .measurements import Measurements
+
+DEFAULT_CONCURRENCY = 4
+
+
+def parse_loaded(file_path: str, kwargs: dict) -> Measurements:
+    """`parse`, with every requested table built before returning."""
+    measurements = parse(file_path, **kwargs)
+    measurements.load_all()
+    return measurements
+
+
+@dataclass
+class _LoopState:
+    semaphore: asyncio.Semaphore
+    inflight: Dict[tuple, asyncio.Future] = field(default_factory=dict)
+
+
+class AsyncParser:
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+    ):
+        """`executor` runs parses (None for the loop's default thread pool);
+        `max_concurrency` caps how many run at once on each event loop."""
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        # per event loop, as asyncio primitives belong to one
+        self._states = weakref.WeakKeyDictionary()
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = _LoopState(asyncio.Semaphore(self.max_concurrency))
+            self._states[loop] = state
+        return state
+
+    async def _shared(self, key: tuple, run):
+        state = self._state()
+        future = state.inflight.get(key)
+        if future is None:
+
+            async def limited():
+                async with state.semaphore:
+                    return await run()
+
+            future = asyncio.ensure_future(limited())
+            state.inflight[key] = future
+            future.add_done_callback(lambda _: state.inflight.pop(key, None))
+        # a cancelled caller leaves the parse running for the others
+        return await asyncio.shield(future)
+
+    async def parse(self, file_path: str, **kwargs) -> Measurements:
+        """`parse(file_path, **kwargs)` with its tables built, off the loop."""
+        loop = asyncio.get_running_loop()
+        key = ("parse", os.path.abspath(file_path), config_key(kwargs))
+        return await self._shared(
+            key,
+            lambda: loop.run_in_executor(
+                self.executor, parse_loaded, file_path, kwargs
+            ),
+        )
+
+    async def info(self, file_path: str, **kwargs) -> List[dict]:
+        """`info(file_path, **kwargs)`, on the loop's default thread pool."""
+        loop = asyncio.get_running_loop()
+        key = ("info", os.path.abspath(file_path), config_key(kwargs))
+        return await self._shared(
+            key, lambda: loop.run_in_executor(None, lambda: info(file_path, **kwargs))
+        )
+
+
+_default = AsyncParser()
+
+
+def configure(
+    executor: Optional[Executor] = None,
+    max_concurrency: int = DEFAULT_CONCURRENCY,
+):
+    """Set the executor and concurrency cap used by `aparse` and `ainfo`."""
+    global _default
+    _default = AsyncParser(executor=executor, max_concurrency=max_concurrency)
+
+
+async def aparse(file_path: str, **kwargs) -> Measurements:
+    """Asynchronous `parse`; the result has every requested table loaded."""
+    return await _default.parse(file_path, **kwargs)
+
+
+async def ainfo(file_path: str, **kwargs) -> List[dict]:
+    """Asynchronous `info`."""
+    return await _default.info(file_path, **kwargs)
@@ -0,0 +1,166 @@
+"""Content-addressed cache bookkeeping.
+
+Artifacts derived from a session (the decoded JSON and the per-technique
+tables) are recorded in a manifest next to the cache together with the key
+they were built under. Keys combine a digest of the source file with the
+parse configuration, so editing the session, upgrading psession or changing
+`opts`/enrichments misses the cache instead of serving stale tables.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import types
+from dataclasses import dataclass, field
+from typing import Optional
+
+CACHE_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+DIGEST_CHUNK_SIZE = 1 << 20
+
+# manifests are read, merged and rewritten whole; one at a time per process
+_record_lock = threading.Lock()
+
+
+def temp_path(fp: str) -> str:
+    """Private temporary next to `fp`, to be moved over it with `os.replace`
+    so concurrent writers never share one."""
+    return f"{fp}.{os.getpid()}-{threading.get_ident()}.tmp"
+
+
+def file_digest(fp: str, chunk_size: int = DIGEST_CHUNK_SIZE) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(fp, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(fp: str, previous: Optional[dict] = None) -> dict:
+    """Describe `fp` by size, mtime and content digest.
+
+    The digest from `previous` is reused when size and mtime are unchanged,
+    so unchanged files are never re-hashed.
+    """
+    st = os.stat(fp)
+    out = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    previous = previous or {}
+    if (
+        previous.get("digest")
+        and previous.get("size") == out["size"]
+        and previous.get("mtime_ns") == out["mtime_ns"]
+    ):
+        out["digest"] = previous["digest"]
+    else:
+        out["digest"] = file_digest(fp)
+    return out
+
+
+def _code_token(code: types.CodeType) -> list:
+    return [
+        hashlib.blake2b(code.co_code, digest_size=8).hexdigest(),
+        list(code.co_names),
+        [
+            _code_token(c) if isinstance(c, types.CodeType) else repr(c)
+            for c in code.co_consts
+        ],
+    ]
+
+
+def _token(obj):
+    """JSON-friendly, process-independent stand-in for `obj`.
+
+    Callables (e.g. enrichment lambdas) are identified by name and bytecode
+    and other objects by type and attributes, so editing a rule invalidates
+    tables built with it.
+    """
+    if isinstance(obj, dict):
+        return {str(k): _token(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_token(v) for v in obj]
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    code = getattr(obj, "__code__", None)
+    if code is not None:
+        name = f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', '')}"
+        return [name, _code_token(code)]
+    if hasattr(obj, "__dict__"):
+        return [type(obj).__qualname__, _token(vars(obj))]
+    return repr(obj)
+
+
+def config_key(*parts) -> str:
+    payload = json.dumps(_token(list(parts)), sort_keys=True)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def psession_version() -> str:
+    from . import __version__  # late import, the package imports us
+
+    return __version__
+
+
+@dataclass
+class Manifest:
+    path: str
+    source: dict = field(default_factory=dict)
+    entries: dict = field(default_factory=dict)
+    # the manifest as it was before the source changed, if it did
+    previous: Optional["Manifest"] = field(default=None, repr=False)
+
+    @classmethod
+    def load(cls, path: str) -> "Manifest":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        return cls(path, raw.get("source", {}), raw.get("entries", {}))
+
+    @classmethod
+    def for_source(cls, fp: str, cache_path: Optional[str] = None) -> "Manifest":
+        """Load the manifest of `fp` and refresh its source fingerprint."""
+        cache_path = cache_path or os.path.dirname(fp)
+        manifest = cls.load(
+            os.path.join(cache_path, os.path.basename(fp) + MANIFEST_SUFFIX)
+        )
+        source = fingerprint(fp, manifest.source)
+        if source["digest"] != manifest.source.get("digest"):
+            manifest.previous = cls(manifest.path, manifest.source, manifest.entries)
+            manifest.entries = {}
+        manifest.source = source
+        return manifest
+
+    @property
+    def source_key(self) -> str:
+        return config_key(
+            CACHE_VERSION, psession_version(), self.source.get("digest")
+        )
+
+    def valid(self, name: str, key: Optional[str]) -> bool:
+        return key is not None and self.entries.get(name) == key
+
+    def record(self, name: str, key: Optional[str]):
+        """Record `name` as built under `key`, keeping what other parses of
+        the same source recorded since this manifest was loaded."""
+        if key is None:
+            return
+        with _record_lock:
+            current = Manifest.load(self.path)
+            # every record is saved, so the file holds ours and theirs
+            if current.source.get("digest") == self.source.get("digest"):
+                self.entries = current.entries
+            self.entries[name] = key
+            self.save()
+
+    def save(self):
+        tmp = temp_path(self.path)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "entries": self.entries}, f, indent=2)
+        os.replace(tmp, self.path)
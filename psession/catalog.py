@@ -0,0 +1,335 @@
+"""Local SQLite catalog of the measurements in many sessions.
+
+`Catalog.update` crawls files and directories (recursively) for
+`.pssession` files and records, per measurement, what `parse_common`
+reads, the technique's `info_keys`, the channel numbers and the device and
+block `parsers.common.parse_title` reads from the title. Files whose size
+and mtime are unchanged since the last crawl are skipped; the others are read
+through their sidecar index (see `psession.index`), so sessions that were
+already parsed are not decoded again.
+
+`Catalog.query` answers from indexed columns and returns references to
+the matching measurements: the session path and the measurement's position
+in its `Measurements` array, next to its metadata.
+
+Channel numbers are the session's own, as in `Selection`: the number in
+the channel title, before enrichments such as the +16 offset of bottom
+blocks.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+from .parse import session_index
+from .parsers.common import MEASUREMENT_ID, parse_common, parse_title
+from .selection import When, as_datetime
+
+CATALOG_VERSION = 1
+# fixed width, so ISO dates compare in SQL as they do as datetimes
+DATE_FMT = "%Y-%m-%d %H:%M:%S.%f"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    indexed_at REAL NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    date TEXT NOT NULL,
+    measurement_id TEXT NOT NULL,
+    method_id TEXT,
+    device TEXT,
+    block TEXT,
+    channels TEXT NOT NULL,
+    info TEXT
+);
+CREATE TABLE IF NOT EXISTS measurement_channels (
+    measurement INTEGER NOT NULL REFERENCES measurements(id) ON DELETE CASCADE,
+    channel INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS measurement_info (
+    measurement INTEGER NOT NULL REFERENCES measurements(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS measurements_file ON measurements(file_id);
+CREATE INDEX IF NOT EXISTS measurements_method ON measurements(method_id, date);
+CREATE INDEX IF NOT EXISTS measurements_device ON measurements(device, block, date);
+CREATE INDEX IF NOT EXISTS measurements_date ON measurements(date);
+CREATE INDEX IF NOT EXISTS channels_channel ON measurement_channels(channel);
+CREATE INDEX IF NOT EXISTS channels_measurement ON measurement_channels(measurement);
+CREATE INDEX IF NOT EXISTS info_key ON measurement_info(key, value);
+CREATE INDEX IF NOT EXISTS info_measurement ON measurement_info(measurement);
+"""
+TABLES = ("measurement_info", "measurement_channels", "measurements", "files")
+
+
+def crawl(sources: Union[str, Iterable[str]]) -> List[str]:
+    """Session paths under `sources`, directories searched recursively."""
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    out = []
+    for src in map(str, sources):
+        if not os.path.isdir(src):
+            out.append(src)
+            continue
+        for root, dirs, files in os.walk(src):
+            dirs.sort()
+            out.extend(
+                os.path.join(root, f) for f in sorted(files) if f.endswith(".pssession")
+            )
+    return list(dict.fromkeys(os.path.abspath(fp) for fp in out))
+
+
+def _regexp(pattern: str, value: Optional[str]) -> bool:
+    return value is not None and re.search(pattern, value) is not None
+
+
+def _sql_value(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return json.dumps(value)
+
+
+def catalog_rows(entry: dict) -> dict:
+    """Catalog columns of one sidecar index entry."""
+    common = parse_common(entry)
+    title = parse_title(common)
+    return {
+        "position": entry["position"],
+        "title": common["title"],
+        "date": common["date"].strftime(DATE_FMT),
+        "measurement_id": common[MEASUREMENT_ID],
+        "method_id": entry["method_id"],
+        "device": title.get("device"),
+        "block": title.get("block"),
+        "channels": entry.get("channel_numbers") or [],
+        "info": entry["info"],
+    }
+
+
+@dataclass
+class CatalogUpdate:
+    indexed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+class Catalog:
+    def __init__(self, path: str, cache_path: Optional[str] = None):
+        """Open (or create) the catalog database at `path`; `cache_path` is
+        where sessions' caches and indexes go, as in `parse`."""
+        self.path = path
+        self.cache_path = cache_path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.create_function("REGEXP", 2, _regexp, deterministic=True)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.execute("PRAGMA journal_mode = WAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+            with self.db:
+                for table in TABLES:
+                    self.db.execute(f"DROP TABLE IF EXISTS {table}")
+                self.db.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def update(
+        self,
+        sources: Union[str, Iterable[str]],
+        force_reload: bool = False,
+        prune: bool = True,
+    ) -> CatalogUpdate:
+        """Record the sessions under `sources`, skipping unchanged files.
+
+        With `prune`, catalogued files under the crawled directories that no
+        longer exist are removed.
+        """
+        if isinstance(sources, (str, os.PathLike)):
+            sources = [sources]
+        sources = list(map(str, sources))
+        result = CatalogUpdate()
+        known = {
+            row["path"]: row
+            for row in self.db.execute("SELECT path, size, mtime_ns FROM files")
+        }
+
+        for fp in crawl(sources):
+            try:
+                st = os.stat(fp)
+            except OSError as e:
+                result.errors[fp] = f"{type(e).__name__}: {e}"
+                continue
+            row = known.get(fp)
+            if (
+                not force_reload
+                and row is not None
+                and (row["size"], row["mtime_ns"]) == (st.st_size, st.st_mtime_ns)
+            ):
+                result.skipped.append(fp)
+                continue
+
+            try:
+                entries, error = self._entries(fp, force_reload), None
+            except Exception as e:
+                entries, error = [], f"{type(e).__name__}: {e}"
+                result.errors[fp] = error
+            else:
+                result.indexed.append(fp)
+            with self.db:
+                self._record(fp, st, entries, error)
+
+        if prune:
+            roots = [os.path.abspath(s) for s in sources if os.path.isdir(s)]
+            gone = [
+                fp
+                for fp in known
+                if not os.path.exists(fp)
+                and any(fp.startswith(os.path.join(r, "")) for r in roots)
+            ]
+            with self.db:
+                self.db.executemany(
+                    "DELETE FROM files WHERE path = ?", [(fp,) for fp in gone]
+                )
+            result.removed.extend(gone)
+        return result
+
+    def _entries(self, fp: str, force_reload: bool) -> List[dict]:
+        return session_index(fp, force_reload=force_reload, cache_path=self.cache_path)
+
+    def _record(self, fp: str, st: os.stat_result, entries: List[dict], error):
+        self.db.execute("DELETE FROM files WHERE path = ?", (fp,))
+        file_id = self.db.execute(
+            "INSERT INTO files (path, size, mtime_ns, indexed_at, error) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (fp, st.st_size, st.st_mtime_ns, time.time(), error),
+        ).lastrowid
+        for entry in entries:
+            row = catalog_rows(entry)
+            mid = self.db.execute(
+                "INSERT INTO measurements (file_id, position, title, date, "
+                "measurement_id, method_id, device, block, channels, info) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file_id,
+                    row["position"],
+                    row["title"],
+                    row["date"],
+                    row["measurement_id"],
+                    row["method_id"],
+                    row["device"],
+                    row["block"],
+                    json.dumps(row["channels"]),
+                    json.dumps(row["info"]) if row["info"] is not None else None,
+                ),
+            ).lastrowid
+            self.db.executemany(
+                "INSERT INTO measurement_channels (measurement, channel) "
+                "VALUES (?, ?)",
+                [(mid, c) for c in row["channels"]],
+            )
+            self.db.executemany(
+                "INSERT INTO measurement_info (measurement, key, value) "
+                "VALUES (?, ?, ?)",
+                [(mid, k, _sql_value(v)) for k, v in (row["info"] or {}).items()],
+            )
+
+    def query(
+        self,
+        method: Optional[str] = None,
+        device: Optional[str] = None,
+        block: Optional[str] = None,
+        channel: Optional[int] = None,
+        since: When = None,
+        until: When = None,
+        title: Optional[str] = None,
+        info: Optional[dict] = None,
+    ) -> List[dict]:
+        """Measurements matching every given filter, by date.
+
+        `since` is included and `until` excluded, `title` is a regex and
+        `info` maps info keys to the values they must equal.
+        """
+        where, params = [], []
+        if method is not None:
+            where.append("m.method_id = ?")
+            params.append(method.lower())
+        if device is not None:
+            where.append("m.device = ?")
+            params.append(device)
+        if block is not None:
+            where.append("m.block = ?")
+            params.append(block)
+        if since is not None:
+            where.append("m.date >= ?")
+            params.append(as_datetime(since).strftime(DATE_FMT))
+        if until is not None:
+            where.append("m.date < ?")
+            params.append(as_datetime(until).strftime(DATE_FMT))
+        if title is not None:
+            where.append("m.title REGEXP ?")
+            params.append(title)
+        if channel is not None:
+            where.append(
+                "EXISTS (SELECT 1 FROM measurement_channels c "
+                "WHERE c.measurement = m.id AND c.channel = ?)"
+            )
+            params.append(int(channel))
+        for key, value in (info or {}).items():
+            where.append(
+                "EXISTS (SELECT 1 FROM measurement_info i "
+                "WHERE i.measurement = m.id AND i.key = ? AND i.value = ?)"
+            )
+            params.extend([key, _sql_value(value)])
+
+        sql = (
+            "SELECT f.path, m.position, m.title, m.date, m.measurement_id, "
+            "m.method_id, m.device, m.block, m.channels, m.info "
+            "FROM measurements m JOIN files f ON f.id = m.file_id"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY m.date, f.path, m.position"
+        return [_result(row) for row in self.db.execute(sql, params)]
+
+    def files(self) -> List[dict]:
+        """Catalogued files, with the error of those that failed to index."""
+        return [
+            dict(row)
+            for row in self.db.execute(
+                "SELECT path, size, mtime_ns, indexed_at, error FROM files "
+                "ORDER BY path"
+            )
+        ]
+
+
+def _result(row: sqlite3.Row) -> dict:
+    out = dict(row)
+    out["date"] = datetime.strptime(out["date"], DATE_FMT)
+    out["channels"] = json.loads(out["channels"])
+    out["info"] = json.loads(out["info"]) if out["info"] is not None else None
+    return out
@@ -3,20 +3,33 @@
 
 Provides a `psession` command to inspect and export data
 from PalmSens `.pssession` files using the library functions.
+
+Modules that need numpy and pandas (enrichments, table building) or large
+parts of the standard library (the catalog, the server) are imported by the
+commands using them, so `--info`, `--explore` and answers from a server
+start without them.
 """
 
 from __future__ import annotations
 
 import argparse
+import logging
 import os
 import sys
 import signal
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Optional
 
 import json
-from .parse import parse, info, parse_pssession_file
-from .enrichments import default_enrichments
+from .parse import parse, parse_many, info, parse_pssession_file
+from .serializers import SERIALIZERS, get_serializer
+from .profiling import profile
+from .selection import Selection
+from .cache import temp_path
+from .watch import Watcher
+
+if TYPE_CHECKING:
+    from .client import Client
 
 
 def _positive_path(p: str) -> Path:
@@ -26,10 +39,90 @@ def _positive_path(p: str) -> Path:
     return path
 
 
+def _method_list(s: str) -> list[str]:
+    return [m.strip().lower() for m in s.split(",") if m.strip()]
+
+
+def _channel_list(s: str) -> list[int]:
+    return [int(c) for c in s.split(",") if c.strip()]
+
+
+def _add_selection_args(p: argparse.ArgumentParser):
+    g = p.add_argument_group(
+        "selection", "Only parse matching measurements and channels"
+    )
+    g.add_argument(
+        "--channels",
+        type=_channel_list,
+        default=None,
+        help="Comma separated channel numbers, as in the channel titles",
+    )
+    g.add_argument(
+        "--since",
+        default=None,
+        help="Measurements started at or after this ISO date/time",
+    )
+    g.add_argument(
+        "--until",
+        default=None,
+        help="Measurements started before this ISO date/time",
+    )
+    g.add_argument("--title", default=None, help="Regex searched in titles")
+    g.add_argument("--device", default=None, help="Regex searched in device names")
+
+
+def selection_from_args(args: argparse.Namespace) -> Optional[Selection]:
+    selection = Selection(
+        channels=args.channels,
+        since=args.since,
+        until=args.until,
+        title=args.title,
+        device=args.device,
+    )
+    return selection or None
+
+
+def _add_profile_arg(p: argparse.ArgumentParser):
+    p.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Report time, rows, bytes, peak memory and cache hits per stage "
+            "on stderr; tracing memory slows parsing down"
+        ),
+    )
+    p.add_argument(
+        "--profile-format",
+        choices=("table", "json"),
+        default="table",
+        help="Format of the --profile report (default: table)",
+    )
+
+
+def run_profiled(args: argparse.Namespace, run: Callable[[], int]) -> int:
+    if not args.profile:
+        return run()
+    with profile(memory=True) as prof:
+        try:
+            return run()
+        finally:
+            if args.profile_format == "json":
+                report = prof.to_json()
+            else:
+                report = prof.format_table()
+            print(report, file=sys.stderr)
+
+
 def build_parser() -> argparse.ArgumentParser:
     # Let argparse infer the program name from the invoked entry point.
     p = argparse.ArgumentParser(
         description="Parse PalmSens .pssession files to pandas DataFrames",
+        epilog=(
+            "Run 'psession batch -h' to parse many sessions into one dataset, "
+            "'psession catalog -h' to index and query many sessions, "
+            "'psession watch -h' to keep exports of a directory up to date, "
+            "'psession serve -h' to keep parsed sessions in memory."
+        ),
     )
     p.add_argument("file", type=_positive_path, help="Path to the .pssession file")
     p.add_argument(
@@ -38,6 +131,26 @@ def build_parser() -> argparse.ArgumentParser:
         type=str,
         help="Write EIS CSV to path or '-' for stdout",
     )
+    p.add_argument(
+        "--cache-format",
+        type=str,
+        default=None,
+        choices=sorted(SERIALIZERS),
+        help="Format of the per-technique table cache (default: npz)",
+    )
+    p.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Parse measurements and channels on N worker processes",
+    )
+    p.add_argument(
+        "--methods",
+        type=_method_list,
+        default=None,
+        help="Comma separated techniques to parse, e.g. 'eis,cv' (default: all)",
+    )
     p.add_argument(
         "--info",
         action="store_true",
@@ -62,23 +175,556 @@ def build_parser() -> argparse.ArgumentParser:
         default=None,
         help="Output directory for exploration dumps, or '-' for stdout",
     )
+    p.add_argument(
+        "--server",
+        type=str,
+        default=os.getenv("PSESS_SERVER"),
+        help=(
+            "Answer --info and -o from a 'psession serve' daemon at HOST:PORT "
+            "or unix:PATH, parsing locally if it is not running "
+            "(default: $PSESS_SERVER)"
+        ),
+    )
+    _add_selection_args(p)
+    _add_profile_arg(p)
+    return p
+
+
+def build_batch_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="psession batch",
+        description="Parse many .pssession files into one dataset",
+    )
+    p.add_argument(
+        "sources",
+        nargs="+",
+        help="Session files, directories or glob patterns",
+    )
+    p.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Output prefix, writes <prefix>_<technique>.<format>",
+    )
+    p.add_argument(
+        "--format",
+        type=str,
+        default="csv",
+        choices=sorted(SERIALIZERS),
+        help="Format of the combined tables (default: csv)",
+    )
+    p.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Parse N files concurrently (default: one per CPU)",
+    )
+    p.add_argument(
+        "--methods",
+        type=_method_list,
+        default=None,
+        help="Comma separated techniques to parse, e.g. 'eis,cv' (default: all)",
+    )
+    p.add_argument(
+        "--cache-format",
+        type=str,
+        default=None,
+        choices=sorted(SERIALIZERS),
+        help="Format of the per-file table cache (default: npz)",
+    )
+    p.add_argument(
+        "--errors",
+        type=str,
+        default=None,
+        help="Write the per-file error report as JSON to path, or '-' for stdout",
+    )
+    p.add_argument(
+        "--normalize",
+        nargs="?",
+        const="exact",
+        default=None,
+        choices=("exact", "float32"),
+        help=(
+            "Write each technique as a slim points table plus "
+            "<prefix>_<technique>_sweeps with one metadata row per sweep; "
+            "'float32' also stores float points in single precision"
+        ),
+    )
+    _add_selection_args(p)
+    _add_profile_arg(p)
+    return p
+
+
+def default_opts() -> dict:
+    opts = {}
+    if os.getenv("PSESS_PRESORT") is not None:
+        opts["presort"] = os.getenv("PSESS_PRESORT").split(",")
+
+    opts["cv"] = {
+        "base_sort": ["date"],
+    }
+    return opts
+
+
+def batch_main(argv: list[str]) -> int:
+    args = build_batch_parser().parse_args(argv)
+    return run_profiled(args, lambda: run_batch(args))
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    from .enrichments import default_enrichments
+
+    opts = default_opts()
+    if args.normalize:
+        opts["normalize"] = args.normalize
+    result = parse_many(
+        args.sources,
+        enrichments=default_enrichments(),
+        opts=opts,
+        cache_format=args.cache_format,
+        workers=args.jobs,
+        methods=args.methods,
+        select=selection_from_args(args),
+    )
+    if not result.files:
+        print("No session files found", file=sys.stderr)
+        return 1
+
+    measurements = result.measurements
+    tables = [
+        ("eis", measurements.EIS),
+        ("cv", measurements.CV),
+        ("lsv", measurements.LSV),
+        *measurements.other.items(),
+    ]
+    tables += [
+        (f"{dtype}_sweeps", measurements.sweeps(dtype))
+        for dtype, _ in tables
+        if measurements.normalized(dtype)
+    ]
+    if args.output:
+        serializer = get_serializer(args.format)
+        for dtype, data in tables:
+            if data.empty:
+                continue
+            out_path = Path(f"{args.output}_{dtype}.{serializer.suffix}")
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            serializer.write(data, str(out_path))
+            print(f"Wrote {dtype} data -> {out_path}")
+    else:
+        for dtype, data in tables:
+            if not data.empty:
+                print(f"{dtype.upper()}: {len(data)} rows")
+
+    for fp, problems in result.errors.items():
+        for problem in problems:
+            print(f"{fp}: {problem}", file=sys.stderr)
+    if args.errors == "-":
+        print(json.dumps(result.errors, indent=2))
+    elif args.errors:
+        with open(args.errors, "w", encoding="utf-8") as f:
+            json.dump(result.errors, f, indent=2)
+
+    print(
+        f"Parsed {len(result.files)} files, {len(result.errors)} with errors",
+        file=sys.stderr,
+    )
+    return 1 if result.errors else 0
+
+
+DEFAULT_CATALOG = "psession-catalog.db"
+
+
+def build_catalog_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="psession catalog",
+        description=(
+            "Crawl sessions into a local SQLite catalog and query their "
+            "measurements"
+        ),
+    )
+    p.add_argument(
+        "--db",
+        type=str,
+        default=os.getenv("PSESS_CATALOG", DEFAULT_CATALOG),
+        help=f"Catalog database (default: $PSESS_CATALOG or {DEFAULT_CATALOG})",
+    )
+    p.add_argument(
+        "-u",
+        "--update",
+        nargs="+",
+        default=None,
+        metavar="SOURCE",
+        help="Crawl session files and directories, skipping unchanged files",
+    )
+    p.add_argument(
+        "--force",
+        action="store_true",
+        help="With --update, re-index files even if unchanged",
+    )
+    g = p.add_argument_group("query", "Print the measurements matching every filter")
+    g.add_argument("--method", default=None, help="Technique, e.g. 'eis'")
+    g.add_argument("--device", default=None, help="Device, e.g. 'N05'")
+    g.add_argument("--block", default=None, help="Block, e.g. 'TOP'")
+    g.add_argument(
+        "--channel",
+        type=int,
+        default=None,
+        help="Channel number, as in the channel titles",
+    )
+    g.add_argument(
+        "--since",
+        default=None,
+        help="Measurements started at or after this ISO date/time",
+    )
+    g.add_argument(
+        "--until",
+        default=None,
+        help="Measurements started before this ISO date/time",
+    )
+    g.add_argument("--title", default=None, help="Regex searched in titles")
+    g.add_argument("--json", action="store_true", help="Print results as JSON")
+    return p
+
+
+def catalog_main(argv: list[str]) -> int:
+    args = build_catalog_parser().parse_args(argv)
+    from .catalog import Catalog
+
+    with Catalog(args.db) as catalog:
+        if args.update:
+            result = catalog.update(args.update, force_reload=args.force)
+            for fp, problem in result.errors.items():
+                print(f"{fp}: {problem}", file=sys.stderr)
+            print(
+                f"Indexed {len(result.indexed)} files, skipped "
+                f"{len(result.skipped)} unchanged, removed {len(result.removed)}, "
+                f"{len(result.errors)} with errors",
+                file=sys.stderr,
+            )
+            query = any(
+                v is not None
+                for v in (
+                    args.method,
+                    args.device,
+                    args.block,
+                    args.channel,
+                    args.since,
+                    args.until,
+                    args.title,
+                )
+            )
+            if not query:
+                return 1 if result.errors else 0
+
+        rows = catalog.query(
+            method=args.method,
+            device=args.device,
+            block=args.block,
+            channel=args.channel,
+            since=args.since,
+            until=args.until,
+            title=args.title,
+        )
+    if args.json:
+        print(json.dumps(rows, indent=2, default=str))
+        return 0
+    for r in rows:
+        print(
+            f"{r['path']}:{r['position']} | {(r['method_id'] or '?').upper():<4} | "
+            f"{r['date']:%Y-%m-%d %H:%M:%S} | {r['title']}"
+        )
+    return 0
+
+
+def build_watch_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="psession watch",
+        description=(
+            "Keep per-technique exports of a directory of sessions up to date"
+        ),
+    )
+    p.add_argument("dir", type=_positive_path, help="Directory to watch")
+    p.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        required=True,
+        help="Output directory, gets <relative path>_<technique>.<format>",
+    )
+    p.add_argument(
+        "--format",
+        type=str,
+        default="csv",
+        choices=sorted(SERIALIZERS),
+        help="Format of the exported tables (default: csv)",
+    )
+    p.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Seconds a session must stay unchanged before it is parsed",
+    )
+    p.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds between directory scans when polling",
+    )
+    p.add_argument(
+        "--poll",
+        action="store_true",
+        help="Poll even if watchdog is installed",
+    )
+    p.add_argument(
+        "--once",
+        action="store_true",
+        help="Export the sessions that changed since the last run and exit",
+    )
+    p.add_argument(
+        "--stats",
+        type=str,
+        default=None,
+        help="Keep throughput and latency counters as JSON at this path",
+    )
+    p.add_argument(
+        "--methods",
+        type=_method_list,
+        default=None,
+        help="Comma separated techniques to parse, e.g. 'eis,cv' (default: all)",
+    )
+    p.add_argument(
+        "--cache-format",
+        type=str,
+        default=None,
+        choices=sorted(SERIALIZERS),
+        help="Format of the per-file table cache (default: npz)",
+    )
+    return p
+
+
+def watch_main(argv: list[str]) -> int:
+    from .enrichments import default_enrichments
+
+    args = build_watch_parser().parse_args(argv)
+
+    def write_stats():
+        if args.stats is None:
+            return
+        tmp = temp_path(args.stats)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(watcher.stats.to_dict(), f, indent=2)
+        os.replace(tmp, args.stats)
+
+    def on_update(fp: str, rows: dict):
+        stats = watcher.stats
+        tables = ", ".join(f"{name} {n}" for name, n in rows.items()) or "no tables"
+        print(
+            f"Updated {fp}: {tables} rows, latency {stats.last_latency:.1f}s",
+            file=sys.stderr,
+        )
+        write_stats()
+
+    watcher = Watcher(
+        str(args.dir),
+        args.output,
+        fmt=args.format,
+        settle=args.settle,
+        interval=args.interval,
+        poll=args.poll,
+        parse_kwargs=dict(
+            enrichments=default_enrichments(),
+            opts=default_opts(),
+            cache_format=args.cache_format,
+            methods=args.methods,
+        ),
+        on_update=on_update,
+    )
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        write_stats()
+    stats = watcher.stats
+    print(
+        f"Exported {stats.updates} updates, {stats.failures} failed, "
+        f"{stats.deferred} deferred",
+        file=sys.stderr,
+    )
+    return 1 if stats.failures else 0
+
+
+def build_serve_parser() -> argparse.ArgumentParser:
+    from .client import DEFAULT_ADDRESS
+    from .serve import DEFAULT_MEMORY
+
+    p = argparse.ArgumentParser(
+        prog="psession serve",
+        description=(
+            "Keep parsed sessions in memory and serve their info and tables "
+            "to local clients"
+        ),
+    )
+    p.add_argument(
+        "--address",
+        type=str,
+        default=os.getenv("PSESS_SERVER", DEFAULT_ADDRESS),
+        help=(
+            "HOST:PORT or unix:PATH to listen on "
+            f"(default: $PSESS_SERVER or {DEFAULT_ADDRESS})"
+        ),
+    )
+    p.add_argument(
+        "--memory",
+        type=float,
+        default=DEFAULT_MEMORY / 2**20,
+        help="MiB of parsed tables to keep (default: %(default).0f)",
+    )
+    p.add_argument(
+        "--root",
+        type=_positive_path,
+        default=None,
+        help="Only serve sessions under this directory, paths relative to it",
+    )
+    p.add_argument(
+        "--cache-format",
+        type=str,
+        default=None,
+        choices=sorted(SERIALIZERS),
+        help="Format of the per-file table cache (default: npz)",
+    )
     return p
 
 
+def serve_main(argv: list[str]) -> int:
+    from .enrichments import default_enrichments
+    from .serve import Server
+
+    args = build_serve_parser().parse_args(argv)
+    server = Server(
+        args.address,
+        memory=int(args.memory * 2**20),
+        root=None if args.root is None else str(args.root),
+        parse_kwargs=dict(
+            enrichments=default_enrichments(),
+            opts=default_opts(),
+            cache_format=args.cache_format,
+        ),
+    )
+    print(f"Serving sessions at {server.address}", file=sys.stderr)
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+COMMANDS = {
+    "batch": batch_main,
+    "catalog": catalog_main,
+    "serve": serve_main,
+    "watch": watch_main,
+}
+
+
 def main(argv: Optional[list[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
     parser = build_parser()
     args = parser.parse_args(argv)
+    return run_profiled(args, lambda: run_session(args))
+
+
+def print_info(rows: list[dict]) -> int:
+    if not rows:
+        print("No measurements found", file=sys.stderr)
+        return 1
+    for i, r in enumerate(rows):
+        print(f"{i:02d} | {r.get('method_id','?').upper():<4} | {r.get('title','')}")
+    return 0
+
+
+def write_output(output: str, dtype: str, write: Callable) -> Optional[int]:
+    """Write one table with `write(target)`, to stdout for '-' or to
+    `<output>_<dtype>.csv`; 0 when stdout was closed early."""
+    if output == "-":
+        # Make SIGPIPE behave like in shells (quietly terminate writers)
+        try:
+            signal.signal(signal.SIGPIPE, signal.SIG_DFL)  # type: ignore[attr-defined]
+        except Exception:
+            pass
+        try:
+            write(sys.stdout)
+        except BrokenPipeError:
+            return 0
+    else:
+        out_path = Path(output + f"_{dtype}.csv")
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        write(out_path)
+        print(f"Wrote data CSV -> {out_path}")
+    return None
 
+
+def run_remote(args: argparse.Namespace, client: Client) -> Optional[int]:
+    """Answer --info and -o from a server; None when the request needs a
+    local parse."""
     if args.info:
-        rows = info(str(args.file))
-        if not rows:
-            print("No measurements found", file=sys.stderr)
-            return 1
-        for i, r in enumerate(rows):
+        return print_info(client.info(str(args.file)))
+    if not args.output or args.head or args.explore:
+        return None
+
+    select = selection_from_args(args)
+    tables = client.tables(str(args.file), methods=args.methods, select=select)
+    for dtype in ("eis", "cv", "lsv"):
+        if dtype not in tables:
+            continue
+        body = client.table_bytes(
+            str(args.file), dtype, "csv", methods=args.methods, select=select
+        ).decode("utf-8")
+
+        def write(target, body=body):
+            if target is sys.stdout:
+                sys.stdout.write(body)
+            else:
+                target.write_text(body, encoding="utf-8")
+
+        done = write_output(args.output, dtype, write)
+        if done is not None:
+            return done
+    return 0
+
+
+def run_session(args: argparse.Namespace) -> int:
+    if args.server:
+        from .client import Client, ServerError
+
+        try:
+            done = run_remote(args, Client(args.server))
+        except OSError as e:
             print(
-                f"{i:02d} | {r.get('method_id','?').upper():<4} | {r.get('title','')}"
+                f"No psession server at {args.server} ({e}), parsing locally",
+                file=sys.stderr,
             )
-        return 0
+        except ServerError as e:
+            # outside its --root or missing on its side: this process may
+            # still read the file
+            if e.status not in (403, 404):
+                print(f"psession server at {args.server}: {e}", file=sys.stderr)
+                return 1
+            print(f"{e}, parsing locally", file=sys.stderr)
+        else:
+            if done is not None:
+                return done
+
+    if args.info:
+        return print_info(info(str(args.file)))
 
     if args.explore:
         # Raw exploration: parse the file JSON and group full Method params by method_id
@@ -137,65 +783,44 @@ def main(argv: Optional[list[str]] = None) -> int:
                 print(f"Wrote exploration JSON -> {out_path}")
             return 0
 
-    opts = {}
-    if os.getenv("PSESS_PRESORT") is not None:
-        opts["presort"] = os.getenv("PSESS_PRESORT").split(",")
-
-    opts["cv"] = {
-        "base_sort": ["date"],
-    }
+    from .enrichments import default_enrichments
 
     measurements = parse(
         str(args.file),
         enrichments=default_enrichments(),
-        opts=opts,
+        opts=default_opts(),
+        cache_format=args.cache_format,
+        workers=args.jobs,
+        methods=args.methods,
+        select=selection_from_args(args),
     )
 
+    # only touch requested techniques, the others would be parsed on access
+    dtypes = [d for d in ("eis", "cv", "lsv") if d in measurements.methods]
+
     if args.head:
-        print("EIS:")
-        print(measurements.EIS.head())
-        print("CV:")
-        # subset = measurements.CV.groupby(["cycle", "channel"], as_index=False).head(1)
-        # print(subset)
-        print(measurements.CV.head())
-        print("LSV:")
-        print(measurements.LSV.head())
-
-    for data, dtype in [
-        (measurements.EIS, "eis"),
-        (measurements.CV, "cv"),
-        (measurements.LSV, "lsv"),
-    ]:
+        for dtype in dtypes:
+            print(f"{dtype.upper()}:")
+            print(measurements.table(dtype).head())
+
+    for dtype in dtypes:
+        data = measurements.table(dtype)
         if args.output:
             if data is None:
                 print("No data data to write", file=sys.stderr)
                 continue
-            if args.output == "-":
-                # Make SIGPIPE behave like in shells (quietly terminate writers)
-                try:
-                    signal.signal(signal.SIGPIPE, signal.SIG_DFL)  # type: ignore[attr-defined]
-                except Exception:
-                    pass
-                try:
-                    data.to_csv(sys.stdout, index=False)
-                except BrokenPipeError:
-                    return 0
-            else:
-                out_path = Path(args.output + f"_{dtype}.csv")
-                out_path.parent.mkdir(parents=True, exist_ok=True)
-                data.to_csv(out_path, index=False)
-                print(f"Wrote data CSV -> {out_path}")
+            done = write_output(
+                args.output, dtype, lambda target: data.to_csv(target, index=False)
+            )
+            if done is not None:
+                return done
 
     # If nothing printed or written, provide a tiny summary
     if not args.head and not args.output:
         found = [
-            name
-            for name, df in (
-                ("EIS", measurements.EIS),
-                ("CV", measurements.CV),
-                ("LSV", measurements.LSV),
-            )
-            if df is not None
+            dtype.upper()
+            for dtype in dtypes
+            if measurements.table(dtype) is not None
         ]
         if found:
             print("Parsed tables:", ", ".join(found))
@@ -0,0 +1,180 @@
+"""Client of a `psession serve` daemon (see `psession.serve`).
+
+Addresses are `HOST:PORT` (or `http://HOST:PORT`) for a localhost server
+and `unix:PATH` for one listening on a unix socket. Only the standard
+library is needed to talk to a server, so commands it answers do not pay
+for importing pandas; `Client.table` imports it to decode the table it
+fetched.
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import socket
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+Address = Tuple[str, Union[str, Tuple[str, int]]]
+
+
+class ServerError(RuntimeError):
+    """A request the server answered with an error."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+def parse_address(address: str) -> Address:
+    """`("unix", path)` or `("tcp", (host, port))`."""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:") :]
+    if "://" in address:
+        address = address.split("://", 1)[1]
+    host, _, port = address.rstrip("/").rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"Expected HOST:PORT or unix:PATH, got {address!r}")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def selection_params(select) -> dict:
+    """Query parameters of a `Selection` (or None)."""
+    if not select:
+        return {}
+    params = {
+        "channels": None if select.channels is None else sorted(select.channels),
+        "since": select.since,
+        "until": select.until,
+        "title": select.title,
+        "device": select.device,
+    }
+    return {k: v for k, v in params.items() if v is not None}
+
+
+def _param(value) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return ",".join(map(str, value))
+    return str(value)
+
+
+class Client:
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = 300.0):
+        """Talk to the server at `address`; `timeout` covers parses the
+        server runs for a request, so it is generous."""
+        self.address = address
+        self.kind, self.target = parse_address(address)
+        self.timeout = timeout
+
+    def __repr__(self):
+        return f"Client({self.address!r})"
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.kind == "unix":
+            return _UnixConnection(self.target, self.timeout)
+        host, port = self.target
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def request(self, endpoint: str, **params) -> bytes:
+        """Body of `GET /<endpoint>?<params>`; None params are left out."""
+        query = urlencode(
+            {k: _param(v) for k, v in params.items() if v is not None}
+        )
+        conn = self._connection()
+        try:
+            conn.request("GET", f"/{endpoint}?{query}")
+            response = conn.getresponse()
+            body = response.read()
+        finally:
+            conn.close()
+        if response.status != 200:
+            try:
+                message = json.loads(body)["error"]
+            except (ValueError, KeyError, TypeError):
+                message = body.decode("utf-8", "replace")
+            raise ServerError(response.status, message)
+        return body
+
+    def stats(self) -> dict:
+        return json.loads(self.request("stats"))
+
+    def info(self, file_path: str) -> List[dict]:
+        """What `info(file_path)` returns, from the server."""
+        rows = json.loads(self.request("info", path=os.path.abspath(file_path)))
+        for row in rows:
+            if row.get("date") is not None:
+                row["date"] = datetime.fromisoformat(row["date"])
+        return rows
+
+    def tables(
+        self,
+        file_path: str,
+        methods: Optional[Iterable[str]] = None,
+        select=None,
+    ) -> Dict[str, dict]:
+        """Rows and columns of each table `parse` returns with these
+        arguments, by table name."""
+        return json.loads(
+            self.request(
+                "tables",
+                path=os.path.abspath(file_path),
+                methods=methods,
+                **selection_params(select),
+            )
+        )
+
+    def table_bytes(
+        self,
+        file_path: str,
+        table: str,
+        fmt: str = "npz",
+        columns: Optional[Iterable[str]] = None,
+        methods: Optional[Iterable[str]] = None,
+        select=None,
+    ) -> bytes:
+        """One table exported as `fmt`: a serializer name, or `json`."""
+        return self.request(
+            "table",
+            path=os.path.abspath(file_path),
+            table=table,
+            format=fmt,
+            columns=columns,
+            methods=methods,
+            **selection_params(select),
+        )
+
+    def table(
+        self,
+        file_path: str,
+        table: str,
+        columns: Optional[Iterable[str]] = None,
+        methods: Optional[Iterable[str]] = None,
+        select=None,
+    ):
+        """One table as a DataFrame, sent as npz so dtypes and attrs survive."""
+        from .serializers import get_serializer
+
+        body = self.table_bytes(file_path, table, "npz", columns, methods, select)
+        with tempfile.TemporaryDirectory() as tmp:
+            fp = os.path.join(tmp, f"{table}.npz")
+            with open(fp, "wb") as f:
+                f.write(body)
+            return get_serializer("npz").read(fp)
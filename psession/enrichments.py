@@ -2,37 +2,154 @@
 
 Default enrichments mirror the prior CLI behavior: derive `device` and `block`
 from the measurement title and offset `channel` by +16 for bottom (BOT).
+
+Enrichments come in three flavours, all applied in place by `apply(df)`:
+
+- `KeyedEnrichment` evaluates `match`/`update` once per distinct value of
+  `keys` (e.g. `title` or `sweep_id`) and broadcasts the result to the rows.
+- `ColumnEnrichment` works on whole columns: `match(df)` returns a boolean
+  mask and `update(df)` a mapping of column name to values.
+- `RowEnrichment` wraps the original `(match_fn, upd_fn)` row tuples, which
+  `as_enrichment` converts automatically. It calls both functions for every
+  row, so prefer the other two on large tables.
 """
 
 from __future__ import annotations
 
-from typing import Callable, Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .parsers.common import parse_title
 
 Row = Dict[str, object]
+RowRule = Tuple[Callable[[Row], bool], Callable[[Row], Dict[str, object]]]
+
+
+def _assign(df: pd.DataFrame, column: str, values, mask: np.ndarray):
+    """Set `column` to `values` on the rows selected by `mask`.
+
+    `values` is aligned with the selected rows. Unselected rows keep their
+    value, or NaN when the column is new.
+    """
+    if mask.all():
+        df[column] = np.asarray(values)
+    else:
+        df.loc[mask, column] = np.asarray(values)
+
+
+class KeyedEnrichment:
+    def __init__(
+        self,
+        keys: Sequence[str],
+        update: Callable[[Row], Dict[str, object]],
+        match: Optional[Callable[[Row], bool]] = None,
+    ):
+        self.keys = list(keys)
+        self.update = update
+        self.match = match
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        keys = [k for k in self.keys if k in df.columns]
+        if not keys or df.empty:
+            return df
+
+        grouped = df.groupby(keys, sort=False, dropna=False)
+        codes = grouped.ngroup().to_numpy()
+        # drop_duplicates keeps first appearances, the order ngroup numbers in
+        firsts = df[keys].drop_duplicates()
+        groups = [
+            dict(zip(keys, values))
+            for values in firsts.itertuples(index=False, name=None)
+        ]
+
+        matched = np.array(
+            [self.match is None or bool(self.match(g)) for g in groups], dtype=bool
+        )
+        if not matched.any():
+            return df
+        updates = [self.update(g) if ok else {} for g, ok in zip(groups, matched)]
+        columns = list(dict.fromkeys(c for u in updates for c in u))
+        if not columns:
+            return df
+
+        mask = matched[codes]
+        for c in columns:
+            per_group = pd.Series([u.get(c, np.nan) for u in updates]).to_numpy()
+            _assign(df, c, per_group[codes][mask], mask)
+        return df
+
+
+class ColumnEnrichment:
+    def __init__(
+        self,
+        update: Callable[[pd.DataFrame], Dict[str, object]],
+        match: Optional[Callable[[pd.DataFrame], object]] = None,
+    ):
+        self.update = update
+        self.match = match
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            return df
+        if self.match is None:
+            mask = np.ones(len(df), dtype=bool)
+        else:
+            mask = np.broadcast_to(np.asarray(self.match(df), dtype=bool), len(df))
+        if not mask.any():
+            return df
+
+        sub = df if mask.all() else df.loc[mask]
+        for c, values in self.update(sub).items():
+            _assign(df, c, values, mask)
+        return df
+
+
+class RowEnrichment:
+    def __init__(
+        self,
+        match: Callable[[Row], bool],
+        update: Callable[[Row], Dict[str, object]],
+    ):
+        self.match = match
+        self.update = update
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            return df
+        m = df.apply(self.match, axis=1)
+        if not m.any():
+            return df
+        upd = df.loc[m].apply(self.update, axis=1).apply(pd.Series)
+        df.loc[m, upd.columns] = upd.values
+        return df
+
+
+Enrichment = Union[KeyedEnrichment, ColumnEnrichment, RowEnrichment]
+
+
+def as_enrichment(rule: Union[Enrichment, RowRule]) -> Enrichment:
+    if hasattr(rule, "apply"):
+        return rule
+    match_fn, upd_fn = rule
+    return RowEnrichment(match_fn, upd_fn)
+
+
+def _is_bottom(df: pd.DataFrame):
+    if "block" not in df.columns:
+        return False
+    return df["block"] == "BOT"
+
+
+def _offset_bottom_channel(df: pd.DataFrame) -> Dict[str, object]:
+    if "channel" not in df.columns:
+        return {"channel": np.full(len(df), 16)}
+    return {"channel": df["channel"].astype(int) + 16}
 
 
-def _parse_title(row: Row) -> Dict[str, object]:
-    try:
-        title = str(row.get("title", ""))
-        parts = title.split(" ")
-        # Expect: <date> <animal> <implant> <N##> <TOP|BOT>
-        if len(parts) >= 5:
-            _, _, _, device_n, block = parts[:5]
-            device_int = int(str(device_n).lstrip("Nn"))
-            two_digit_dev = f"N{device_int:02d}"
-            return {"device": two_digit_dev, "block": block}
-    except Exception:
-        pass
-    return {}
-
-
-def default_enrichments() -> (
-    List[Tuple[Callable[[Row], bool], Callable[[Row], Dict[str, object]]]]
-):
+def default_enrichments() -> List[Enrichment]:
     return [
-        (lambda row: True, _parse_title),
-        (
-            lambda row: row.get("block") == "BOT",
-            lambda row: {"channel": int(row.get("channel", 0)) + 16},
-        ),
+        KeyedEnrichment(["title"], update=parse_title),
+        ColumnEnrichment(update=_offset_bottom_channel, match=_is_bottom),
     ]
@@ -0,0 +1,195 @@
+"""Sidecar index of the measurements in a session.
+
+Written next to the JSON cache the first time a session is decoded, it
+lists per measurement its title, timestamps, method id, info keys, channel
+count and numbers, an identity `key` (see `measurement_key`) and where it
+sits in the cached JSON (position in the `Measurements` array and byte span
+in the file). `info()` answers from it
+without decoding the session, and parses of a few techniques or a
+`Selection` read only the measurements they need.
+
+The index is recorded in the manifest under the source key (plus its format
+version), like the JSON cache it points into, so it is only used while both
+describe the same file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Tuple
+
+from .cache import Manifest, config_key, temp_path
+from .parsers.common import method_id_of, method_to_dict, parse_common
+from .parsers.parser import cvParser, eisParser, lsvParser, registered_parsers
+
+if TYPE_CHECKING:
+    from .measurements import Parsers
+
+INDEX_VERSION = 3
+INDEX_SUFFIX = ".index.json"
+INDEX_ENTRY = "index"
+# channel lists of the known measurement layouts
+CHANNEL_KEYS = ("EISDataList", "Curves")
+
+
+def index_path(cache_path: str, filename: str) -> str:
+    return os.path.join(cache_path, filename + INDEX_SUFFIX)
+
+
+def index_key(manifest: Manifest) -> str:
+    """Manifest key of the index, so format changes rebuild it."""
+    return config_key(manifest.source_key, INDEX_VERSION)
+
+
+def byte_spans(text: str, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Character spans of `text` as byte spans of its UTF-8 encoding."""
+    if text.isascii():
+        return list(spans)
+    out, pos, offset = [], 0, 0
+    for start, end in spans:
+        offset += len(text[pos:start].encode("utf-8"))
+        size = len(text[start:end].encode("utf-8"))
+        out.append((offset, offset + size))
+        offset, pos = offset + size, end
+    return out
+
+
+def channel_numbers(parser, measurement: dict) -> List[int]:
+    """Distinct channel numbers in the measurement's channel titles."""
+    if parser is None or parser.channel_title is None:
+        return []
+    numbers = set()
+    for key in CHANNEL_KEYS:
+        for channel in measurement.get(key) or []:
+            try:
+                number = parser.channel_title(channel.get("Title", "")).get("channel")
+            except Exception:
+                continue
+            if number is not None:
+                numbers.add(int(number))
+    return sorted(numbers)
+
+
+def measurement_key(measurement: dict) -> str:
+    """Identity of a measurement: its timestamps and the Hash of its curves."""
+    hashes = [
+        channel.get("Hash")
+        for key in CHANNEL_KEYS
+        for channel in measurement.get(key) or []
+    ]
+    return config_key(
+        measurement.get("TimeStamp"), measurement.get("UTCTimeStamp"), hashes
+    )
+
+
+def index_entry(parsers: dict, measurement: dict, position: int, span) -> dict:
+    method = method_to_dict(measurement.get("Method", ""))
+    parser = parsers.get(method_id_of(method))
+    info = parser.select_method(method, info=True) if parser is not None else None
+    return {
+        "position": position,
+        "span": list(span) if span is not None else None,
+        "Title": measurement.get("Title", ""),
+        "TimeStamp": measurement.get("TimeStamp", 0),
+        "UTCTimeStamp": measurement.get("UTCTimeStamp"),
+        "key": measurement_key(measurement),
+        "method_id": method_id_of(method),
+        "channels": sum(len(measurement.get(k) or []) for k in CHANNEL_KEYS),
+        "channel_numbers": channel_numbers(parser, measurement),
+        # `info()` keys of the measurement's technique, None if unknown
+        "info": info,
+    }
+
+
+def build_index(
+    measurements: List[dict],
+    spans: Optional[List[Tuple[int, int]]] = None,
+    parsers: Optional[Parsers] = None,
+    first: int = 0,
+) -> List[dict]:
+    """Index entries of `measurements`, the session's from position `first`
+    on; `spans` are their byte spans in the JSON cache, if known."""
+    if parsers is None:
+        # those of `Parsers()`, without importing the table code
+        by_mid = dict(registered_parsers())
+        by_mid.update((p.mid, p) for p in (eisParser, lsvParser, cvParser))
+    else:
+        by_mid = {p.mid: p for p in parsers.parsers()}
+    spans = spans if spans is not None else [None] * len(measurements)
+    return [
+        index_entry(by_mid, m, i, span)
+        for i, (m, span) in enumerate(zip(measurements, spans), start=first)
+    ]
+
+
+def write_index(fp: str, entries: List[dict]):
+    tmp = temp_path(fp)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "measurements": entries}, f)
+    os.replace(tmp, fp)
+
+
+def read_index(fp: str) -> Optional[List[dict]]:
+    try:
+        with open(fp, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if raw.get("version") != INDEX_VERSION:
+        return None
+    return raw.get("measurements")
+
+
+def index_info(entries: List[dict]) -> List[dict]:
+    """What `Parsers.parse_info` returns for the indexed measurements."""
+    return [{**parse_common(e), **e["info"]} for e in entries if e["info"] is not None]
+
+
+def select_entries(
+    entries: List[dict],
+    methods: Optional[Iterable[str]] = None,
+    keep: Optional[Callable[[dict], bool]] = None,
+) -> List[dict]:
+    """Entries of the `methods` techniques accepted by `keep`, which gets an
+    entry in place of the measurement (it has the same Title/TimeStamp)."""
+    mids = None if methods is None else {m.lower() for m in methods}
+    return [
+        e
+        for e in entries
+        if (mids is None or e["method_id"] in mids) and (keep is None or keep(e))
+    ]
+
+
+def read_measurements(fp_json: str, entries: List[dict]) -> List[dict]:
+    """Decode only the measurements of `entries` from the JSON cache."""
+    out = []
+    with open(fp_json, "rb") as f:
+        for e in entries:
+            start, end = e["span"]
+            f.seek(start)
+            out.append(json.loads(f.read(end - start).decode("utf-8")))
+    return out
+
+
+def index_covers(entries: Optional[List[dict]]) -> bool:
+    return entries is not None and all(e.get("span") for e in entries)
+
+
+def measurement_loader(
+    fp_json: str,
+    entries: List[dict],
+    methods: Optional[Iterable[str]] = None,
+    keep: Optional[Callable[[dict], bool]] = None,
+) -> Callable[[], List[dict]]:
+    """Load the selected measurements on demand, reading the whole JSON
+    cache only when every measurement is needed."""
+
+    def load() -> List[dict]:
+        selected = select_entries(entries, methods, keep)
+        if len(selected) == len(entries):
+            with open(fp_json, "r", encoding="utf-8") as f:
+                return json.load(f).get("Measurements", [])
+        return read_measurements(fp_json, selected)
+
+    return load
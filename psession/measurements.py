@@ -1,24 +1,347 @@
-from dataclasses import dataclass, field
-from typing import List, Optional
-from .parsers.parser import BaseParser, eisParser, lsvParser, cvParser
+import logging
+import os
+import threading
+from functools import partial
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from .parsers.parser import (
+    BaseParser,
+    cvParser,
+    eisParser,
+    lsvParser,
+    registered_parsers,
+)
+from .parsers.common import method_cache_info, method_id_of, method_to_dict
+from .parsers.sorting import concat_sorted, sort_table
+from .parsers.extract import (
+    Block,
+    assemble_blocks,
+    build_frame,
+    channel_lengths,
+    column_names,
+    concat_columns,
+    extract_columns,
+)
+from .cache import Manifest
+from .serializers import Serializer, npzSerializer
+from .enrichments import as_enrichment
+from .profiling import HIT, MISS, span
+from .selection import Selection
+from .normalize import SWEEP, denormalize, normalize, smallest_int, sweep_codes
+import numpy as np
 import pandas as pd
 
+log = logging.getLogger(__name__)
+
+EIS_ID, LSV_ID, CV_ID = eisParser.mid, lsvParser.mid, cvParser.mid
+SUMMARY_SUFFIX = "_summary"
+SWEEPS_SUFFIX = "_sweeps"
+
+
+def summary_key(mid: str) -> str:
+    return f"{mid}{SUMMARY_SUFFIX}"
+
+
+def is_summary(key: str) -> bool:
+    return key.endswith(SUMMARY_SUFFIX)
+
+
+def sweeps_key(mid: str) -> str:
+    return f"{mid}{SWEEPS_SUFFIX}"
+
+
+def is_sweeps(key: str) -> bool:
+    return key.endswith(SWEEPS_SUFFIX)
+
 
-@dataclass
 class Measurements:
-    EIS: pd.DataFrame = field(default_factory=pd.DataFrame)
-    LSV: pd.DataFrame = field(default_factory=pd.DataFrame)
-    CV: pd.DataFrame = field(default_factory=pd.DataFrame)
+    """Parsed tables by technique.
+
+    Tables can be given directly or as loaders, which run on first access
+    (e.g. `measurements.EIS`) and whose result is kept; threads accessing a
+    pending table wait for one load. Pickling loads every pending table
+    first. Techniques with a per-curve summary (CV,
+    LSV) also expose it, e.g. `measurements.CV_summary`.
+
+    Normalized tables (`opts["normalize"]`) hold the points only, with the
+    per-sweep metadata in `sweeps(mid)`; `wide(mid)` joins them back.
+    """
+
+    def __init__(
+        self,
+        EIS: Optional[pd.DataFrame] = None,
+        LSV: Optional[pd.DataFrame] = None,
+        CV: Optional[pd.DataFrame] = None,
+        other: Optional[Dict[str, pd.DataFrame]] = None,
+        errors: Optional[List[str]] = None,
+        summaries: Optional[Dict[str, pd.DataFrame]] = None,
+        sweeps: Optional[Dict[str, pd.DataFrame]] = None,
+    ):
+        self._tables: Dict[str, pd.DataFrame] = {}
+        self._loaders: Dict[str, Callable[[], pd.DataFrame]] = {}
+        # loaders share their pass's state and fill in sibling tables
+        self._lock = threading.RLock()
+        for mid, df in ((EIS_ID, EIS), (LSV_ID, LSV), (CV_ID, CV)):
+            if df is not None:
+                self._tables[mid] = df
+        self._tables.update(other or {})
+        for mid, df in (summaries or {}).items():
+            self._tables[summary_key(mid)] = df
+        for mid, df in (sweeps or {}).items():
+            self._tables[sweeps_key(mid)] = df
+        # measurements that failed to parse and were skipped
+        self.errors: List[str] = errors if errors is not None else []
+
+    def __repr__(self):
+        return (
+            f"Measurements(loaded={sorted(self._tables)}, "
+            f"pending={sorted(self._loaders)})"
+        )
+
+    def __getstate__(self):
+        self.load_all()
+        return {"tables": self._tables, "errors": self.errors}
+
+    def __setstate__(self, state):
+        self._tables = state["tables"]
+        self._loaders = {}
+        self._lock = threading.RLock()
+        self.errors = state["errors"]
+
+    def set_loader(self, mid: str, loader: Callable[[], pd.DataFrame]):
+        with self._lock:
+            self._tables.pop(mid, None)
+            self._loaders[mid] = loader
+
+    def set_table(self, mid: str, df: pd.DataFrame):
+        with self._lock:
+            self._loaders.pop(mid, None)
+            self._tables[mid] = df
+
+    def table(self, mid: str) -> pd.DataFrame:
+        with self._lock:
+            if mid not in self._tables:
+                loader = self._loaders.get(mid)
+                if loader is None:
+                    return pd.DataFrame()
+                # kept until it succeeds, so a failed build raises again
+                # rather than reading as a technique without data
+                df = loader()
+                self._loaders.pop(mid, None)
+                self._tables[mid] = df
+            return self._tables[mid]
+
+    def load_all(self):
+        for mid in list(self._loaders):
+            self.table(mid)
+
+    def keys(self) -> List[str]:
+        return list(dict.fromkeys([*self._tables, *self._loaders]))
+
+    @property
+    def methods(self) -> List[str]:
+        return [k for k in self.keys() if not (is_summary(k) or is_sweeps(k))]
+
+    def normalized(self, mid: str) -> bool:
+        return sweeps_key(mid) in self.keys()
+
+    def sweeps(self, mid: str) -> pd.DataFrame:
+        """Per-sweep metadata of a normalized table."""
+        return self.table(sweeps_key(mid))
+
+    def wide(self, mid: str) -> pd.DataFrame:
+        """The `mid` table with one row per point and all metadata columns."""
+        if not self.normalized(mid):
+            return self.table(mid)
+        return denormalize(self.sweeps(mid), self.table(mid))
+
+    def summary(self, mid: str) -> pd.DataFrame:
+        return self.table(summary_key(mid))
+
+    @property
+    def summaries(self) -> Dict[str, pd.DataFrame]:
+        """Per-curve summary tables, by method id."""
+        return {
+            k[: -len(SUMMARY_SUFFIX)]: self.table(k)
+            for k in self.keys()
+            if is_summary(k)
+        }
+
+    @property
+    def EIS(self) -> pd.DataFrame:
+        return self.table(EIS_ID)
+
+    @property
+    def LSV(self) -> pd.DataFrame:
+        return self.table(LSV_ID)
+
+    @property
+    def CV(self) -> pd.DataFrame:
+        return self.table(CV_ID)
+
+    @property
+    def LSV_summary(self) -> pd.DataFrame:
+        return self.summary(LSV_ID)
+
+    @property
+    def CV_summary(self) -> pd.DataFrame:
+        return self.summary(CV_ID)
+
+    @property
+    def other(self) -> Dict[str, pd.DataFrame]:
+        """Tables of any other registered technique, by method id."""
+        return {
+            mid: self.table(mid)
+            for mid in self.methods
+            if mid not in (EIS_ID, LSV_ID, CV_ID)
+        }
+
 
+@dataclass
+class BatchResult:
+    measurements: Measurements
+    files: List[str] = field(default_factory=list)
+    # file -> problems; a file failing entirely has a single entry
+    errors: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def _nullable(dtype) -> Optional[str]:
+    if dtype.kind in "iu":
+        return f"{'U' if dtype.kind == 'u' else ''}Int{dtype.itemsize * 8}"
+    if dtype.kind == "b":
+        return "boolean"
+    return None
+
+
+def consistent_dtypes(frames: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    """`frames` with each column of one dtype across all of them, so
+    concatenating them keeps it.
 
-def enrich_df(df: pd.DataFrame, enrichments: list) -> pd.DataFrame:
-    out = df.copy()
-    for match_fn, upd_fn in enrichments:
-        m = out.apply(match_fn, axis=1)
-        if not m.any():
-            continue
-        upd = out.loc[m].apply(upd_fn, axis=1).apply(pd.Series)
-        out.loc[m, upd.columns] = upd.values
+    Categoricals get the union of their categories, in order of appearance.
+    Integer and boolean columns missing from some frames become nullable
+    (`Int64`, `boolean`, ...) rather than float or object; other columns
+    are left to `pd.concat`.
+    """
+    columns = list(dict.fromkeys(c for f in frames for c in f.columns))
+    targets = {}
+    for c in columns:
+        dtypes = [f[c].dtype for f in frames if c in f.columns]
+        missing = len(dtypes) < len(frames)
+        if all(isinstance(d, pd.CategoricalDtype) for d in dtypes):
+            categories = pd.Index(
+                list(dict.fromkeys(v for d in dtypes for v in d.categories))
+            )
+            if missing or any(not d.categories.equals(categories) for d in dtypes):
+                targets[c] = pd.CategoricalDtype(categories)
+        elif missing and all(d == dtypes[0] for d in dtypes):
+            nullable = _nullable(dtypes[0])
+            if nullable is not None:
+                targets[c] = nullable
+    if not targets:
+        return frames
+
+    out = []
+    for f in frames:
+        f = f.copy(deep=False)
+        for c, dtype in targets.items():
+            if c in f.columns:
+                f[c] = f[c].astype(dtype)
+            else:
+                f[c] = pd.Series(index=f.index, dtype=dtype)
+        out.append(f)
+    return out
+
+
+def combine_tables(tables: List[Tuple[str, pd.DataFrame]]) -> pd.DataFrame:
+    """Concatenate per-file tables, tagging rows with a `source_file` column.
+
+    Columns keep one dtype across files (see `consistent_dtypes`); those
+    missing from some files are filled with missing values. `source_file`
+    is categorical, built from row counts instead of per-frame copies.
+    """
+    tables = [(src, df) for src, df in tables if df is not None and not df.empty]
+    if not tables:
+        return pd.DataFrame()
+
+    frames = consistent_dtypes([t for _, t in tables])
+    df = pd.concat(frames, ignore_index=True, sort=False)
+    sources = [src for src, _ in tables]
+    codes = np.repeat(np.arange(len(tables)), [len(t) for _, t in tables])
+    source_file = pd.Categorical.from_codes(codes, categories=sources)
+    df.insert(0, "source_file", source_file)
+    return df
+
+
+def combine_normalized(
+    parts: List[Tuple[str, pd.DataFrame, pd.DataFrame]],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Concatenate per-file `(source, sweeps, points)`, renumbering sweep
+    codes so they stay unique. `source_file` goes to the sweeps table only.
+    """
+    parts = [(src, s, p) for src, s, p in parts if not s.empty]
+    offset, sweeps, points = 0, [], []
+    for src, s, p in parts:
+        s, p = s.copy(), p.copy()
+        s[SWEEP] = s[SWEEP].to_numpy() + offset
+        p[SWEEP] = p[SWEEP].to_numpy().astype(np.int64) + offset
+        offset = int(s[SWEEP].max()) + 1
+        sweeps.append((src, s))
+        points.append(p)
+    if not points:
+        return pd.DataFrame(), pd.DataFrame()
+    combined = pd.concat(consistent_dtypes(points), ignore_index=True, sort=False)
+    combined[SWEEP] = smallest_int(combined[SWEEP].to_numpy())
+    return combine_tables(sweeps), combined
+
+
+def combine_measurements(results: List[Tuple[str, Measurements]]) -> Measurements:
+    other_mids = list(dict.fromkeys(mid for _, m in results for mid in m.other))
+    summary_mids = list(
+        dict.fromkeys(mid for _, m in results for mid in m.summaries)
+    )
+    # techniques normalized in any file are combined normalized, which
+    # needs them normalized in every file
+    sweep_mids = {
+        mid for _, m in results for mid in m.methods if m.normalized(mid)
+    }
+
+    tables, sweeps = {}, {}
+    for mid in dict.fromkeys([EIS_ID, LSV_ID, CV_ID, *other_mids]):
+        if mid in sweep_mids:
+            sweeps[mid], tables[mid] = combine_normalized(
+                [(src, m.sweeps(mid), m.table(mid)) for src, m in results]
+            )
+        else:
+            tables[mid] = combine_tables([(src, m.table(mid)) for src, m in results])
+    return Measurements(
+        EIS=tables.pop(EIS_ID),
+        LSV=tables.pop(LSV_ID),
+        CV=tables.pop(CV_ID),
+        other=tables,
+        summaries={
+            mid: combine_tables([(src, m.summaries.get(mid)) for src, m in results])
+            for mid in summary_mids
+        },
+        sweeps=sweeps,
+    )
+
+
+def enrich_df(
+    df: pd.DataFrame, enrichments: list, inplace: bool = False
+) -> pd.DataFrame:
+    out = df if inplace else df.copy()
+    for rule in enrichments:
+        out = as_enrichment(rule).apply(out)
 
     return out
 
@@ -29,20 +352,129 @@ class CacheParameters:
     read_cache: bool = True
     cache_path: Optional[str] = None
     cache_prefix: Optional[str] = None
+    # When set, entries are only served if recorded under `key`.
+    manifest: Optional[Manifest] = None
+    key: Optional[str] = None
+    serializer: Serializer = field(default=npzSerializer)
 
     def read_fp(self, suffix: str) -> Optional[str]:
         if not self.read_cache:
             return None
+        if self.manifest is not None and not self.manifest.valid(suffix, self.key):
+            return None
         if self.cache_path is None or self.cache_prefix is None:
             return None
-        return f"{self.cache_path}/{self.cache_prefix}_{suffix}"
+        return os.path.join(self.cache_path, f"{self.cache_prefix}_{suffix}")
 
     def write_fp(self, suffix: str) -> Optional[str]:
         if not self.write_cache:
             return None
         if self.cache_path is None or self.cache_prefix is None:
             return None
-        return f"{self.cache_path}/{self.cache_prefix}_{suffix}"
+        return os.path.join(self.cache_path, f"{self.cache_prefix}_{suffix}")
+
+    def record(self, suffix: str):
+        if self.manifest is not None:
+            self.manifest.record(suffix, self.key)
+
+    def table_suffix(self, name: str) -> str:
+        return f"{name}.{self.serializer.suffix}"
+
+    def read(
+        self, name: str, columns: Optional[Sequence[str]] = None
+    ) -> Optional[pd.DataFrame]:
+        fp = self.read_fp(self.table_suffix(name))
+        with span("cache_read", table=name, format=self.serializer.name) as s:
+            s.cache = MISS
+            if fp is None or not os.path.exists(fp):
+                return None
+            try:
+                df = self.serializer.read(fp, columns=columns)
+            except Exception:
+                return None
+            s.cache, s.rows, s.bytes = HIT, len(df), os.path.getsize(fp)
+            return df
+
+    def write(self, name: str, df: pd.DataFrame):
+        suffix = self.table_suffix(name)
+        fp = self.write_fp(suffix)
+        if fp is None:
+            return
+        with span("cache_write", table=name, format=self.serializer.name) as s:
+            try:
+                self.serializer.write(df, fp)
+                self.record(suffix)
+                s.rows, s.bytes = len(df), os.path.getsize(fp)
+            except Exception:
+                pass
+
+
+def _parse_measurement(
+    parser: BaseParser, measurement: dict, method_info: dict, kwargs: dict
+):
+    return parser.parse(measurement, method_info=method_info, **kwargs)
+
+
+def parse_kwargs(parser: BaseParser, opts: dict) -> dict:
+    """Options forwarded to the technique parser.
+
+    `status` (globally or under `opts[method_id]`) adds the per-point
+    status/range fields as `<column>_s`, `_c`, `_r` columns.
+    """
+    status = opts.get(parser.mid, {}).get("status", opts.get("status", False))
+    return {"status": bool(status)}
+
+
+def table_suffixes(parser: BaseParser, opts: dict) -> List[str]:
+    """Tables a `parser` pass produces, as suffixes of its method id."""
+    suffixes = [""]
+    if parser.summarize is not None and parser.plan is not None:
+        suffixes.append(SUMMARY_SUFFIX)
+    if normalize_mode(parser, opts) is not None:
+        suffixes.append(SWEEPS_SUFFIX)
+    return suffixes
+
+
+def table_sort_keys(parser: BaseParser, opts: dict) -> List[str]:
+    parser_keys = (
+        opts.get(parser.mid, {}).get("base_sort", None) or parser.sort_keys
+    )
+    # presort and sort may repeat the parser's keys (e.g. date)
+    keys = opts.get("presort", []) + parser_keys + opts.get("sort", [])
+    return list(dict.fromkeys(keys))
+
+
+def normalize_mode(parser: BaseParser, opts: dict) -> Optional[str]:
+    """`opts["normalize"]` (globally or under `opts[method_id]`): True for
+    the normalized tables (see `psession.normalize`), "float32" to also
+    store float points as float32; None when off."""
+    mode = opts.get(parser.mid, {}).get("normalize", opts.get("normalize", False))
+    if not mode:
+        return None
+    if mode not in (True, "exact", "float32"):
+        raise ValueError(f"Unknown normalize mode {mode!r}")
+    return "float32" if mode == "float32" else "exact"
+
+
+@dataclass
+class Increment:
+    """Measurements appended to a session since `base`, a read-only cache,
+    was filled with the tables of the ones before them."""
+
+    base: CacheParameters
+    measurements: List[dict]
+
+    def tables(
+        self, parser: BaseParser, opts: dict
+    ) -> Optional[Dict[str, pd.DataFrame]]:
+        """The earlier tables of a `parser` pass, None unless all are cached."""
+        out = {}
+        for suffix in table_suffixes(parser, opts):
+            df = self.base.read(f"{parser}{suffix}")
+            if df is None:
+                return None
+            out[suffix] = df
+        return out
 
 
 @dataclass
@@ -52,21 +484,71 @@ class Parsers:
     cvParser: BaseParser = field(default=cvParser)
 
     cache_params: CacheParameters = field(default_factory=CacheParameters)
+    errors: List[str] = field(default_factory=list)
+    selection: Optional[Selection] = None
+    increment: Optional[Increment] = None
+
+    @property
+    def cache(self) -> CacheParameters:
+        return self.cache_params
+
+    def report_error(self, parser: BaseParser, i: int, e: Exception):
+        msg = f"Error parsing {parser} measurement #{i}: {e}"
+        log.warning(msg)
+        self.errors.append(msg)
+
+    def parsers(self) -> List[BaseParser]:
+        own = [self.eisParser, self.lsvParser, self.cvParser]
+        mids = {p.mid for p in own}
+        return own + [p for mid, p in registered_parsers() if mid not in mids]
 
-    def parse_measurement_info(self, measurement: dict) -> Optional[dict]:
-        for p in [self.eisParser, self.lsvParser, self.cvParser]:
-            out = p.parse_info(measurement)
+    def classify(
+        self, measurements: List[dict]
+    ) -> Dict[str, Tuple[List[dict], List[dict]]]:
+        """Group measurements by method id, parsing each Method block once.
+
+        Returns `{method_id: (measurements, parsed_methods)}` with both lists
+        in session order.
+        """
+        out: Dict[str, Tuple[List[dict], List[dict]]] = {}
+        before = method_cache_info()
+        with span("method") as s:
+            for m in measurements:
+                method = method_to_dict(m.get("Method", ""))
+                ms, methods = out.setdefault(method_id_of(method), ([], []))
+                ms.append(m)
+                methods.append(method)
+            after = method_cache_info()
+            s.rows = len(measurements)
+            s.labels["memo_hits"] = after.hits - before.hits
+            s.labels["memo_misses"] = after.misses - before.misses
+        return out
+
+    def parse_measurement_info(
+        self, measurement: dict, method: Optional[dict] = None
+    ) -> Optional[dict]:
+        if method is None:
+            method = method_to_dict(measurement.get("Method", ""))
+        for p in self.parsers():
+            out = p.parse_info(measurement, method=method)
             if out is not None:
                 return out
         return None
 
     def parse_info(self, measurements: list[dict]) -> list[dict]:
+        parsers = {p.mid: p for p in self.parsers()}
         info = []
-        for m in measurements:
-            out = self.parse_measurement_info(m)
-            if out is None:
-                continue
-            info.append(out)
+        with span("info") as s:
+            for m in measurements:
+                method = method_to_dict(m.get("Method", ""))
+                parser = parsers.get(method_id_of(method))
+                if parser is None:
+                    continue
+                out = parser.parse_info(m, method=method)
+                if out is None:
+                    continue
+                info.append(out)
+            s.rows = len(info)
         return info
 
     def parse_measurement_data(
@@ -75,75 +557,387 @@ class Parsers:
         measurements: List[dict],
         enrichments: list,
         opts: dict,
+        methods: Optional[List[dict]] = None,
+        pool: Optional[Executor] = None,
+        chunks: int = 1,
     ):
-        read_cached_path = self.cache.read_fp(str(parser) + ".csv")
-        if read_cached_path is not None:
-            try:
-                df = pd.read_csv(read_cached_path)
-                return df
-            except Exception:
-                pass
+        """Build the `parser` table from `measurements`.
 
-        out = []
-        for i, measurement in enumerate(measurements):
+        `methods`, when given, holds the parsed Method of each measurement
+        (see `classify`); otherwise every Method block is parsed here and
+        measurements of other techniques are skipped. With a `pool`, each
+        measurement is parsed in up to `chunks` channel slices on it.
+        """
+        cached = self.cache.read(str(parser))
+        if cached is not None:
+            return cached
+        return self.parse_tables(
+            parser, measurements, enrichments, opts, methods, pool, chunks
+        )[""]
+
+    def parse_tables(
+        self,
+        parser: BaseParser,
+        measurements: List[dict],
+        enrichments: list,
+        opts: dict,
+        methods: Optional[List[dict]] = None,
+        pool: Optional[Executor] = None,
+        chunks: int = 1,
+    ) -> Dict[str, pd.DataFrame]:
+        """Like `parse_measurement_data`, without reading the cache, and
+        returning every table of the pass by suffix (see `table_suffixes`):
+        the points under "", the per-curve summary of parsers with a
+        `summarize` and the sweeps of normalized tables. All of them are
+        written to the cache.
+        """
+        if methods is None:
+            methods = [None] * len(measurements)
+        kwargs = parse_kwargs(parser, opts)
+        mode = normalize_mode(parser, opts)
+
+        # `lengths` splits the table into runs already sorted by the parser
+        with span("build", technique=str(parser)) as s:
+            if parser.plan is not None:
+                df, lengths, n = self.assemble(
+                    parser, measurements, methods, kwargs["status"], pool, chunks
+                )
+            else:
+                frames = self.parse_frames(
+                    parser, measurements, methods, kwargs, pool
+                )
+                df = pd.concat(frames) if frames else None
+                lengths, n = [len(f) for f in frames], len(frames)
+            s.rows = 0 if df is None else len(df)
+
+        if df is None:
+            # cached too, so sessions without the technique skip this pass
+            tables = {suffix: pd.DataFrame() for suffix in table_suffixes(parser, opts)}
+            for suffix, table in tables.items():
+                self.cache.write(f"{parser}{suffix}", table)
+            return tables
+
+        log.info("Parsed %d %s measurements", n, parser)
+
+        with span("enrich", technique=str(parser)) as s:
+            df = enrich_df(df, enrichments, inplace=True)
+            s.rows = len(df)
+        # channels are still in assembly order, which `lengths` describes
+        summary = None
+        if SUMMARY_SUFFIX in table_suffixes(parser, opts):
+            with span("summarize", technique=str(parser)) as s:
+                summary = parser.summarize(df, lengths)
+                s.rows = len(summary)
+
+        sort_keys = table_sort_keys(parser, opts)
+        if mode is not None:
+            # one code per channel, carried through the sort
+            df[SWEEP] = sweep_codes(lengths)
+        with span("sort", technique=str(parser)) as s:
+            df = sort_table(df, sort_keys, lengths)
+            s.rows = len(df)
+
+        tables = {"": df}
+        if mode is not None:
+            with span("normalize", technique=str(parser)) as s:
+                sweeps, df = normalize(df, float32=mode == "float32")
+                tables.update({"": df, SWEEPS_SUFFIX: sweeps})
+                s.rows = len(sweeps)
+        if summary is not None:
+            # one row per channel, so only metadata keys can order it
+            keys = [k for k in sort_keys if k in summary.columns]
+            tables[SUMMARY_SUFFIX] = sort_table(summary, keys)
+
+        for suffix, table in tables.items():
+            self.cache.write(f"{parser}{suffix}", table)
+        return tables
+
+    def merge_tables(
+        self,
+        parser: BaseParser,
+        opts: dict,
+        base: Dict[str, pd.DataFrame],
+        added: Dict[str, pd.DataFrame],
+    ) -> Dict[str, pd.DataFrame]:
+        """The tables of a `parser` pass over a session, from those of its
+        first measurements (`base`) and of the ones after them (`added`).
+
+        Rows that sort after the base rows, as later measurements do, are
+        only appended. Normalized tables are merged wide and split again so
+        sweep codes and narrowed dtypes match a pass over the whole session.
+        The merged tables are written to the cache; when nothing was added
+        the cached base files are only recorded as current.
+        """
+        if all(t.empty for t in added.values()):
+            for suffix in base:
+                self.cache.record(self.cache.table_suffix(f"{parser}{suffix}"))
+            return base
+        sort_keys = table_sort_keys(parser, opts)
+        mode = normalize_mode(parser, opts)
+        with span("merge", technique=str(parser)) as s:
+            if mode is None:
+                tables = {"": concat_sorted([base[""], added[""]], sort_keys)}
+            else:
+                frames, offset = [], 0
+                for t in (base, added):
+                    wide = denormalize(t[SWEEPS_SUFFIX], t[""], codes=True)
+                    if not wide.empty:
+                        wide[SWEEP] += offset
+                    frames.append(wide)
+                    offset += len(t[SWEEPS_SUFFIX])
+                df = concat_sorted(frames, sort_keys)
+                if df.empty:
+                    tables = {"": df, SWEEPS_SUFFIX: pd.DataFrame()}
+                else:
+                    sweeps, df = normalize(df, float32=mode == "float32")
+                    tables = {"": df, SWEEPS_SUFFIX: sweeps}
+            if SUMMARY_SUFFIX in base:
+                tables[SUMMARY_SUFFIX] = concat_sorted(
+                    [base[SUMMARY_SUFFIX], added[SUMMARY_SUFFIX]], sort_keys
+                )
+            s.rows = len(tables[""])
+            s.labels["added"] = len(added[""])
+
+        for suffix, table in tables.items():
+            self.cache.write(f"{parser}{suffix}", table)
+        return tables
+
+    def plan(
+        self,
+        parser: BaseParser,
+        measurements: List[dict],
+        methods: List[Optional[dict]],
+    ) -> List[Tuple[int, Block]]:
+        select = None
+        if self.selection is not None and self.selection.channels is not None:
+            select = self.selection.keep_channel
+        blocks = []
+        for i, (measurement, method) in enumerate(zip(measurements, methods)):
             try:
-                data = parser.parse_data(measurement)
-                if data is None:
-                    continue
-                out.append(data)
+                block = parser.plan_data(measurement, method=method, select=select)
+                if block is not None:
+                    blocks.append((i, block))
             except Exception as e:
-                print(f"Error parsing {parser} measurement #{i}: {e}")
+                self.report_error(parser, i, e)
+        return blocks
 
-        if len(out) == 0:
-            return pd.DataFrame()
+    def assemble(
+        self,
+        parser: BaseParser,
+        measurements: List[dict],
+        methods: List[Optional[dict]],
+        status: bool,
+        pool: Optional[Executor] = None,
+        chunks: int = 1,
+    ):
+        """Extract the points of all planned measurements into one frame.
 
-        print(f"Parsed {len(out)} {parser} measurements")
+        Every column is allocated once for the whole table. If that fails,
+        measurements are retried one by one so only the broken ones are
+        reported and dropped. With a `pool`, channel slices are extracted on
+        it and joined in session order. Returns the frame (None when nothing
+        was parsed), its row count per channel and the number of measurements
+        in it.
+        """
+        items = self.plan(parser, measurements, methods)
+        if pool is not None:
+            items = self.extract_pooled(parser, items, pool, chunks, status)
+        if not items:
+            return None, None, 0
 
-        df = pd.concat(out)
-        df = enrich_df(df, enrichments)
+        def build(selected):
+            if pool is None:
+                blocks = [b for _, b in selected]
+                channels = [ch for b in blocks for ch in b.channels]
+                df = assemble_blocks(blocks, parser.derive, status)
+                return df, channel_lengths(channels), len(selected)
+            return (*self.build_extracted(parser, selected), len(selected))
 
-        parser_keys = (
-            opts.get(parser.mid, {}).get("base_sort", None) or parser.sort_keys
-        )
-        sort_keys = opts.get("presort", []) + parser_keys + opts.get("sort", [])
-        df = df.sort_values(sort_keys, kind="mergesort").reset_index(drop=True)
+        try:
+            return build(items)
+        except Exception as e:
+            if len(items) == 1:
+                self.report_error(parser, items[0][0], e)
+                return None, None, 0
 
-        write_cached_path = self.cache.write_fp(str(parser) + ".csv")
-        if write_cached_path is not None:
+        # retry one measurement at a time to tell good ones from broken ones
+        good = []
+        for item in items:
             try:
-                df.to_csv(write_cached_path, index=False)
-            except Exception:
-                pass
+                build([item])
+                good.append(item)
+            except Exception as e:
+                self.report_error(parser, item[0], e)
+        if not good:
+            return None, None, 0
+        return build(good)
+
+    def extract_pooled(
+        self,
+        parser: BaseParser,
+        blocks: List[Tuple[int, Block]],
+        pool: Executor,
+        chunks: int,
+        status: bool,
+    ) -> list:
+        """Extract each block's points in up to `chunks` slices on `pool`.
+
+        Only the raw DataValues of a slice are sent to a worker. Returns
+        `(index, block, parts)` for blocks whose extraction succeeded.
+        """
+        jobs = []
+        for i, block in blocks:
+            futures = [
+                pool.submit(extract_columns, channels, status)
+                for channels in block.split(chunks)
+            ]
+            jobs.append((i, block, futures))
+        out = []
+        for i, block, futures in jobs:
+            try:
+                out.append((i, block, [f.result() for f in futures]))
+            except Exception as e:
+                self.report_error(parser, i, e)
+        return out
 
-        return df
+    def build_extracted(self, parser: BaseParser, extracted: list):
+        blocks = [b for _, b, _ in extracted]
+        parts = [p for _, _, ps in extracted for p in ps]
+        names = column_names([ch for b in blocks for ch in b.channels])
+        columns, lengths = concat_columns(parts, names)
+        metas = [m for b in blocks for m in b.metas]
+        return build_frame(metas, lengths, columns, parser.derive), lengths
+
+    def parse_frames(
+        self,
+        parser: BaseParser,
+        measurements: List[dict],
+        methods: List[Optional[dict]],
+        kwargs: dict,
+        pool: Optional[Executor] = None,
+    ) -> List[pd.DataFrame]:
+        """One frame per measurement, for parsers without a `plan`."""
+        if pool is None:
+            out = []
+            for i, (measurement, method) in enumerate(zip(measurements, methods)):
+                try:
+                    data = parser.parse_data(measurement, method=method, **kwargs)
+                    if data is not None:
+                        out.append(data)
+                except Exception as e:
+                    self.report_error(parser, i, e)
+            return out
+
+        jobs = []
+        for i, (measurement, method) in enumerate(zip(measurements, methods)):
+            if method is None:
+                method = method_to_dict(measurement.get("Method", ""))
+            method_params = parser.select_method(method, data=True)
+            if method_params is not None:
+                future = pool.submit(
+                    _parse_measurement, parser, measurement, method_params, kwargs
+                )
+                jobs.append((i, future))
+
+        out = []
+        for i, future in jobs:
+            try:
+                out.append(future.result())
+            except Exception as e:
+                self.report_error(parser, i, e)
+        return out
 
     def parse(
         self,
-        measurements: list[dict],
+        measurements: Union[List[dict], Callable[[], List[dict]]],
         enrichments: list,
         opts: dict,
+        workers: Optional[int] = None,
+        methods: Optional[Iterable[str]] = None,
     ) -> Measurements:
-        return Measurements(
-            EIS=self.parse_measurement_data(
-                self.eisParser,
-                measurements,
-                enrichments=enrichments,
-                opts=opts,
-            ),
-            LSV=self.parse_measurement_data(
-                self.lsvParser,
-                measurements,
-                enrichments=enrichments,
-                opts=opts,
-            ),
-            CV=self.parse_measurement_data(
-                self.cvParser,
-                measurements,
-                enrichments=enrichments,
-                opts=opts,
-            ),
-        )
+        """Parse registered techniques from `measurements`, lazily.
 
+        Each technique's table is built on first access. `methods` limits
+        the result to those method ids; other techniques are never parsed.
+        `workers` > 1 parses measurements and channels on a process pool.
+        With a `selection` (see `selected`), measurements it rejects are
+        dropped and unselected channels are never extracted; parsers
+        without a `plan` only get the measurement-level checks.
+        `measurements` may be a function returning them, called when the
+        first table is built. With an `increment` (see `extended`), tables
+        whose earlier version is cached are built from the appended
+        measurements only and merged into it.
+        """
+        out = Measurements()
+        # a private copy collects this result's errors and pins its settings
+        parsers = replace(self, errors=out.errors)
+        by_method: Dict[str, Tuple[List[dict], List[dict]]] = {}
+        appended: Dict[str, Tuple[List[dict], List[dict]]] = {}
+
+        def classify(measurements):
+            ms = measurements() if callable(measurements) else measurements
+            if parsers.selection:
+                ms = [m for m in ms if parsers.selection.keep_measurement(m)]
+            return parsers.classify(ms)
+
+        def run(parsers: Parsers, parser: BaseParser, classified: dict, source):
+            if not classified:
+                classified.update(classify(source))
+            ms, method_dicts = classified.get(parser.mid, ([], []))
+            pool = ProcessPoolExecutor(workers) if workers and workers > 1 else None
+            try:
+                return parsers.parse_tables(
+                    parser,
+                    ms,
+                    enrichments=enrichments,
+                    opts=opts,
+                    methods=method_dicts,
+                    pool=pool,
+                    chunks=workers or 1,
+                )
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+
+        def build(parser: BaseParser):
+            increment = parsers.increment
+            base = increment.tables(parser, opts) if increment is not None else None
+            if base is None:
+                return run(parsers, parser, by_method, measurements)
+            # only the merged tables are cached
+            uncached = replace(
+                parsers, cache_params=replace(parsers.cache, write_cache=False)
+            )
+            added = run(uncached, parser, appended, increment.measurements)
+            return parsers.merge_tables(parser, opts, base, added)
+
+        # a table, its summary and its sweeps come from the same pass, so
+        # building one also fills in the others
+        def load(parser: BaseParser, suffix: str) -> pd.DataFrame:
+            cached = parsers.cache.read(f"{parser}{suffix}")
+            if cached is not None:
+                return cached
+            tables = build(parser)
+            for other, df in tables.items():
+                if other != suffix:
+                    out.set_table(f"{parser.mid}{other}", df)
+            return tables.get(suffix, pd.DataFrame())
+
+        selected = None if methods is None else {m.lower() for m in methods}
+        for parser in self.parsers():
+            if selected is None or parser.mid in selected:
+                for suffix in table_suffixes(parser, opts):
+                    out.set_loader(
+                        f"{parser.mid}{suffix}", partial(load, parser, suffix)
+                    )
+        return out
+
+    # settings return a copy, so a shared instance is never changed
     def cached(self, cache_params: CacheParameters) -> "Parsers":
-        self.cache = cache_params
-        return self
+        return replace(self, cache_params=cache_params)
+
+    def selected(self, selection: Optional[Selection]) -> "Parsers":
+        return replace(self, selection=selection)
+
+    def extended(self, increment: Optional[Increment]) -> "Parsers":
+        return replace(self, increment=increment)
@@ -0,0 +1,178 @@
+"""Normalized tables: one metadata row per sweep plus slim points.
+
+Wide technique tables repeat the measurement metadata (title, date, ids,
+method keys, ...) on every point. `normalize` splits such a table into
+
+- `sweeps`: one row per sweep with the columns constant within it, keyed
+  by an integer `sweep` code;
+- `points`: the `sweep` code (the smallest int type that fits) and the
+  columns that vary within sweeps.
+
+`denormalize` joins them back into the wide frame. Dtypes are narrowed only
+where `denormalize` restores them exactly: string columns become
+categorical, float64 points become float32 when no value changes (or
+always, with `float32=True`, keeping about 7 significant digits). The
+narrowed columns and the wide column order are kept in `DataFrame.attrs`,
+which the npz cache preserves.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+SWEEP = "sweep"
+# `DataFrame.attrs` keys: wide column order, columns to widen back
+COLUMNS_ATTR = "wide_columns"
+NARROWED_ATTR = "narrowed"
+
+
+def sweep_codes(lengths: Sequence[int]) -> np.ndarray:
+    """Per-row code of tables made of back to back runs of `lengths` rows."""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    return np.repeat(np.arange(len(lengths)), lengths)
+
+
+def smallest_int(values: np.ndarray) -> np.ndarray:
+    if not len(values):
+        return values.astype(np.int8)
+    lo, hi = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dtype)
+    return values.astype(np.int64)
+
+
+def _is_str(col: pd.Series) -> bool:
+    return pd.api.types.is_string_dtype(col.dtype) and not isinstance(
+        col.dtype, pd.CategoricalDtype
+    )
+
+
+def narrow(col: pd.Series, floats: bool = True, float32: bool = False):
+    """`col` in a smaller dtype that `widen` turns back into the same values,
+    and whether it changed."""
+    if floats and col.dtype == np.float64:
+        values = col.to_numpy()
+        small = values.astype(np.float32)
+        if float32 or np.array_equal(small, values, equal_nan=True):
+            return pd.Series(small, name=col.name, index=col.index), True
+    elif _is_str(col):
+        return col.astype("category"), True
+    return col, False
+
+
+def widen(col: pd.Series) -> pd.Series:
+    if col.dtype == np.float32:
+        return col.astype(np.float64)
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return col.astype(col.cat.categories.dtype)
+    return col
+
+
+def _constant_within(col: pd.Series, first: np.ndarray, codes: np.ndarray) -> bool:
+    # NaN in the same rows counts as equal
+    values = col.reset_index(drop=True)
+    return values.equals(pd.Series(values.array.take(first[codes]), name=col.name))
+
+
+def normalize(
+    df: pd.DataFrame,
+    by: Union[str, List[str]] = SWEEP,
+    float32: bool = False,
+    point_columns: Optional[Sequence[str]] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Split `df` into `(sweeps, points)`.
+
+    `by` is a column of integer sweep codes (e.g. from `sweep_codes`) or the
+    columns identifying a sweep, e.g. `["sweep_id", "cycle"]` for CV. Codes
+    are renumbered in order of first appearance. Columns constant within
+    every sweep go to `sweeps` unless listed in `point_columns`.
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    if keys == [SWEEP] and SWEEP in df.columns:
+        codes, _ = pd.factorize(df[SWEEP], sort=False)
+    else:
+        codes = df.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+        codes, _ = pd.factorize(codes, sort=False)
+    codes = np.asarray(codes, dtype=np.int64)
+    n_sweeps = int(codes.max()) + 1 if len(codes) else 0
+    first = np.full(n_sweeps, len(codes), dtype=np.int64)
+    np.minimum.at(first, codes, np.arange(len(codes)))
+
+    columns = [c for c in df.columns if c != SWEEP]
+    keep = set(point_columns or ())
+    meta = [
+        c
+        for c in columns
+        if c not in keep and _constant_within(df[c], first, codes)
+    ]
+    points = [c for c in columns if c not in set(meta)]
+
+    def table(codes, names, rows, floats):
+        data, narrowed = {SWEEP: codes}, []
+        for c in names:
+            data[c], changed = narrow(rows(df[c]), floats, float32)
+            if changed:
+                narrowed.append(c)
+        out = pd.DataFrame(data, copy=False)
+        out.attrs.update({COLUMNS_ATTR: columns, NARROWED_ATTR: narrowed})
+        return out
+
+    # the sweeps table is small, only its strings are worth narrowing
+    sweeps = table(
+        np.arange(n_sweeps, dtype=np.int64),
+        meta,
+        lambda col: col.iloc[first].reset_index(drop=True),
+        floats=False,
+    )
+    points_df = table(
+        smallest_int(codes),
+        points,
+        lambda col: col.reset_index(drop=True),
+        floats=True,
+    )
+    return sweeps, points_df
+
+
+def denormalize(
+    sweeps: pd.DataFrame, points: pd.DataFrame, codes: bool = False
+) -> pd.DataFrame:
+    """The wide frame `normalize` split into `sweeps` and `points`.
+
+    Dtypes and column order come back as they were when the tables still
+    carry their attrs (a csv cache loses them); otherwise sweep columns come
+    first. `codes` keeps the points' sweep codes as an int64 `sweep` column,
+    which `normalize` splits by again.
+    """
+    if sweeps.empty and points.empty:
+        return pd.DataFrame()
+    # position of each code in `sweeps`, which may be filtered or reordered
+    index = pd.Index(sweeps[SWEEP].to_numpy())
+    rows = index.get_indexer(points[SWEEP].to_numpy())
+    if (rows < 0).any():
+        raise KeyError("points reference sweeps missing from the sweeps table")
+
+    def restore(table, c):
+        narrowed = table.attrs.get(NARROWED_ATTR, ())
+        return widen(table[c]) if c in narrowed else table[c]
+
+    data = {}
+    for c in sweeps.columns:
+        if c != SWEEP:
+            data[c] = pd.Series(restore(sweeps, c).array.take(rows), name=c)
+    for c in points.columns:
+        if c != SWEEP:
+            data[c] = restore(points, c).reset_index(drop=True)
+
+    # columns added after normalizing (e.g. `source_file`) come first
+    order = points.attrs.get(COLUMNS_ATTR) or sweeps.attrs.get(COLUMNS_ATTR)
+    if order and set(order) <= set(data):
+        order = [c for c in data if c not in set(order)] + list(order)
+        data = {c: data[c] for c in order}
+    if codes:
+        data[SWEEP] = points[SWEEP].to_numpy().astype(np.int64)
+    return pd.DataFrame(data, copy=False)
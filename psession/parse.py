@@ -1,17 +1,50 @@
 from __future__ import annotations
 
+import codecs
+import glob
 import json
 import os
 import logging
+import re
+import time
+from dataclasses import replace
 from pprint import pprint
-from typing import Iterable, Optional
-from .measurements import Measurements, Parsers, CacheParameters
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Tuple, Union
+from .cache import Manifest, config_key, temp_path
+from .selection import Selection
+from .index import (
+    INDEX_ENTRY,
+    build_index,
+    byte_spans,
+    index_covers,
+    index_info,
+    index_key,
+    index_path,
+    measurement_key,
+    measurement_loader,
+    read_index,
+    write_index,
+)
+from .serializers import get_serializer
+from .profiling import HIT, MISS, span
+
+# tables are built with numpy and pandas, imported by `parse` when it first
+# runs: decoding, indexing and `info` need neither
+if TYPE_CHECKING:
+    from .measurements import BatchResult, CacheParameters, Measurements
 
 SUPPORTED_VERSION = (5, 11, 1006)
 
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+CHUNK_SIZE = 1 << 20
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
 
 log = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 
 def multi_encoding_open(fp: str, encodings: Iterable[str]) -> Optional[str]:
@@ -40,6 +73,156 @@ def find_json_end(content: str) -> int:
     return json_end
 
 
+def detect_bom(fp: str) -> Optional[Tuple[str, int]]:
+    """Return `(encoding, bom_length)` for `fp`, or None without a BOM."""
+    with open(fp, "rb") as f:
+        head = f.read(4)
+    for bom, enc in BOMS:
+        if head.startswith(bom):
+            return enc, len(bom)
+    return None
+
+
+def stream_decode(
+    fp: str,
+    encoding: str,
+    offset: int = 0,
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """Decode `fp` from `offset` in fixed-size chunks with an incremental decoder."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = []
+    with open(fp, "rb") as f:
+        f.seek(offset)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def load_json_prefix(content: str) -> Tuple[dict, str]:
+    """Decode the first JSON document in `content`, ignoring trailing data.
+
+    Returns the decoded object and the exact JSON text it was read from.
+    """
+    data, json_content, _ = load_json_spans(content)
+    return data, json_content
+
+
+def _skip_ws(content: str, i: int) -> int:
+    return WHITESPACE.match(content, i).end()
+
+
+def _expect(content: str, i: int, chars: str) -> str:
+    if i >= len(content) or content[i] not in chars:
+        raise json.JSONDecodeError(f"Expecting one of {chars!r}", content, i)
+    return content[i]
+
+
+def load_json_spans(
+    content: str,
+    read_measurement: Optional[Callable[[str, int, int], Tuple[object, int]]] = None,
+) -> Tuple[dict, str, List[Tuple[int, int]]]:
+    """`load_json_prefix`, also returning where each element of the
+    top-level `Measurements` array sits in the JSON text.
+
+    The top-level object is walked key by key, decoding values with the
+    standard decoder, so this costs the same as decoding it in one go.
+    `read_measurement(content, i, n)` replaces the decoder for the `n`th
+    measurement, which starts at `i`, returning it and where it ends.
+    """
+    decoder = json.JSONDecoder()
+    if read_measurement is None:
+        read_measurement = lambda content, i, n: decoder.raw_decode(content, i)
+    start = _skip_ws(content, 0)
+    if start >= len(content) or content[start] != "{":
+        data, end = decoder.raw_decode(content, start)
+        return data, content[start:end], []
+
+    data, spans = {}, []
+    i = _skip_ws(content, start + 1)
+    if _expect(content, i, '"}') == "}":
+        return data, content[start : i + 1], spans
+    while True:
+        _expect(content, i, '"')
+        key, i = decoder.raw_decode(content, i)
+        _expect(content, _skip_ws(content, i), ":")
+        i = _skip_ws(content, _skip_ws(content, i) + 1)
+        if key == "Measurements" and content.startswith("[", i):
+            value, spans = [], []
+            i = _skip_ws(content, i + 1)
+            if content.startswith("]", i):
+                i += 1
+            else:
+                while True:
+                    item, end = read_measurement(content, i, len(value))
+                    value.append(item)
+                    spans.append((i - start, end - start))
+                    i = _skip_ws(content, end)
+                    if _expect(content, i, ",]") == "]":
+                        i += 1
+                        break
+                    i = _skip_ws(content, i + 1)
+        else:
+            value, i = decoder.raw_decode(content, i)
+        data[key] = value
+        i = _skip_ws(content, i)
+        if _expect(content, i, ",}") == "}":
+            return data, content[start : i + 1], spans
+        i = _skip_ws(content, i + 1)
+
+
+def stream_load(
+    fp: str, chunk_size: int = CHUNK_SIZE
+) -> Tuple[dict, str, List[Tuple[int, int]]]:
+    """Load a session by sniffing its BOM once and decoding it in chunks.
+
+    Returns the session, its JSON text and the spans of its measurements
+    in that text (see `load_json_spans`). Raises ValueError if the file has
+    no BOM or does not start with JSON, so callers can fall back to
+    `legacy_load`.
+    """
+    bom = detect_bom(fp)
+    if bom is None:
+        raise ValueError(f"No byte order mark found in {fp}")
+    encoding, offset = bom
+
+    n_bytes = os.path.getsize(fp)
+    t0 = time.perf_counter()
+    with span("decode", file=os.path.basename(fp)) as s:
+        content = stream_decode(fp, encoding, offset=offset, chunk_size=chunk_size)
+        s.bytes = n_bytes
+    with span("json", file=os.path.basename(fp)) as s:
+        data, json_content, spans = load_json_spans(content)
+        s.bytes = len(json_content)
+    elapsed = time.perf_counter() - t0
+
+    log.info(
+        "Loaded %s (%s): %d bytes in %.3fs (%.1f MB/s)",
+        fp,
+        encoding,
+        n_bytes,
+        elapsed,
+        n_bytes / elapsed / 1e6 if elapsed > 0 else float("inf"),
+    )
+    return data, json_content, spans
+
+
+def legacy_load(fp: str, encodings: Iterable[str]) -> Tuple[dict, str]:
+    content = multi_encoding_open(fp, encodings)
+    if content is None:
+        raise ValueError(f"Could not read {fp} with encodings {encodings}")
+
+    try:
+        return json.loads(content), content
+    except json.JSONDecodeError:
+        json_content = content[: find_json_end(content)]
+        return json.loads(json_content), json_content
+
+
 def check_support(data: dict):
     v_str = data.get("CoreVersion", "")
     parts = v_str.split(".")
@@ -60,32 +243,40 @@ def parse_pssession_file(
     encodings: Iterable[str] = ("utf-16", "utf-16-le"),
     force_reload: bool = False,
     cache_path: Optional[str] = None,
+    manifest: Optional[Manifest] = None,
 ) -> dict:
     cache_path = cache_path or os.path.dirname(fp)
     filename = os.path.basename(fp)
+    manifest = manifest or Manifest.for_source(fp, cache_path)
 
     fp_json = os.path.join(cache_path, filename + ".json")
-    if os.path.exists(fp_json) and not force_reload:
-        with open(fp_json, "r", encoding="utf-8") as f:
-            return json.load(f)
-
-    content = multi_encoding_open(fp, encodings)
-    if content is None:
-        raise ValueError(f"Could not read {fp} with encodings {encodings}")
+    fp_index = index_path(cache_path, filename)
+    with span("json_cache_read", file=filename) as s:
+        s.cache = MISS
+        if (
+            os.path.exists(fp_json)
+            and not force_reload
+            and manifest.valid("json", manifest.source_key)
+        ):
+            s.cache, s.bytes = HIT, os.path.getsize(fp_json)
+            if manifest.valid(INDEX_ENTRY, index_key(manifest)):
+                with open(fp_json, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            # cached before indexes existed: index it while decoding
+            with open(fp_json, "r", encoding="utf-8", newline="") as f:
+                json_content = f.read()
+            data, _, spans = load_json_spans(json_content)
+            write_session_index(fp_index, manifest, data, json_content, spans)
+            return data
 
     try:
-        data = json.loads(content)
-    except json.JSONDecodeError:
-        json_end = find_json_end(content)
-        try:
-            json_content = content[:json_end]
-            data = json.loads(json_content)
-            fp_json = fp + ".json"
-            if not os.path.exists(fp_json):
-                with open(fp_json, "w", encoding="utf-8") as f:
-                    f.write(json_content)
-        except json.JSONDecodeError as e:
-            raise e
+        data, json_content, spans = stream_load(fp)
+    except ValueError as e:
+        log.debug("Streaming load of %s failed (%s), using legacy loader", fp, e)
+        with span("decode", file=filename, loader="legacy") as s:
+            data, json_content = legacy_load(fp, encodings)
+            s.bytes = os.path.getsize(fp)
+        _, _, spans = load_json_spans(json_content)
 
     envPrint = os.getenv("PRINT", "")
     if envPrint in ("1", "true", "yes", "t", "y"):
@@ -96,26 +287,196 @@ def parse_pssession_file(
     except ValueError as e:
         log.warning("Support check failed: %s", e)
 
-    # cache parsed json file
-    with open(fp_json, "w", encoding="utf-8") as f:
-        json.dump(data, f)
+    # cache parsed json file, byte for byte so the index spans point into it
+    with span("json_cache_write", file=filename) as s:
+        write_json_cache(fp_json, json_content)
+        s.bytes = len(json_content)
+    manifest.record("json", manifest.source_key)
+    write_session_index(fp_index, manifest, data, json_content, spans)
 
     return data
 
 
+def write_json_cache(fp_json: str, json_content: str):
+    # swapped in whole, so lazy loaders reading spans never see half a file
+    tmp = temp_path(fp_json)
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(json_content)
+    os.replace(tmp, fp_json)
+
+
+def write_session_index(
+    fp_index: str,
+    manifest: Manifest,
+    data: dict,
+    json_content: str,
+    spans: List[Tuple[int, int]],
+):
+    measurements = data.get("Measurements", []) if isinstance(data, dict) else []
+    if len(spans) != len(measurements):
+        spans = None
+    else:
+        spans = byte_spans(json_content, spans)
+    with span("index_write", file=os.path.basename(fp_index)) as s:
+        write_index(fp_index, build_index(measurements, spans))
+        s.rows = len(measurements)
+    manifest.record(INDEX_ENTRY, index_key(manifest))
+
+
+def cached_index(
+    file_path: str,
+    cache_path: str,
+    manifest: Optional[Manifest],
+    force_reload: bool = False,
+) -> Optional[List[dict]]:
+    """Index entries of `file_path` when the index and the JSON cache it
+    points into are both current, else None."""
+    if force_reload or manifest is None:
+        return None
+    if not (
+        manifest.valid("json", manifest.source_key)
+        and manifest.valid(INDEX_ENTRY, index_key(manifest))
+    ):
+        return None
+    filename = os.path.basename(file_path)
+    if not os.path.exists(os.path.join(cache_path, filename + ".json")):
+        return None
+    with span("index_read", file=filename) as s:
+        entries = read_index(index_path(cache_path, filename))
+        s.cache = MISS if entries is None else HIT
+    return entries
+
+
+# stands in for measurements `append_session` did not need to decode
+KNOWN = object()
+
+
+def append_session(
+    file_path: str, cache_path: str, manifest: Optional[Manifest]
+) -> Optional[Tuple[List[dict], List[dict], int]]:
+    """Bring the JSON cache and index of a session that only gained
+    measurements since they were written up to date.
+
+    Measurements already indexed are recognized by their JSON text, which is
+    compared rather than decoded, or else by `measurement_key` (TimeStamp,
+    UTCTimeStamp and curve Hash), so only the appended ones are decoded.
+    Returns the new index entries, the appended measurements and how many
+    were known, or None when the session changed otherwise.
+    """
+    previous = manifest.previous if manifest is not None else None
+    if previous is None or not (
+        previous.valid("json", previous.source_key)
+        and previous.valid(INDEX_ENTRY, index_key(previous))
+    ):
+        return None
+    filename = os.path.basename(file_path)
+    fp_json = os.path.join(cache_path, filename + ".json")
+    fp_index = index_path(cache_path, filename)
+    old = read_index(fp_index)
+    bom = detect_bom(file_path)
+    if not old or not index_covers(old) or bom is None or not os.path.exists(fp_json):
+        return None
+
+    with span("decode", file=filename) as s:
+        content = stream_decode(file_path, bom[0], offset=bom[1])
+        s.bytes = os.path.getsize(file_path)
+    with open(fp_json, "rb") as f:
+        old_json = f.read()
+    decoder = json.JSONDecoder()
+
+    def read_measurement(content: str, i: int, n: int):
+        if n < len(old):
+            start, end = old[n]["span"]
+            text = old_json[start:end].decode("utf-8")
+            if content.startswith(text, i):
+                return KNOWN, i + len(text)
+        return decoder.raw_decode(content, i)
+
+    try:
+        with span("json", file=filename) as s:
+            data, json_content, spans = load_json_spans(content, read_measurement)
+            s.bytes = len(json_content)
+    except ValueError:
+        return None
+    measurements = data.get("Measurements", [])
+    if len(spans) != len(measurements) or len(measurements) < len(old):
+        return None
+    for m, entry in zip(measurements, old):
+        if m is not KNOWN and measurement_key(m) != entry["key"]:
+            return None
+
+    try:
+        check_support(data)
+    except ValueError as e:
+        log.warning("Support check failed: %s", e)
+
+    with span("json_cache_write", file=filename) as s:
+        write_json_cache(fp_json, json_content)
+        s.bytes = len(json_content)
+    manifest.record("json", manifest.source_key)
+
+    known = len(old)
+    spans = byte_spans(json_content, spans)
+    added = measurements[known:]
+    entries = [
+        {**entry, "span": list(byte_span)}
+        for entry, byte_span in zip(old, spans[:known])
+    ] + build_index(added, spans[known:], first=known)
+    with span("index_write", file=os.path.basename(fp_index)) as s:
+        write_index(fp_index, entries)
+        s.rows = len(entries)
+    manifest.record(INDEX_ENTRY, index_key(manifest))
+    log.info("%s: %d new measurements after %d known", file_path, len(added), known)
+    return entries, added, known
+
+
+def previous_cache(
+    cache_params: CacheParameters, config: tuple = ()
+) -> Optional[CacheParameters]:
+    """Read-only cache of the tables parsed, under the same `config`, from
+    the session as it was before its source changed."""
+    previous = cache_params.manifest and cache_params.manifest.previous
+    if previous is None:
+        return None
+    return replace(
+        cache_params,
+        write_cache=False,
+        manifest=previous,
+        key=config_key(previous.source_key, *config),
+    )
+
+
 def cache_parameters(
     file_path: str,
     cache_path: Optional[str] = None,
     force_reload: bool = False,
+    config: tuple = (),
+    cache_format: Optional[str] = None,
 ) -> CacheParameters:
+    """Cache settings for `file_path`.
+
+    Table entries are keyed on the source content plus `config` (the
+    enrichments and opts used), and validated against the manifest.
+    `cache_format` picks the table serializer (`PSESS_CACHE_FORMAT` or npz
+    when unset).
+    """
+    from .measurements import CacheParameters
+
     if os.getenv("NO_CACHE", "").lower() in ("1", "true", "yes", "t", "y"):
         force_reload = True
+    serializer = get_serializer(cache_format or os.getenv("PSESS_CACHE_FORMAT"))
+
+    cache_path = cache_path or os.path.dirname(file_path)
+    manifest = Manifest.for_source(file_path, cache_path)
 
     return CacheParameters(
         write_cache=True,
         read_cache=not force_reload,
-        cache_path=cache_path or os.path.dirname(file_path),
+        cache_path=cache_path,
         cache_prefix=os.path.basename(file_path),
+        manifest=manifest,
+        key=config_key(manifest.source_key, *config),
+        serializer=serializer,
     )
 
 
@@ -125,44 +486,201 @@ def parse(
     opts: dict = {},
     force_reload: bool = False,
     cache_path: Optional[str] = None,
+    cache_format: Optional[str] = None,
+    workers: Optional[int] = None,
+    methods: Optional[Iterable[str]] = None,
+    select: Optional[Selection] = None,
+    incremental: bool = True,
 ) -> Measurements:
+    """Parse a session into per-technique tables.
+
+    Tables are built on first access; `methods` (e.g. `["eis"]`) restricts
+    the result to those techniques so the others are never parsed. `select`
+    keeps only some channels, a time range or matching titles/devices,
+    checked before any points are read. Selected tables bypass the table
+    cache, which always holds whole sessions.
+
+    When the session only gained measurements since it was last parsed (as
+    while PSTrace appends to it), `incremental` parses just the new ones,
+    enrichments and derived columns included, and merges them into the
+    cached tables. Enrichments must then depend on each row's own
+    measurement only, as the default ones do.
+    """
+    from .measurements import Increment, Parsers
+
+    config = (enrichments, opts)
     cache_params = cache_parameters(
         file_path,
         cache_path=cache_path,
         force_reload=force_reload,
+        config=config,
+        cache_format=cache_format,
     )
+    if select:
+        cache_params = replace(cache_params, read_cache=False, write_cache=False)
 
-    data = parse_pssession_file(
-        file_path,
-        force_reload=force_reload,
-        cache_path=cache_params.cache_path,
+    parsers = Parsers().cached(cache_params).selected(select)
+    entries = cached_index(
+        file_path, cache_params.cache_path, cache_params.manifest, force_reload
     )
-
-    return (
-        Parsers()
-        .cached(cache_params)
-        .parse(
-            data.get("Measurements", []),
-            enrichments=enrichments,
-            opts=opts,
+    if entries is None and incremental and not force_reload:
+        appended = append_session(
+            file_path, cache_params.cache_path, cache_params.manifest
+        )
+        if appended is not None:
+            entries, added, _ = appended
+            base = previous_cache(cache_params, config)
+            if base is not None and not select:
+                parsers = parsers.extended(Increment(base=base, measurements=added))
+    if index_covers(entries):
+        # decoded on the first table built, and only what it needs
+        fp_json = os.path.join(
+            cache_params.cache_path, os.path.basename(file_path) + ".json"
         )
+        measurements = measurement_loader(
+            fp_json,
+            entries,
+            methods=methods,
+            keep=select.keep_measurement if select else None,
+        )
+    else:
+        data = parse_pssession_file(
+            file_path,
+            force_reload=force_reload,
+            cache_path=cache_params.cache_path,
+            manifest=cache_params.manifest,
+        )
+        measurements = data.get("Measurements", [])
+
+    return parsers.parse(
+        measurements,
+        enrichments=enrichments,
+        opts=opts,
+        workers=workers,
+        methods=methods,
     )
 
 
+def expand_sources(sources: Union[str, Iterable[str]]) -> List[str]:
+    """Resolve files, directories and glob patterns to session paths.
+
+    Directories contribute their `*.pssession` files. Order is preserved and
+    duplicates are dropped.
+    """
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+
+    out = []
+    for src in map(str, sources):
+        if os.path.isdir(src):
+            out.extend(sorted(glob.glob(os.path.join(src, "*.pssession"))))
+        elif any(c in src for c in "*?["):
+            out.extend(sorted(glob.glob(src, recursive=True)))
+        else:
+            out.append(src)
+    return list(dict.fromkeys(out))
+
+
+def parse_many(
+    sources: Union[str, Iterable[str]],
+    enrichments: list = [],
+    opts: dict = {},
+    force_reload: bool = False,
+    cache_path: Optional[str] = None,
+    cache_format: Optional[str] = None,
+    workers: Optional[int] = None,
+    methods: Optional[Iterable[str]] = None,
+    select: Optional[Selection] = None,
+    incremental: bool = True,
+) -> BatchResult:
+    """Parse several sessions into one dataset with a `source_file` column.
+
+    With `workers` > 1 files are parsed concurrently on a process pool (at
+    most one process per file), so enrichments must be picklable
+    (module-level functions). Files that fail are listed in
+    `BatchResult.errors` instead of aborting the batch.
+
+    Files share the memo of parsed Method blocks, which sessions recorded
+    with the same settings repeat: all of them when parsed serially, and
+    those handled by the same process on a pool. Their table caches are
+    their own, keyed on each file's content.
+    """
+    from .measurements import BatchResult, combine_measurements
+
+    files = expand_sources(sources)
+    kwargs = dict(
+        enrichments=enrichments,
+        opts=opts,
+        force_reload=force_reload,
+        cache_path=cache_path,
+        cache_format=cache_format,
+        methods=methods,
+        select=select,
+        incremental=incremental,
+    )
+
+    results, errors = [], {}
+    if workers and workers > 1 and len(files) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(min(workers, len(files))) as pool:
+            futures = [(fp, pool.submit(parse, fp, **kwargs)) for fp in files]
+            for fp, future in futures:
+                try:
+                    results.append((fp, future.result()))
+                except Exception as e:
+                    errors[fp] = [f"{type(e).__name__}: {e}"]
+    else:
+        for fp in files:
+            try:
+                # build the tables here, as a pool worker does before pickling
+                # them, so their errors stay with their file
+                m = parse(fp, **kwargs)
+                m.load_all()
+                results.append((fp, m))
+            except Exception as e:
+                errors[fp] = [f"{type(e).__name__}: {e}"]
+
+    measurements = combine_measurements(results)
+    for fp, m in results:
+        if m.errors:
+            errors[fp] = list(m.errors)
+
+    return BatchResult(measurements=measurements, files=files, errors=errors)
+
+
 def info(
     file_path: str,
     force_reload: bool = False,
     cache_path: Optional[str] = None,
 ) -> list[dict]:
-    cache_params = cache_parameters(
-        file_path,
-        cache_path=cache_path,
-        force_reload=force_reload,
+    return index_info(
+        session_index(file_path, force_reload=force_reload, cache_path=cache_path)
     )
 
+
+def session_index(
+    file_path: str,
+    force_reload: bool = False,
+    cache_path: Optional[str] = None,
+) -> List[dict]:
+    """The sidecar index entries of `file_path` (see `psession.index`),
+    decoding and indexing the session first when there is none."""
+    cache_path = cache_path or os.path.dirname(file_path)
+    manifest = Manifest.for_source(file_path, cache_path)
+    entries = cached_index(file_path, cache_path, manifest, force_reload)
+    if entries is not None:
+        return entries
+    appended = None if force_reload else append_session(file_path, cache_path, manifest)
+    if appended is not None:
+        return appended[0]
+
     data = parse_pssession_file(
         file_path,
         force_reload=force_reload,
-        cache_path=cache_params.cache_path,
+        cache_path=cache_path,
+        manifest=manifest,
+    )
+    return cached_index(file_path, cache_path, manifest) or build_index(
+        data.get("Measurements", [])
     )
-    return Parsers().parse_info(data.get("Measurements", []))
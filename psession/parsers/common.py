@@ -1,13 +1,18 @@
 from datetime import datetime, timedelta
-import pandas as pd
+from functools import lru_cache
 
 MEASUREMENT_ID = "measurement_id"
 METHOD_ID = "method_id"
 SWEEP_ID = "sweep_id"
 SORT_KEYS = ["date", "channel"]
+# Top-level measurement fields read by `parse_common`
+COMMON_KEYS = ["Title", "TimeStamp", "UTCTimeStamp"]
 
 DATE_FMT = "%y%m%d%H%M%S"
 
+# Distinct Method scripts kept parsed; multiplexer sessions repeat a handful.
+METHOD_CACHE_SIZE = 512
+
 
 def must_get(d, key, msg=None):
     if key not in d:
@@ -41,7 +46,7 @@ def with_sweep_id(data):
     return out
 
 
-def method_to_dict(text):
+def _method_text_to_dict(text):
     out = {}
     for raw in text.strip().lower().splitlines():
         line = raw.strip()
@@ -77,38 +82,70 @@ def method_to_dict(text):
     return out
 
 
-def parse_method(text, select_keys=None, match_method_id=None):
-    m_dict = method_to_dict(text)
-    if match_method_id and m_dict.get(METHOD_ID, "").lower() != match_method_id.lower():
-        return None
+@lru_cache(maxsize=METHOD_CACHE_SIZE)
+def _cached_method_to_dict(text):
+    return _method_text_to_dict(text)
 
-    out = m_dict
-    if select_keys is not None:
-        out = pick_keys(m_dict, select_keys)
 
-    out[METHOD_ID] = m_dict.get(METHOD_ID, "").lower()
+def method_to_dict(text):
+    """Parse a Method block into a dict.
 
-    return out
+    Results are memoized by text; every call returns a fresh copy, so
+    callers may modify it without touching the cached entry.
+    """
+    cached = _cached_method_to_dict(text)
+    return {k: list(v) if isinstance(v, list) else v for k, v in cached.items()}
+
+
+def method_cache_info():
+    """Hit/miss counters of the Method memo (a `functools` CacheInfo)."""
+    return _cached_method_to_dict.cache_info()
 
 
-def flatten_measurements(measurements, sort_keys=SORT_KEYS):
-    frames = []
-    for data, meta in measurements:
-        df_run = data.assign(**meta)
-        frames.append(df_run)
+def clear_method_cache():
+    _cached_method_to_dict.cache_clear()
 
-    df = pd.concat(frames, ignore_index=True, sort=False)
 
-    meta_cols = list(measurements[0][1].keys())
-    other = [c for c in df.columns if c not in meta_cols]
-    df = df[meta_cols + other]
+def method_id_of(m_dict):
+    return str(m_dict.get(METHOD_ID, "")).lower()
 
-    if "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"], errors="coerce")
 
-    if sort_keys:
-        keys = [c for c in sort_keys if c in df.columns]
-        if keys:
-            df = df.sort_values(keys).reset_index(drop=True)
+def select_method(m_dict, select_keys=None, match_method_id=None):
+    """Like `parse_method`, on an already parsed Method dict.
 
-    return df
+    `m_dict` is never modified, so one parsed dict can be shared by callers.
+    """
+    if match_method_id and method_id_of(m_dict) != match_method_id.lower():
+        return None
+
+    out = dict(m_dict)
+    if select_keys is not None:
+        out = pick_keys(m_dict, select_keys)
+
+    out[METHOD_ID] = method_id_of(m_dict)
+
+    return out
+
+
+def parse_method(text, select_keys=None, match_method_id=None):
+    return select_method(
+        method_to_dict(text),
+        select_keys=select_keys,
+        match_method_id=match_method_id,
+    )
+
+
+def parse_title(row) -> dict:
+    """Device and block from a measurement title, `{}` if it has neither."""
+    try:
+        title = str(row.get("title", ""))
+        parts = title.split(" ")
+        # Expect: <date> <animal> <implant> <N##> <TOP|BOT>
+        if len(parts) >= 5:
+            _, _, _, device_n, block = parts[:5]
+            device_int = int(str(device_n).lstrip("Nn"))
+            two_digit_dev = f"N{device_int:02d}"
+            return {"device": two_digit_dev, "block": block}
+    except Exception:
+        pass
+    return {}
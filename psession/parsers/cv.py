@@ -1,49 +1,55 @@
-import re
 import numpy as np
 import pandas as pd
-from functools import partial
 from .common import (
+    SORT_KEYS as COMMON_SORT_KEYS,
     parse_common,
     pick_keys,
-    flatten_measurements,
     with_sweep_id,
     must_get,
 )
+from .extract import Block, assemble_blocks, order_channels, segment_metadata
+from .techniques import (
+    CV_INFO_KEYS as INFO_KEYS,
+    CV_METHOD_ID as METHOD_ID,
+    CV_METHOD_KEYS as METHOD_KEYS,
+    CV_SORT_KEYS as SORT_KEYS,
+    parse_cv_ch_title,
+)
+from .segments import (
+    segment_starts,
+    segmented_argext,
+    segmented_cumsum,
+    segmented_extrema,
+    segmented_last,
+    take_or_nan,
+)
 
-METHOD_ID = "cv"
-SORT_KEYS = ["date", "channel", "cycle"]
-METHOD_KEYS = [
-    "method_id",
-    "e_begin",
-    "e_end",
-    "e_step",
-    "e_vtx1",
-    "e_vtx2",
-    "scan_rate",
-    "n_scans",
+__all__ = [
+    "METHOD_ID",
+    "METHOD_KEYS",
+    "SORT_KEYS",
+    "INFO_KEYS",
+    "POINT_COLUMNS",
+    "parse_cv_ch_title",
+    "add_sweep_direction",
+    "compute_charge",
+    "normalize_charge",
+    "sweep_columns",
+    "plan_cv",
+    "derive_cv",
+    "summarize_cv",
+    "parse_cv",
 ]
-INFO_KEYS = ["e_vtx1", "e_vtx2", "scan_rate", "n_scans"]
-
-cycle_regex = re.compile(r"Scan (\d+)")
-channel_regex = re.compile(r"Channel (\d+)")
-
-
-def parse_cv_ch_title(title):
-    data = {}
-    try:
-        assert len(title) > 0, "CV channel title is empty"
-        match = cycle_regex.search(title)
-        cycle = int(match.group(1))
-        data["cycle"] = cycle
 
-        match = channel_regex.search(title)
-        channel = int(match.group(1))
-        data["channel"] = channel
-
-        return data
-
-    except Exception:
-        return data
+# per-point columns, left out of the per-curve summary
+POINT_COLUMNS = [
+    "sweep_dir",
+    "voltage",
+    "current",
+    "charge",
+    "charge_segment",
+    "q_norm",
+]
 
 
 def add_sweep_direction(df):
@@ -74,41 +80,127 @@ def normalize_charge(q):
     return (q - q_min) / (q_max - q_min) if q_max > q_min else 0.0
 
 
-def parse_dataset(measurement, metadata):
-    xs = measurement.get("XAxisDataArray", [])
-    ys = measurement.get("YAxisDataArray", [])
-
-    volt = [x.get("V") for x in xs.get("DataValues", [])]
-    curr = [y.get("V") for y in ys.get("DataValues", [])]
-
-    df = pd.DataFrame(
-        {
-            "voltage": volt,
-            "current": curr,
-        }
-    )
-
-    df = add_sweep_direction(df)
-    df = compute_charge(df, must_get(metadata, "scan_rate"))
-    df["q_norm"] = df.groupby("sweep_dir")["charge_segment"].transform(normalize_charge)
-
-    return df, metadata
-
-
-def parse_cv(measurement, method_info=None):
+def sweep_columns(voltage, current, lengths, scan_rates):
+    """`sweep_dir`, `charge`, `charge_segment` and `q_norm` for a set of curves.
+
+    `voltage`/`current` hold the curves back to back, `lengths` the points
+    per curve and `scan_rates` the scan rate per row. Gives exactly what
+    `add_sweep_direction`, `compute_charge` and `normalize_charge` give one
+    curve at a time.
+    """
+    if len(lengths) and lengths.min() < 2:
+        raise IndexError("CV curve needs at least two points")
+    starts = segment_starts(lengths)
+    curve = np.repeat(np.arange(len(lengths)), lengths)
+
+    dE = np.diff(voltage, prepend=voltage[:1])
+    dE[starts] = voltage[starts] - voltage[starts]
+    sweep_dir = np.sign(dE).astype(np.int8)
+    sweep_dir[starts] = np.where(voltage[starts + 1] >= voltage[starts], 1, -1)
+
+    dE = np.where(np.isnan(dE), 0.0, dE)
+    prev_i = np.roll(current, 1)
+    prev_i[starts] = np.nan
+    prev_i = np.where(np.isnan(prev_i), current, prev_i)
+    Imid = 0.5 * (current + prev_i)
+    # Time step is positive regardless of sweep direction
+    dQ = Imid * (np.abs(dE) / np.abs(scan_rates))
+
+    charge = segmented_cumsum(dQ, lengths)
+    # one group per curve and sweep direction; pandas' grouped cumsum is
+    # compensated, so it is kept to match `compute_charge` bit for bit
+    sweep = curve * 3 + sweep_dir + 1
+    q = pd.Series(dQ).groupby(sweep, sort=False).cumsum().to_numpy()
+    q_min, q_max = segmented_extrema(q, sweep)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        q_norm = np.where(q_max > q_min, (q - q_min) / (q_max - q_min), 0.0)
+
+    return {
+        "sweep_dir": sweep_dir,
+        "voltage": voltage,
+        "current": current,
+        "charge": charge,
+        "charge_segment": q,
+        "q_norm": q_norm,
+    }
+
+
+def plan_cv(measurement, method_info=None, select=None):
     assert len(measurement.get("Curves", [])) > 0, "No channels found in CV measurement"
 
     measurement_info = parse_common(measurement)
 
-    measurements = []
+    metas, channels = [], []
     for cv_measurement in measurement["Curves"]:
         metadata = {
             **measurement_info,
             **parse_cv_ch_title(cv_measurement.get("Title", "")),
             **pick_keys(method_info, METHOD_KEYS),
         }
-        metadata = with_sweep_id(metadata)
+        if select is not None and not select(metadata):
+            continue
+        metas.append(with_sweep_id(metadata))
+        xs = cv_measurement.get("XAxisDataArray", {})
+        ys = cv_measurement.get("YAxisDataArray", {})
+        voltage = xs.get("DataValues", [])
+        if len(voltage) < 2:
+            raise IndexError("CV curve needs at least two points")
+        channels.append({"voltage": voltage, "current": ys.get("DataValues", [])})
+    if not metas:
+        return None
+    # fail on this measurement now rather than when deriving the table
+    float(must_get(metas[0], "scan_rate"))
+
+    return order_channels(Block(metas, channels), COMMON_SORT_KEYS)
+
+
+def derive_cv(columns, lengths, metas):
+    scan_rates = np.repeat(
+        [float(must_get(m, "scan_rate")) for m in metas], lengths
+    )
+    derived = sweep_columns(
+        columns.pop("voltage"), columns.pop("current"), lengths, scan_rates
+    )
+    return {**derived, **columns}
+
+
+def summarize_cv(df, lengths):
+    """One row per curve: metadata, anodic/cathodic peaks, currents at the
+    potential vertices, total charge and the charge of each sweep direction.
+
+    `df` is the assembled table, before sorting, and `lengths` its rows
+    per curve.
+    """
+    lengths = lengths[lengths > 0]
+    voltage = df["voltage"].to_numpy()
+    current = df["current"].to_numpy()
+    sweep_dir = df["sweep_dir"].to_numpy()
+    q = df["charge_segment"].to_numpy()
+    last = segment_starts(lengths) + lengths - 1
+
+    ipa, ipa_at = segmented_argext(current, lengths, np.fmax)
+    ipc, ipc_at = segmented_argext(current, lengths, np.fmin)
+    e_max, e_max_at = segmented_argext(voltage, lengths, np.fmax)
+    e_min, e_min_at = segmented_argext(voltage, lengths, np.fmin)
+
+    summary = segment_metadata(df, lengths, POINT_COLUMNS)
+    summary["n_points"] = lengths
+    summary["ipa"] = ipa
+    summary["epa"] = take_or_nan(voltage, ipa_at)
+    summary["ipc"] = ipc
+    summary["epc"] = take_or_nan(voltage, ipc_at)
+    summary["e_max"] = e_max
+    summary["i_vtx_max"] = take_or_nan(current, e_max_at)
+    summary["e_min"] = e_min
+    summary["i_vtx_min"] = take_or_nan(current, e_min_at)
+    summary["charge"] = df["charge"].to_numpy()[last]
+    summary["charge_anodic"] = take_or_nan(q, segmented_last(sweep_dir == 1, lengths))
+    summary["charge_cathodic"] = take_or_nan(
+        q, segmented_last(sweep_dir == -1, lengths)
+    )
+    return summary
 
-        measurements.append(parse_dataset(cv_measurement, metadata))
 
-    return flatten_measurements(measurements)
+def parse_cv(measurement, method_info=None, status=False):
+    block = plan_cv(measurement, method_info)
+    return assemble_blocks([block], derive_cv, status=status)
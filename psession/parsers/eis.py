@@ -1,12 +1,25 @@
-import re
-import pandas as pd
-from typing import List
-from .common import parse_common, pick_keys, flatten_measurements, with_sweep_id
-
-METHOD_ID = "eis"
-SORT_KEYS = ["date", "channel"]
-METHOD_KEYS = ["method_id", "min_freq", "max_freq", "n_freq"]
-INFO_KEYS: List[str] = []
+from .common import parse_common, pick_keys, with_sweep_id
+from .extract import Block, assemble_blocks, order_channels
+from .techniques import (
+    EIS_INFO_KEYS as INFO_KEYS,
+    EIS_METHOD_ID as METHOD_ID,
+    EIS_METHOD_KEYS as METHOD_KEYS,
+    EIS_SORT_KEYS as SORT_KEYS,
+    parse_eis_ch_title,
+)
+
+__all__ = [
+    "METHOD_ID",
+    "METHOD_KEYS",
+    "SORT_KEYS",
+    "INFO_KEYS",
+    "UNITS",
+    "parse_eis_ch_title",
+    "labels_mapping",
+    "dataset_columns",
+    "plan_eis",
+    "parse_eis",
+]
 
 UNITS = ["frequency", "z", "phase", "zre", "zim", "c", "cre", "cim", "idc"]
 
@@ -22,27 +35,8 @@ def labels_mapping(label):
     return label
 
 
-# parse title in the form "CH 1: 13 freqs"
-def parse_eis_ch_title(
-    title,
-):
-    try:
-        assert len(title) > 0, "EIS channel title is empty"
-
-        regex = r"CH (\d+): (\d+) freqs.*"
-        match = re.match(regex, title)
-        assert match, f"Could not parse EIS channel title: {title}"
-        channel = int(match.group(1))
-        assert channel > 0, f"Invalid channel number in title: {title}"
-
-        return {
-            "channel": channel,
-        }
-    except Exception as e:
-        raise RuntimeError(e)
-
-
-def parse_dataset(measurement, metadata):
+def dataset_columns(measurement):
+    """Map each known unit of a channel's DataSet to its DataValues."""
     dataset = measurement.get("DataSet", {})
 
     data = {}
@@ -51,31 +45,34 @@ def parse_dataset(measurement, metadata):
         ds_value = ds_value.get("DataValues", [])
         ds_type = labels_mapping(ds_type)
         if ds_type in UNITS:
-            data[ds_type] = [x.get("V") for x in ds_value]
+            data[ds_type] = ds_value
 
-    df = pd.DataFrame(data)
+    return data
 
-    return df, metadata
 
-
-def parse_eis(measurement, method_info=None):
+def plan_eis(measurement, method_info=None, select=None):
     assert (
         len(measurement.get("EISDataList", [])) > 0
     ), "No channels found in EIS measurement"
 
     measurement_info = parse_common(measurement)
 
-    measurements = []
+    metas, channels = [], []
     for eis_measurement in measurement["EISDataList"]:
         metadata = {
             **measurement_info,
             **parse_eis_ch_title(eis_measurement.get("Title", "")),
             **pick_keys(method_info, METHOD_KEYS),
         }
-        metadata = with_sweep_id(metadata)
+        if select is not None and not select(metadata):
+            continue
+        metas.append(with_sweep_id(metadata))
+        channels.append(dataset_columns(eis_measurement))
+    if not metas:
+        return None
+
+    return order_channels(Block(metas, channels), SORT_KEYS)
 
-        measurements.append(
-            parse_dataset(eis_measurement, metadata),
-        )
 
-    return flatten_measurements(measurements, sort_keys=SORT_KEYS)
+def parse_eis(measurement, method_info=None, status=False):
+    return assemble_blocks([plan_eis(measurement, method_info)], status=status)
@@ -0,0 +1,252 @@
+"""Columnar extraction of PalmSens DataValues.
+
+Datasets store points as lists of `{"V": value, "S": status, ...}` dicts.
+The helpers here pull a field out of every point of every channel of a
+measurement into one preallocated numpy array, and expand per-channel
+metadata to row level, so technique parsers build a single frame per
+measurement instead of one per channel.
+
+Technique parsers describe a measurement as a `Block` (channel metadata plus
+raw DataValues) without extracting it, so a whole table can be extracted in
+one pass: every output column is allocated once at its final size.
+"""
+
+from dataclasses import dataclass
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+VALUE_KEY = "V"
+# Per-point status fields: S reading status, C current range, R potential range
+STATUS_KEYS = ["S", "C", "R"]
+MISSING_STATUS = -1
+
+
+def _or_nan(v):
+    return np.nan if v is None else v
+
+
+def extract_values(series: Sequence[list], key: str = VALUE_KEY) -> np.ndarray:
+    """Concatenate `key` of every point in `series` into one float64 array."""
+    total = sum(map(len, series))
+    points = chain.from_iterable(series)
+    try:
+        return np.fromiter(
+            map(itemgetter(key), points), dtype=np.float64, count=total
+        )
+    except (KeyError, TypeError, ValueError):
+        # slow path for points without the key or with null values
+        points = chain.from_iterable(series)
+        return np.fromiter(
+            (_or_nan(p.get(key)) for p in points), dtype=np.float64, count=total
+        )
+
+
+def extract_status(series: Sequence[list], key: str) -> Optional[np.ndarray]:
+    """Concatenate status field `key` as int16, or None if no point has it."""
+    total = sum(map(len, series))
+    points = chain.from_iterable(series)
+    out = np.fromiter(
+        (p.get(key, MISSING_STATUS) for p in points), dtype=np.int16, count=total
+    )
+    if (out == MISSING_STATUS).all():
+        return None
+    return out
+
+
+def channel_lengths(channels: List[Dict[str, list]]) -> np.ndarray:
+    """Row count of each channel; all its columns must have that many points."""
+    lengths = np.zeros(len(channels), dtype=np.int64)
+    for i, ch in enumerate(channels):
+        sizes = {len(v) for v in ch.values()}
+        if len(sizes) > 1:
+            raise ValueError("All arrays must be of the same length")
+        lengths[i] = sizes.pop() if sizes else 0
+    return lengths
+
+
+def extract_columns(
+    channels: List[Dict[str, list]],
+    status: bool = False,
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Extract point columns for all channels of a measurement at once.
+
+    `channels` maps column name to the DataValues list of each channel.
+    Columns missing from a channel are NaN for its rows. Returns the
+    columns, in order of first appearance, and the row count per channel.
+    With `status`, `S`/`C`/`R` fields are added as `<column>_<s|c|r>`.
+    """
+    lengths = channel_lengths(channels)
+
+    names = column_names(channels)
+    columns: Dict[str, np.ndarray] = {}
+    for name in names:
+        if all(name in ch for ch in channels):
+            series = [ch[name] for ch in channels]
+        else:
+            series = [ch.get(name) or [{}] * n for ch, n in zip(channels, lengths)]
+        columns[name] = extract_values(series)
+        if status:
+            for key in STATUS_KEYS:
+                values = extract_status(series, key)
+                if values is not None:
+                    columns[f"{name}_{key.lower()}"] = values
+
+    return columns, lengths
+
+
+def column_names(channels: List[Dict[str, list]]) -> List[str]:
+    """Point column names of `channels`, in order of first appearance."""
+    return list(dict.fromkeys(c for ch in channels for c in ch))
+
+
+def concat_columns(
+    parts: List[Tuple[Dict[str, np.ndarray], np.ndarray]],
+    names: List[str],
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Join `extract_columns` results of consecutive channel slices.
+
+    Each column is allocated once and filled slice by slice; columns a
+    slice lacks are NaN there (`MISSING_STATUS` for status columns).
+    Columns come out in `extract_columns` order for value columns `names`.
+    """
+    if len(parts) == 1:
+        return parts[0]
+    lengths = np.concatenate([p[1] for p in parts])
+    sizes = [int(p[1].sum()) for p in parts]
+    total = sum(sizes)
+
+    order = []
+    for name in names:
+        order.append(name)
+        for key in STATUS_KEYS:
+            status_name = f"{name}_{key.lower()}"
+            if any(status_name in p[0] for p in parts):
+                order.append(status_name)
+
+    columns: Dict[str, np.ndarray] = {}
+    for name in order:
+        first = next(p[0][name] for p in parts if name in p[0])
+        if first.dtype == np.int16:
+            out = np.full(total, MISSING_STATUS, dtype=np.int16)
+        else:
+            out = np.full(total, np.nan, dtype=first.dtype)
+        start = 0
+        for (cols, _), size in zip(parts, sizes):
+            if name in cols:
+                out[start : start + size] = cols[name]
+            start += size
+        columns[name] = out
+    return columns, lengths
+
+
+def expand_metadata(metas: List[dict], lengths: np.ndarray) -> Dict[str, pd.Series]:
+    """Repeat each channel's metadata over its rows.
+
+    Dtypes are inferred per key across channels, as concatenating one frame
+    per channel would; keys missing from a channel are NaN there.
+    """
+    keys = list(dict.fromkeys(k for m in metas for k in m))
+    out = {}
+    for k in keys:
+        values = pd.Series([m.get(k, np.nan) for m in metas])
+        out[k] = values.repeat(lengths).reset_index(drop=True)
+    return out
+
+
+def assemble_frame(
+    metas: List[dict],
+    lengths: np.ndarray,
+    columns: Dict[str, np.ndarray],
+) -> pd.DataFrame:
+    """Build one measurement's frame: metadata of the first channel first,
+    then point columns, then metadata only some channels carry.
+    """
+    meta = expand_metadata(metas, lengths)
+    if "date" in meta:
+        meta["date"] = pd.to_datetime(meta["date"], errors="coerce")
+    first = list(metas[0].keys()) if metas else []
+    data = {k: meta[k] for k in first}
+    data.update(columns)
+    data.update({k: v for k, v in meta.items() if k not in data})
+    # keep columns as separate blocks: consolidating would copy every one
+    return pd.DataFrame(data, copy=False)
+
+
+# derive(columns, lengths, metas) -> columns: technique specific columns
+# computed from the extracted points of a whole table at once
+Derive = Callable[[Dict[str, np.ndarray], np.ndarray, List[dict]], Dict]
+
+
+@dataclass
+class Block:
+    """One measurement planned for extraction.
+
+    `metas` holds each channel's metadata and `channels` its DataValues by
+    column name, in the order the channels' rows appear in the table.
+    """
+
+    metas: List[dict]
+    channels: List[Dict[str, list]]
+
+    def split(self, n_chunks: int) -> List[List[Dict[str, list]]]:
+        """Up to `n_chunks` consecutive channel slices, for worker processes."""
+        size = -(-len(self.channels) // max(1, n_chunks)) or 1
+        return [
+            self.channels[i : i + size] for i in range(0, len(self.channels), size)
+        ]
+
+
+def order_channels(block: Block, sort_keys: Sequence[str]) -> Block:
+    """Stable-sort `block`'s channels by metadata `sort_keys`.
+
+    Rows of a channel share its metadata, so this orders rows exactly as a
+    stable row sort of the assembled frame would, without sorting points.
+    """
+    keys = list(dict.fromkeys(k for m in block.metas for k in m))
+    keys = [k for k in sort_keys if k in keys]
+    if not keys or len(block.metas) < 2:
+        return block
+    frame = pd.DataFrame({k: [m.get(k, np.nan) for m in block.metas] for k in keys})
+    order = frame.sort_values(keys, kind="mergesort").index
+    return Block(
+        [block.metas[i] for i in order], [block.channels[i] for i in order]
+    )
+
+
+def build_frame(
+    metas: List[dict],
+    lengths: np.ndarray,
+    columns: Dict[str, np.ndarray],
+    derive: Optional[Derive] = None,
+) -> pd.DataFrame:
+    if derive is not None:
+        columns = derive(columns, lengths, metas)
+    return assemble_frame(metas, lengths, columns)
+
+
+def assemble_blocks(
+    blocks: List[Block],
+    derive: Optional[Derive] = None,
+    status: bool = False,
+) -> pd.DataFrame:
+    """Extract and assemble `blocks` into one frame, in block order."""
+    metas = [m for b in blocks for m in b.metas]
+    channels = [ch for b in blocks for ch in b.channels]
+    columns, lengths = extract_columns(channels, status=status)
+    return build_frame(metas, lengths, columns, derive)
+
+
+def segment_metadata(
+    df: pd.DataFrame, lengths: np.ndarray, point_columns: Sequence[str]
+) -> pd.DataFrame:
+    """First row of every non-empty channel, without its point columns."""
+    excluded = set(point_columns)
+    excluded.update(f"{c}_{k.lower()}" for c in point_columns for k in STATUS_KEYS)
+    keep = [c for c in df.columns if c not in excluded]
+    lengths = lengths[lengths > 0]
+    starts = np.cumsum(lengths) - lengths
+    return df[keep].take(starts).reset_index(drop=True)
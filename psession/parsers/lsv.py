@@ -1,33 +1,42 @@
-import re
 import numpy as np
-import pandas as pd
 from .common import (
     parse_common,
     pick_keys,
-    flatten_measurements,
     with_sweep_id,
     must_get,
 )
+from .extract import Block, assemble_blocks, order_channels, segment_metadata
+from .techniques import (
+    LSV_INFO_KEYS as INFO_KEYS,
+    LSV_METHOD_ID as METHOD_ID,
+    LSV_METHOD_KEYS as METHOD_KEYS,
+    LSV_SORT_KEYS as SORT_KEYS,
+    parse_lsv_ch_title,
+)
+from .segments import (
+    segment_starts,
+    segmented_argext,
+    segmented_cumsum,
+    take_or_nan,
+)
 
-METHOD_ID = "lsv"
-SORT_KEYS = ["date", "channel"]
-METHOD_KEYS = ["method_id", "e_begin", "e_end", "e_step", "scan_rate", "n_scans"]
-INFO_KEYS = ["e_begin", "e_end"]
-
-
-# parse title in the form "LSV i vs E Channel 1"
-def parse_lsv_ch_title(title):
-    try:
-        assert len(title) > 0, "LSV channel title is empty"
-
-        regex = r"LSV i vs E Channel (\d+)"
-        match = re.match(regex, title)
-        assert match, f"Could not parse EIS channel title: {title}"
-        channel = int(match.group(1))
-
-        return {"channel": channel}
-    except Exception:
-        return {}
+__all__ = [
+    "METHOD_ID",
+    "METHOD_KEYS",
+    "SORT_KEYS",
+    "INFO_KEYS",
+    "POINT_COLUMNS",
+    "parse_lsv_ch_title",
+    "compute_charge",
+    "curve_charge",
+    "plan_lsv",
+    "derive_lsv",
+    "summarize_lsv",
+    "parse_lsv",
+]
+
+# per-point columns, left out of the per-curve summary
+POINT_COLUMNS = ["voltage", "current", "charge"]
 
 
 def compute_charge(df, scan_rate):
@@ -41,44 +50,93 @@ def compute_charge(df, scan_rate):
     return df
 
 
-def parse_dataset(measurement, metadata):
-    xs = measurement.get("XAxisDataArray", [])
-    ys = measurement.get("YAxisDataArray", [])
-
-    volt = [y.get("V") for y in xs.get("DataValues", [])]
-    curr = [x.get("V") for x in ys.get("DataValues", [])]
+def curve_charge(voltage, current, lengths, scan_rate):
+    """`compute_charge` for curves stored back to back, `lengths` per curve.
 
-    df = pd.DataFrame(
-        {
-            "voltage": volt,
-            "current": curr,
-        }
-    )
+    `scan_rate` is a scalar or one value per row.
+    """
+    if len(lengths) and lengths.min() < 1:
+        raise IndexError("LSV curve has no points")
+    starts = segment_starts(lengths)
 
-    df = compute_charge(df, must_get(metadata, "scan_rate"))
+    dE = np.diff(voltage, prepend=voltage[:1])
+    dE[starts] = voltage[starts] - voltage[starts]
+    prev_i = np.roll(current, 1)
+    prev_i[starts] = current[starts]
+    Imid = 0.5 * (current + prev_i)
+    dQ = (Imid * dE) / scan_rate
 
-    return df, metadata
+    return segmented_cumsum(dQ, lengths, skipna=False)
 
 
-def parse_lsv(measurement, method_info=None):
+def plan_lsv(measurement, method_info=None, select=None):
     assert (
         len(measurement.get("Curves", [])) > 0
     ), "No channels found in LSV measurement"
 
     measurement_info = parse_common(measurement)
 
-    measurements = []
+    metas, channels = [], []
     for lsv_measurement in measurement["Curves"]:
         metadata = {
             **measurement_info,
             **parse_lsv_ch_title(lsv_measurement.get("Title", "")),
             **pick_keys(method_info, METHOD_KEYS),
         }
-        metadata = with_sweep_id(metadata)
-        measurements.append(
-            parse_dataset(lsv_measurement, metadata),
-        )
-
-    return flatten_measurements(
-        measurements,
-    )
+        if select is not None and not select(metadata):
+            continue
+        metas.append(with_sweep_id(metadata))
+        xs = lsv_measurement.get("XAxisDataArray", {})
+        ys = lsv_measurement.get("YAxisDataArray", {})
+        voltage = xs.get("DataValues", [])
+        if len(voltage) < 1:
+            raise IndexError("LSV curve has no points")
+        channels.append({"voltage": voltage, "current": ys.get("DataValues", [])})
+    if not metas:
+        return None
+    # fail on this measurement now rather than when deriving the table
+    must_get(metas[0], "scan_rate")
+
+    return order_channels(Block(metas, channels), SORT_KEYS)
+
+
+def derive_lsv(columns, lengths, metas):
+    scan_rates = np.repeat([must_get(m, "scan_rate") for m in metas], lengths)
+    voltage, current = columns.pop("voltage"), columns.pop("current")
+    charge = curve_charge(voltage, current, lengths, scan_rates)
+    return {"voltage": voltage, "current": current, "charge": charge, **columns}
+
+
+def summarize_lsv(df, lengths):
+    """One row per curve: metadata, anodic/cathodic peaks, potential and
+    current at both ends of the sweep and total charge.
+
+    `df` is the assembled table, before sorting, and `lengths` its rows
+    per curve.
+    """
+    lengths = lengths[lengths > 0]
+    voltage = df["voltage"].to_numpy()
+    current = df["current"].to_numpy()
+    first = segment_starts(lengths)
+    last = first + lengths - 1
+
+    ipa, ipa_at = segmented_argext(current, lengths, np.fmax)
+    ipc, ipc_at = segmented_argext(current, lengths, np.fmin)
+
+    summary = segment_metadata(df, lengths, POINT_COLUMNS)
+    summary["n_points"] = lengths
+    summary["ipa"] = ipa
+    summary["epa"] = take_or_nan(voltage, ipa_at)
+    summary["ipc"] = ipc
+    summary["epc"] = take_or_nan(voltage, ipc_at)
+    summary["e_start"] = voltage[first]
+    summary["i_start"] = current[first]
+    summary["e_stop"] = voltage[last]
+    summary["i_stop"] = current[last]
+    summary["charge"] = df["charge"].to_numpy()[last]
+    return summary
+
+
+def parse_lsv(measurement, method_info=None, status=False):
+    block = plan_lsv(measurement, method_info)
+    return assemble_blocks([block], derive_lsv, status=status)
@@ -1,48 +1,53 @@
-from typing import Callable
+from __future__ import annotations
+
+import threading
+from importlib import import_module
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 from .common import (
-    ticks_to_date,
     method_to_dict,
-    pick_keys,
     parse_common,
-    METHOD_ID,
+    select_method,
+)
+from .techniques import (
+    CV_INFO_KEYS,
+    CV_METHOD_ID,
+    CV_METHOD_KEYS,
+    CV_SORT_KEYS,
+    EIS_INFO_KEYS,
+    EIS_METHOD_ID,
+    EIS_METHOD_KEYS,
+    EIS_SORT_KEYS,
+    LSV_INFO_KEYS,
+    LSV_METHOD_ID,
+    LSV_METHOD_KEYS,
+    LSV_SORT_KEYS,
+    parse_cv_ch_title,
+    parse_eis_ch_title,
+    parse_lsv_ch_title,
 )
 
+if TYPE_CHECKING:
+    from .extract import Block, Derive
 
-from .eis import (
-    METHOD_ID as EIS_METHOD_ID,
-    parse_eis,
-    METHOD_KEYS as EIS_METHOD_KEYS,
-    INFO_KEYS as EIS_INFO_KEYS,
-    SORT_KEYS as EIS_SORT_KEYS,
-)
-from .cv import (
-    METHOD_ID as CV_METHOD_ID,
-    parse_cv,
-    METHOD_KEYS as CV_METHOD_KEYS,
-    INFO_KEYS as CV_INFO_KEYS,
-    SORT_KEYS as CV_SORT_KEYS,
-)
-from .lsv import (
-    METHOD_ID as LSV_METHOD_ID,
-    parse_lsv,
-    METHOD_KEYS as LSV_METHOD_KEYS,
-    INFO_KEYS as LSV_INFO_KEYS,
-    SORT_KEYS as LSV_SORT_KEYS,
-)
 
+class TechniqueFunction:
+    """`name` of the technique module `module`, imported on first call.
 
-def parse_method(text, select_keys=None, match_method_id=None):
-    m_dict = method_to_dict(text)
-    if match_method_id and m_dict.get(METHOD_ID, "").lower() != match_method_id.lower():
-        return None
+    Technique modules build tables with numpy and pandas; the registry only
+    refers to them, so indexing sessions and reading Method blocks import
+    neither. Picklable, as parsers are sent to worker processes.
+    """
 
-    out = m_dict
-    if select_keys is not None:
-        out = pick_keys(m_dict, select_keys)
+    def __init__(self, module: str, name: str):
+        self.module = module
+        self.name = name
 
-    out[METHOD_ID] = m_dict.get(METHOD_ID, "").lower()
+    def __repr__(self):
+        return f"{self.module}.{self.name}"
 
-    return out
+    def __call__(self, *args, **kwargs):
+        func = getattr(import_module(f".{self.module}", __package__), self.name)
+        return func(*args, **kwargs)
 
 
 class BaseParser:
@@ -53,31 +58,53 @@ class BaseParser:
         sort_keys: list = [],
         method_keys: list = [],
         info_keys: list = [],
+        plan: Optional[Callable[..., Block]] = None,
+        derive: Optional[Derive] = None,
+        summarize: Optional[Callable] = None,
+        channel_title: Optional[Callable[[str], dict]] = None,
     ):
         self.mid = method_id
         self.parse = parse
-        self.sort_keys = sort_keys
-        self.method_keys = method_keys
-        self.info_keys = info_keys
+        # copies, so parsers never share (or alias the defaults of) these lists
+        self.sort_keys = list(sort_keys)
+        self.method_keys = list(method_keys)
+        self.info_keys = list(info_keys)
+        # `plan` describes a measurement as a `Block` without extracting its
+        # points, so a table is extracted in one pass; `derive` then adds the
+        # technique's computed columns. `parse` builds one measurement alone.
+        self.plan = plan
+        self.derive = derive
+        # summarize(df, lengths) -> one row per channel, from the assembled
+        # table before sorting; kept as the technique's summary table
+        self.summarize = summarize
+        # channel_title(title) -> {"channel": n, ...} from a channel's title
+        self.channel_title = channel_title
 
     def __repr__(self):
         return self.mid.upper()
 
-    def parse_method(self, text: str, info: bool = False, data: bool = False):
+    def select_method(self, method: dict, info: bool = False, data: bool = False):
         select_keys = None
         if info:
             select_keys = self.info_keys
         if data:
             select_keys = self.method_keys
 
-        return parse_method(
-            text,
+        return select_method(
+            method,
             select_keys=select_keys,
             match_method_id=self.mid,
         )
 
-    def parse_info(self, m: dict):
-        method_params = self.parse_method(m.get("Method", ""), info=True)
+    def parse_method(self, text: str, info: bool = False, data: bool = False):
+        return self.select_method(method_to_dict(text), info=info, data=data)
+
+    # `method` is the measurement's parsed Method block, when the caller
+    # already has it; otherwise it is parsed from the measurement.
+    def parse_info(self, m: dict, method: Optional[dict] = None):
+        if method is None:
+            method = method_to_dict(m.get("Method", ""))
+        method_params = self.select_method(method, info=True)
         if method_params is None:
             return None
 
@@ -86,33 +113,86 @@ class BaseParser:
             **method_params,
         }
 
-    def parse_data(self, m: dict):
-        method_params = self.parse_method(m.get("Method", ""), data=True)
+    def parse_data(self, m: dict, method: Optional[dict] = None, **kwargs):
+        if method is None:
+            method = method_to_dict(m.get("Method", ""))
+        method_params = self.select_method(method, data=True)
+        if method_params is None:
+            return None
+
+        return self.parse(m, method_info=method_params, **kwargs)
+
+    # `select(channel_metadata) -> bool` leaves channels out of the plan;
+    # the block is None when none is left
+    def plan_data(
+        self,
+        m: dict,
+        method: Optional[dict] = None,
+        select: Optional[Callable[[dict], bool]] = None,
+    ) -> Optional[Block]:
+        if method is None:
+            method = method_to_dict(m.get("Method", ""))
+        method_params = self.select_method(method, data=True)
         if method_params is None:
             return None
 
-        return self.parse(m, method_info=method_params)
+        if select is None:
+            return self.plan(m, method_info=method_params)
+        return self.plan(m, method_info=method_params, select=select)
+
+
+# Parsers by method id. Techniques registered here are picked up by
+# `Parsers.parse` from the same single classification pass.
+PARSERS: Dict[str, BaseParser] = {}
+_REGISTRY_LOCK = threading.Lock()
 
 
-eisParser = BaseParser(
-    method_id=EIS_METHOD_ID,
-    parse=parse_eis,
-    sort_keys=EIS_SORT_KEYS,
-    method_keys=EIS_METHOD_KEYS,
-    info_keys=EIS_INFO_KEYS,
+def register_parser(parser: BaseParser) -> BaseParser:
+    with _REGISTRY_LOCK:
+        PARSERS[parser.mid] = parser
+    return parser
+
+
+def registered_parsers() -> List[Tuple[str, BaseParser]]:
+    """A snapshot of `PARSERS`, safe to iterate while others register."""
+    with _REGISTRY_LOCK:
+        return list(PARSERS.items())
+
+
+eisParser = register_parser(
+    BaseParser(
+        method_id=EIS_METHOD_ID,
+        parse=TechniqueFunction("eis", "parse_eis"),
+        sort_keys=EIS_SORT_KEYS,
+        method_keys=EIS_METHOD_KEYS,
+        info_keys=EIS_INFO_KEYS,
+        plan=TechniqueFunction("eis", "plan_eis"),
+        channel_title=parse_eis_ch_title,
+    )
 )
-lsvParser = BaseParser(
-    method_id=LSV_METHOD_ID,
-    parse=parse_lsv,
-    sort_keys=LSV_SORT_KEYS,
-    method_keys=LSV_METHOD_KEYS,
-    info_keys=LSV_INFO_KEYS,
+lsvParser = register_parser(
+    BaseParser(
+        method_id=LSV_METHOD_ID,
+        parse=TechniqueFunction("lsv", "parse_lsv"),
+        sort_keys=LSV_SORT_KEYS,
+        method_keys=LSV_METHOD_KEYS,
+        info_keys=LSV_INFO_KEYS,
+        plan=TechniqueFunction("lsv", "plan_lsv"),
+        derive=TechniqueFunction("lsv", "derive_lsv"),
+        summarize=TechniqueFunction("lsv", "summarize_lsv"),
+        channel_title=parse_lsv_ch_title,
+    )
 )
-
-cvParser = BaseParser(
-    method_id=CV_METHOD_ID,
-    parse=parse_cv,
-    sort_keys=CV_SORT_KEYS,
-    method_keys=CV_METHOD_KEYS,
-    info_keys=CV_INFO_KEYS,
+cvParser = register_parser(
+    BaseParser(
+        method_id=CV_METHOD_ID,
+        parse=TechniqueFunction("cv", "parse_cv"),
+        sort_keys=CV_SORT_KEYS,
+        method_keys=CV_METHOD_KEYS,
+        info_keys=CV_INFO_KEYS,
+        plan=TechniqueFunction("cv", "plan_cv"),
+        derive=TechniqueFunction("cv", "derive_cv"),
+        summarize=TechniqueFunction("cv", "summarize_cv"),
+        channel_title=parse_cv_ch_title,
+    )
 )
@@ -0,0 +1,86 @@
+"""Segmented NumPy kernels over tables of curves stored back to back.
+
+A table holds many curves one after the other; `lengths` gives the points
+per curve. The kernels here work on the whole table in a few passes and
+give bit-identical results to running the same operation curve by curve.
+"""
+
+import numpy as np
+
+
+def segment_starts(lengths):
+    return np.cumsum(lengths) - lengths
+
+
+def segmented_cumsum(x, lengths, skipna=True):
+    """Cumulative sum restarting at every segment.
+
+    With `skipna` NaN is skipped like pandas' `cumsum`, otherwise it
+    propagates like `np.cumsum`. Segments of equal length are summed
+    together as rows of a 2D array, which adds in the same order as
+    `np.cumsum` over each segment alone.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    nan = np.isnan(x) if skipna else np.zeros(len(x), dtype=bool)
+    x = np.where(nan, 0.0, x)
+    out = np.empty_like(x)
+    starts = segment_starts(lengths)
+    for n in np.unique(lengths):
+        if n == 0:
+            continue
+        idx = starts[lengths == n][:, None] + np.arange(n)
+        out[idx] = np.cumsum(x[idx], axis=1)
+    out[nan] = np.nan
+    return out
+
+
+def segmented_extrema(x, codes):
+    """Per-row min and max of `x` over the rows sharing its integer code.
+
+    NaN is skipped, as in pandas `groupby(...).transform("min")`; a group
+    of only NaN gives NaN.
+    """
+    order = np.argsort(codes, kind="stable")
+    ordered = codes[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    values = x[order]
+
+    size = int(codes.max()) + 1 if len(codes) else 0
+    lo = np.full(size, np.nan)
+    hi = np.full(size, np.nan)
+    if len(values):
+        lo[ordered[starts]] = np.fmin.reduceat(values, starts)
+        hi[ordered[starts]] = np.fmax.reduceat(values, starts)
+    return lo[codes], hi[codes]
+
+
+def segmented_reduce(x, lengths, ufunc):
+    """`ufunc.reduceat` over each segment; segments must not be empty."""
+    return ufunc.reduceat(x, segment_starts(lengths)) if len(x) else x[:0]
+
+
+def segmented_first(mask, lengths):
+    """Row of the first True of `mask` in each segment, -1 if there is none."""
+    n = len(mask)
+    pos = np.where(mask, np.arange(n), n)
+    first = segmented_reduce(pos, lengths, np.minimum)
+    return np.where(first < n, first, -1)
+
+
+def segmented_last(mask, lengths):
+    """Row of the last True of `mask` in each segment, -1 if there is none."""
+    pos = np.where(mask, np.arange(len(mask)), -1)
+    return segmented_reduce(pos, lengths, np.maximum)
+
+
+def take_or_nan(x, rows):
+    """`x[rows]`, NaN where `rows` is -1."""
+    return np.where(rows >= 0, x[np.maximum(rows, 0)], np.nan)
+
+
+def segmented_argext(x, lengths, ufunc):
+    """Extreme of each segment (`np.fmax`/`np.fmin`, NaN skipped) and the
+    row it first occurs at, -1 for an all-NaN segment."""
+    ext = segmented_reduce(x, lengths, ufunc)
+    rows = segmented_first(x == np.repeat(ext, lengths), lengths)
+    return ext, rows
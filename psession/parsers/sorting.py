@@ -0,0 +1,123 @@
+"""Stable sorts of assembled tables.
+
+Technique tables are sorted by their parser's sort keys once assembled;
+these sorts take advantage of the runs already in order (one per channel,
+or one per cached table when merging an increment).
+"""
+
+import numpy as np
+import pandas as pd
+
+from .common import SORT_KEYS
+
+
+def sort_rows(df, sort_keys=SORT_KEYS):
+    # stable, so re-sorting concatenated sorted chunks reproduces one sort
+    if sort_keys:
+        keys = [c for c in sort_keys if c in df.columns]
+        if keys:
+            df = df.sort_values(keys, kind="mergesort").reset_index(drop=True)
+    return df
+
+
+def segment_order(df, sort_keys, lengths):
+    """Row order of a stable sort of `df` by `sort_keys`, found per segment.
+
+    `df` is made of consecutive segments of `lengths` rows (e.g. channels),
+    each already in order. When the keys are constant within every segment,
+    the sort is a stable sort of the segments, i.e. a merge of sorted runs,
+    and costs one comparison pass over the rows. Returns None when the rows
+    are already in order, and raises `LookupError` when a key varies within
+    a segment.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    if int(lengths.sum()) != len(df):
+        raise LookupError("Segments do not cover the table")
+    lengths = lengths[lengths > 0]
+    starts = np.cumsum(lengths) - lengths
+
+    firsts = {}
+    for k in sort_keys:
+        col = df[k]
+        first = col.iloc[starts]
+        values = col.to_numpy()
+        expected = np.repeat(first.to_numpy(), lengths)
+        same = (values == expected) | (pd.isna(values) & pd.isna(expected))
+        if not same.all():
+            raise LookupError(f"Sort key {k!r} varies within a segment")
+        firsts[k] = first.reset_index(drop=True)
+
+    keys = pd.DataFrame(firsts)
+    order = keys.sort_values(list(sort_keys), kind="mergesort").index.to_numpy()
+    if (order == np.arange(len(order))).all():
+        return None
+    moved = lengths[order]
+    offsets = starts[order] - (np.cumsum(moved) - moved)
+    return np.repeat(offsets, moved) + np.arange(len(df))
+
+
+def _row_order(df, sort_keys):
+    keys = df[sort_keys].reset_index(drop=True)
+    return keys.sort_values(sort_keys, kind="mergesort").index.to_numpy()
+
+
+def sort_table(df, sort_keys, lengths=None):
+    """Stable sort of `df` by `sort_keys`, reordering one column at a time.
+
+    Unlike `sort_values`, peak memory grows by one column rather than by a
+    second copy of the table. With segment `lengths` (see `segment_order`)
+    presorted runs are merged instead of sorting every row, and a table
+    already in order is left as is. `df` is modified and returned.
+    """
+    # a repeated key adds nothing to the order, but would select its column
+    # twice
+    sort_keys = list(dict.fromkeys(sort_keys))
+    if not sort_keys:
+        return df
+    missing = [k for k in sort_keys if k not in df.columns]
+    if missing:
+        raise KeyError(missing)
+
+    try:
+        if lengths is None:
+            order = _row_order(df, sort_keys)
+        else:
+            order = segment_order(df, sort_keys, lengths)
+    except LookupError:
+        order = _row_order(df, sort_keys)
+
+    if order is not None:
+        for c in df.columns:
+            df[c] = df[c].array.take(order)
+    df.index = pd.RangeIndex(len(df))
+    return df
+
+
+def runs_in_order(df, sort_keys, lengths):
+    """Whether back to back runs of `lengths` rows, each sorted by
+    `sort_keys`, are in order as a whole: no run starts before the one
+    before it ends. Missing key values count as out of order."""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    for end in np.cumsum(lengths[lengths > 0])[:-1]:
+        for k in sort_keys:
+            last, first = df[k].iloc[end - 1], df[k].iloc[end]
+            if pd.isna(last) or pd.isna(first) or first < last:
+                return False
+            if last < first:
+                break
+    return True
+
+
+def concat_sorted(frames, sort_keys):
+    """Stable sort of `frames`, each sorted by `sort_keys`, one after the
+    other; frames that already follow each other are only concatenated."""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    keys = [k for k in sort_keys if k in df.columns]
+    if runs_in_order(df, keys, [len(f) for f in frames]):
+        return df
+    return sort_table(df, keys)
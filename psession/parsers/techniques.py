@@ -0,0 +1,94 @@
+"""What the sidecar index and `info` need to know of each technique.
+
+Method ids, the Method keys kept as table columns and as `info()` fields,
+sort keys and the channel title parsers, kept apart from the technique
+modules (`eis`, `cv`, `lsv`) that build tables with numpy and pandas, so
+indexing a session and listing its measurements import neither. The
+technique modules re-export theirs without the prefix (`eis.METHOD_ID`,
+`cv.SORT_KEYS`, ...), where they were defined before.
+"""
+
+import re
+from typing import List
+
+EIS_METHOD_ID = "eis"
+EIS_SORT_KEYS = ["date", "channel"]
+EIS_METHOD_KEYS = ["method_id", "min_freq", "max_freq", "n_freq"]
+EIS_INFO_KEYS: List[str] = []
+
+
+# parse title in the form "CH 1: 13 freqs"
+def parse_eis_ch_title(
+    title,
+):
+    try:
+        assert len(title) > 0, "EIS channel title is empty"
+
+        regex = r"CH (\d+): (\d+) freqs.*"
+        match = re.match(regex, title)
+        assert match, f"Could not parse EIS channel title: {title}"
+        channel = int(match.group(1))
+        assert channel > 0, f"Invalid channel number in title: {title}"
+
+        return {
+            "channel": channel,
+        }
+    except Exception as e:
+        raise RuntimeError(e)
+
+
+CV_METHOD_ID = "cv"
+CV_SORT_KEYS = ["date", "channel", "cycle"]
+CV_METHOD_KEYS = [
+    "method_id",
+    "e_begin",
+    "e_end",
+    "e_step",
+    "e_vtx1",
+    "e_vtx2",
+    "scan_rate",
+    "n_scans",
+]
+CV_INFO_KEYS = ["e_vtx1", "e_vtx2", "scan_rate", "n_scans"]
+
+cycle_regex = re.compile(r"Scan (\d+)")
+channel_regex = re.compile(r"Channel (\d+)")
+
+
+def parse_cv_ch_title(title):
+    data = {}
+    try:
+        assert len(title) > 0, "CV channel title is empty"
+        match = cycle_regex.search(title)
+        cycle = int(match.group(1))
+        data["cycle"] = cycle
+
+        match = channel_regex.search(title)
+        channel = int(match.group(1))
+        data["channel"] = channel
+
+        return data
+
+    except Exception:
+        return data
+
+
+LSV_METHOD_ID = "lsv"
+LSV_SORT_KEYS = ["date", "channel"]
+LSV_METHOD_KEYS = ["method_id", "e_begin", "e_end", "e_step", "scan_rate", "n_scans"]
+LSV_INFO_KEYS = ["e_begin", "e_end"]
+
+
+# parse title in the form "LSV i vs E Channel 1"
+def parse_lsv_ch_title(title):
+    try:
+        assert len(title) > 0, "LSV channel title is empty"
+
+        regex = r"LSV i vs E Channel (\d+)"
+        match = re.match(regex, title)
+        assert match, f"Could not parse EIS channel title: {title}"
+        channel = int(match.group(1))
+
+        return {"channel": channel}
+    except Exception:
+        return {}
@@ -0,0 +1,184 @@
+"""Per-stage timings of the parsing pipeline.
+
+The pipeline wraps each stage (decode, JSON load, Method parsing, table
+build per technique, enrichment, summary, sort, cache reads and writes) in
+`span(name, **labels)`. Spans cost next to nothing unless something
+listens:
+
+- `profile()` collects the spans of a block of code into a `Profiler`,
+  optionally with peak memory from tracemalloc, and formats them as a
+  table or JSON (the CLI's `--profile`).
+- `add_callback(fn)` calls `fn(span)` for every finished span, e.g. to
+  forward them to a tracing system.
+
+A span records wall time and, where the stage knows them, rows produced,
+bytes read or written and whether a cache lookup hit.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+# set on cache lookups
+HIT, MISS = "hit", "miss"
+
+
+@dataclass
+class Span:
+    name: str
+    labels: Dict[str, object] = field(default_factory=dict)
+    seconds: float = 0.0
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    # growth of traced memory over the span, when a profiler traces memory
+    peak_bytes: Optional[int] = None
+    cache: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return " ".join(f"{k}={v}" for k, v in self.labels.items())
+
+
+class Profiler:
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.spans: List[Span] = []
+
+    def cache_counts(self) -> Dict[str, int]:
+        counts = {HIT: 0, MISS: 0}
+        for s in self.spans:
+            if s.cache in counts:
+                counts[s.cache] += 1
+        return counts
+
+    def to_dict(self) -> dict:
+        return {
+            "spans": [asdict(s) for s in self.spans],
+            "cache": self.cache_counts(),
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent, default=str)
+
+    def format_table(self) -> str:
+        header = ("stage", "labels", "seconds", "rows", "bytes", "peak_mb", "cache")
+        rows = [header]
+        for s in self.spans:
+            rows.append(
+                (
+                    s.name,
+                    s.label,
+                    f"{s.seconds:.4f}",
+                    "" if s.rows is None else str(s.rows),
+                    "" if s.bytes is None else str(s.bytes),
+                    "" if s.peak_bytes is None else f"{s.peak_bytes / 1e6:.2f}",
+                    s.cache or "",
+                )
+            )
+        widths = [max(len(r[i]) for r in rows) for i in range(len(header))]
+        lines = ["  ".join(v.ljust(w) for v, w in zip(r, widths)) for r in rows]
+        counts = self.cache_counts()
+        lines.append(f"cache: {counts[HIT]} hits, {counts[MISS]} misses")
+        return "\n".join(line.rstrip() for line in lines)
+
+
+_lock = threading.Lock()
+_profilers: List[Profiler] = []
+_callbacks: List[Callable[[Span], None]] = []
+# memory watermarks of the open spans, innermost last (see `span`)
+_local = threading.local()
+
+
+def add_callback(fn: Callable[[Span], None]):
+    with _lock:
+        _callbacks.append(fn)
+
+
+def remove_callback(fn: Callable[[Span], None]):
+    with _lock:
+        if fn in _callbacks:
+            _callbacks.remove(fn)
+
+
+def enabled() -> bool:
+    return bool(_profilers or _callbacks)
+
+
+@contextmanager
+def profile(memory: bool = False) -> Iterator[Profiler]:
+    """Collect the spans finished inside the block.
+
+    With `memory`, tracemalloc runs for the block (slowing it down) and
+    every span gets its peak memory growth.
+
+    Spans are not isolated per block: those other threads finish meanwhile
+    are collected too, and spans of worker processes (`parse_many` with
+    `workers`, the CLI's `-j`) are not collected at all.
+    """
+    profiler = Profiler(memory=memory)
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    with _lock:
+        _profilers.append(profiler)
+    try:
+        yield profiler
+    finally:
+        with _lock:
+            _profilers.remove(profiler)
+        if started:
+            tracemalloc.stop()
+
+
+def _memory_stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def span(name: str, **labels) -> Iterator[Span]:
+    """Time the block as stage `name`; the caller may fill in the yielded
+    span's `rows`, `bytes` and `cache`."""
+    s = Span(name, labels)
+    if not enabled():
+        yield s
+        return
+
+    tracing = tracemalloc.is_tracing()
+    stack = _memory_stack()
+    if tracing:
+        # nested spans reset the peak, so parents keep the highest one seen
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        stack.append([current, current])
+
+    t0 = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.seconds = time.perf_counter() - t0
+        if tracing:
+            start, seen = stack.pop()
+            peak = max(seen, tracemalloc.get_traced_memory()[1])
+            s.peak_bytes = peak - start
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+        _emit(s)
+
+
+def _emit(s: Span):
+    with _lock:
+        profilers, callbacks = list(_profilers), list(_callbacks)
+    for p in profilers:
+        p.spans.append(s)
+    for fn in callbacks:
+        fn(s)
@@ -0,0 +1,80 @@
+"""Which measurements and channels of a session to parse.
+
+A `Selection` is checked before any points are read: measurements outside
+the time range or not matching the title/device patterns are dropped before
+their Method block is parsed, and unselected channels of the remaining ones
+are left out of the `Block` their technique plans, so their DataValues are
+never extracted.
+
+Values are the session's own: `channel` is the number in the channel title
+(before enrichments such as the +16 offset of bottom blocks), the time range
+applies to the measurement `TimeStamp`, a naive local time that bounds with
+a UTC offset are converted to, and `device` is the one
+`parsers.common.parse_title` reads from the title.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Collection, Optional, Union
+
+from .parsers.common import parse_common, parse_title
+
+When = Union[datetime, str, None]
+
+
+def as_datetime(value: When) -> Optional[datetime]:
+    """`value`, an ISO string or datetime, as a naive local datetime."""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        # TimeStamps are naive local times
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+@dataclass
+class Selection:
+    channels: Optional[Collection[int]] = None
+    # TimeStamp range, `since` included and `until` excluded
+    since: When = None
+    until: When = None
+    # regular expressions searched in the title and the device name
+    title: Optional[str] = None
+    device: Optional[str] = None
+
+    def __post_init__(self):
+        self.since = as_datetime(self.since)
+        self.until = as_datetime(self.until)
+        if self.channels is not None:
+            self.channels = frozenset(int(c) for c in self.channels)
+
+    def __bool__(self) -> bool:
+        return any(
+            v is not None
+            for v in (self.channels, self.since, self.until, self.title, self.device)
+        )
+
+    def keep_measurement(self, measurement: dict) -> bool:
+        if not (self.since or self.until or self.title or self.device):
+            return True
+        common = parse_common(measurement)
+        if self.since is not None and common["date"] < self.since:
+            return False
+        if self.until is not None and common["date"] >= self.until:
+            return False
+        if self.title is not None and not re.search(self.title, common["title"]):
+            return False
+        if self.device is not None:
+            device = parse_title(common).get("device", "")
+            if not re.search(self.device, device):
+                return False
+        return True
+
+    def keep_channel(self, metadata: dict) -> bool:
+        """Whether a channel, given its planned metadata, is selected."""
+        return self.channels is None or metadata.get("channel") in self.channels
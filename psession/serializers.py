@@ -0,0 +1,216 @@
+"""Table serializers used by the technique cache.
+
+Every serializer writes a DataFrame to a single file and reads it back,
+optionally restricted to a subset of columns. `npz` is the default: it only
+needs numpy and restores dtypes and `attrs` exactly, so a cache hit returns
+the same frame as a cold parse. `parquet` and `feather` need pyarrow; `csv` is kept
+for tables meant to be opened by other tools.
+
+numpy and pandas are imported when a table is written or read, so listing
+the formats (as the CLI does on every start) imports neither.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence
+
+from .cache import temp_path
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+NPZ_META_KEY = "__meta__"
+NPZ_ATTRS_KEY = "__attrs__"
+
+
+class Serializer:
+    def __init__(
+        self,
+        name: str,
+        suffix: str,
+        write: Callable,
+        read: Callable,
+        requires: Optional[str] = None,
+    ):
+        self.name = name
+        self.suffix = suffix
+        self._write = write
+        self._read = read
+        self.requires = requires
+
+    def __repr__(self):
+        return self.name
+
+    def available(self) -> bool:
+        if self.requires is None:
+            return True
+        try:
+            __import__(self.requires)
+        except ImportError:
+            return False
+        return True
+
+    def write(self, df: pd.DataFrame, fp: str):
+        # write next to the target and swap, so readers never see half a file
+        tmp = temp_path(fp)
+        self._write(df, tmp)
+        os.replace(tmp, fp)
+
+    def read(self, fp: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        return self._read(fp, columns)
+
+
+def _is_str_column(col: pd.Series) -> bool:
+    import pandas as pd
+
+    if isinstance(col.dtype, pd.StringDtype):
+        return True
+    if col.dtype != object:
+        return False
+    return all(isinstance(v, str) for v in col.dropna())
+
+
+def _encode_column(col: pd.Series, key: str, arrays: dict) -> dict:
+    import numpy as np
+    import pandas as pd
+
+    dtype = col.dtype
+    meta = {"name": col.name, "dtype": str(dtype)}
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        meta["kind"] = "category"
+        meta["ordered"] = bool(dtype.ordered)
+        arrays[key] = col.cat.codes.to_numpy()
+        meta["categories"] = _encode_column(
+            pd.Series(dtype.categories, name=None), key + "_cat", arrays
+        )
+    elif isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        meta["kind"] = "values"
+        arrays[key] = col.to_numpy()
+    elif _is_str_column(col):
+        # metadata strings repeat on every row, so store them dictionary-encoded
+        meta["kind"] = "str"
+        codes, uniques = pd.factorize(col)
+        arrays[key] = codes.astype(np.int32)
+        arrays[key + "_uniques"] = np.asarray(list(uniques), dtype=str)
+    else:
+        raise TypeError(f"Cannot serialize column {col.name!r} of dtype {dtype}")
+
+    return meta
+
+
+def _decode_column(meta: dict, key: str, data) -> pd.Series:
+    import numpy as np
+    import pandas as pd
+
+    kind = meta["kind"]
+    if kind == "values":
+        return pd.Series(data[key], name=meta["name"])
+    if kind == "str":
+        codes = data[key]
+        uniques = np.append(data[key + "_uniques"].astype(object), np.nan)
+        values = uniques[codes]  # code -1 (missing) picks the trailing NaN
+        return pd.Series(values, name=meta["name"], dtype=meta["dtype"])
+    if kind == "category":
+        categories = _decode_column(meta["categories"], key + "_cat", data)
+        values = pd.Categorical.from_codes(
+            data[key], categories=categories, ordered=meta["ordered"]
+        )
+        return pd.Series(values, name=meta["name"])
+    raise ValueError(f"Unknown column kind {kind!r}")
+
+
+def write_npz(df: pd.DataFrame, fp: str):
+    import numpy as np
+
+    arrays: Dict[str, np.ndarray] = {}
+    meta = [
+        _encode_column(df.iloc[:, i], f"c{i}", arrays) for i in range(df.shape[1])
+    ]
+    arrays[NPZ_META_KEY] = np.array(json.dumps(meta))
+    if df.attrs:
+        arrays[NPZ_ATTRS_KEY] = np.array(json.dumps(df.attrs))
+    with open(fp, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def read_npz(fp: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    import numpy as np
+    import pandas as pd
+
+    # NpzFile loads members lazily, so unselected columns are never read
+    with np.load(fp, allow_pickle=False) as data:
+        meta = json.loads(str(data[NPZ_META_KEY]))
+        keys = {m["name"]: (f"c{i}", m) for i, m in enumerate(meta)}
+        names = list(columns) if columns is not None else [m["name"] for m in meta]
+        missing = [n for n in names if n not in keys]
+        if missing:
+            raise KeyError(f"Columns not in cache: {missing}")
+        series = [_decode_column(keys[n][1], keys[n][0], data) for n in names]
+        attrs = json.loads(str(data[NPZ_ATTRS_KEY])) if NPZ_ATTRS_KEY in data else {}
+
+    df = pd.concat(series, axis=1) if series else pd.DataFrame()
+    df.attrs.update(attrs)
+    return df
+
+
+def write_csv(df: pd.DataFrame, fp: str):
+    df.to_csv(fp, index=False)
+
+
+def read_csv(fp: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    import pandas as pd
+
+    return pd.read_csv(fp, usecols=columns)
+
+
+def write_parquet(df: pd.DataFrame, fp: str):
+    df.to_parquet(fp, index=False)
+
+
+def read_parquet(fp: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    import pandas as pd
+
+    return pd.read_parquet(fp, columns=None if columns is None else list(columns))
+
+
+def write_feather(df: pd.DataFrame, fp: str):
+    df.reset_index(drop=True).to_feather(fp)
+
+
+def read_feather(fp: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    import pandas as pd
+
+    return pd.read_feather(fp, columns=None if columns is None else list(columns))
+
+
+npzSerializer = Serializer("npz", "npz", write_npz, read_npz)
+csvSerializer = Serializer("csv", "csv", write_csv, read_csv)
+parquetSerializer = Serializer(
+    "parquet", "parquet", write_parquet, read_parquet, requires="pyarrow"
+)
+featherSerializer = Serializer(
+    "feather", "feather", write_feather, read_feather, requires="pyarrow"
+)
+
+SERIALIZERS = {
+    s.name: s
+    for s in (npzSerializer, csvSerializer, parquetSerializer, featherSerializer)
+}
+DEFAULT_SERIALIZER = npzSerializer.name
+
+
+def get_serializer(name: Optional[str] = None) -> Serializer:
+    name = (name or DEFAULT_SERIALIZER).lower()
+    if name not in SERIALIZERS:
+        raise ValueError(
+            f"Unknown cache format {name!r}, expected one of {sorted(SERIALIZERS)}"
+        )
+    serializer = SERIALIZERS[name]
+    if not serializer.available():
+        raise ImportError(
+            f"Cache format {name!r} requires the '{serializer.requires}' package"
+        )
+    return serializer
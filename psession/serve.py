@@ -0,0 +1,417 @@
+"""Long-lived server of parsed sessions.
+
+Parsing a session, even from the table cache, means starting Python,
+importing pandas and reading every table back. `Server` pays that once:
+it keeps the `Measurements` it parsed in memory, least recently used first
+out once their tables exceed `memory` bytes, and answers local requests
+over HTTP on a localhost port or a unix socket (see `psession.client`).
+
+A session is parsed again when its size or mtime changed since it was
+cached; `parse` then only parses the measurements PSTrace appended. Each
+combination of `methods` and selection is cached on its own, as `parse`
+would return it.
+
+Endpoints, all `GET` with the session as `path`:
+
+- `/info`: what `info` returns, as JSON.
+- `/tables`: rows and columns of each table, as JSON.
+- `/table?table=eis&format=npz`: one table, as a serializer's file
+  (`npz`, `csv`, and `parquet`/`feather` when pyarrow is installed) or as
+  `json` records, restricted to `columns` if given.
+- `/stats`: cache counters and the sessions held.
+
+`/tables` and `/table` also take `methods` and the `Selection` fields
+(`channels`, `since`, `until`, `title`, `device`); lists are comma
+separated.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .cache import config_key
+from .client import DEFAULT_ADDRESS, parse_address
+from .parse import info, parse
+from .selection import Selection
+from .serializers import get_serializer
+from .watch import Signature, signature
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .measurements import Measurements
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MEMORY = 1 << 30
+
+
+def measurements_bytes(measurements: Measurements) -> int:
+    """Memory held by the loaded tables, strings included."""
+    return sum(
+        int(measurements.table(k).memory_usage(index=True, deep=True).sum())
+        for k in measurements.keys()
+    )
+
+
+@dataclass
+class CachedSession:
+    measurements: Measurements
+    signature: Signature
+    nbytes: int
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # cached sessions parsed again as their file changed
+    invalidations: int = 0
+    evictions: int = 0
+    parse_seconds: float = 0.0
+
+
+class SessionCache:
+    def __init__(
+        self, memory: int = DEFAULT_MEMORY, parse_kwargs: Optional[dict] = None
+    ):
+        """Keep parsed sessions while their tables fit in `memory` bytes;
+        `parse_kwargs` go to every `parse` (enrichments, opts, ...)."""
+        self.memory = memory
+        self.parse_kwargs = parse_kwargs or {}
+        self.entries: "OrderedDict[tuple, CachedSession]" = OrderedDict()
+        self.nbytes = 0
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        # one parse per key at a time, the other requests wait for it
+        self._loading: Dict[tuple, threading.Lock] = {}
+
+    def _lookup(self, key: tuple, sig: Signature) -> Optional[Measurements]:
+        entry = self.entries.get(key)
+        if entry is None or entry.signature != sig:
+            return None
+        self.entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry.measurements
+
+    def get(
+        self,
+        file_path: str,
+        methods: Optional[List[str]] = None,
+        select: Optional[Selection] = None,
+    ) -> Measurements:
+        """`parse(file_path, methods=methods, select=select)` with every table
+        loaded, from memory while the file is unchanged."""
+        fp = os.path.abspath(file_path)
+        methods = sorted(m.lower() for m in methods) if methods else None
+        key = (fp, config_key(methods, select))
+        sig = signature(fp)
+        if sig is None:
+            raise FileNotFoundError(f"No such file: {fp}")
+
+        with self._lock:
+            found = self._lookup(key, sig)
+            if found is not None:
+                return found
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        with loading:
+            with self._lock:
+                found = self._lookup(key, sig)
+                if found is not None:
+                    return found
+            t0 = time.perf_counter()
+            measurements = parse(
+                fp, methods=methods, select=select, **self.parse_kwargs
+            )
+            measurements.load_all()
+            nbytes = measurements_bytes(measurements)
+            with self._lock:
+                self.stats.parse_seconds += time.perf_counter() - t0
+                if key in self.entries:
+                    self.stats.invalidations += 1
+                else:
+                    self.stats.misses += 1
+                # the signature from before parsing: a write meanwhile
+                # makes the next request parse again
+                self._put(key, CachedSession(measurements, sig, nbytes))
+        return measurements
+
+    def _put(self, key: tuple, entry: CachedSession):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self.entries[key] = entry
+        self.nbytes += entry.nbytes
+        # the newest goes last, and only when it alone is over the budget
+        while self.entries and self.nbytes > self.memory:
+            old_key, old = self.entries.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.stats.evictions += 1
+            lock = self._loading.get(old_key)
+            if lock is not None and not lock.locked():
+                del self._loading[old_key]
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            sessions = [
+                {
+                    "path": key[0],
+                    "key": key[1],
+                    "bytes": entry.nbytes,
+                    "tables": {
+                        k: len(entry.measurements.table(k))
+                        for k in entry.measurements.keys()
+                    },
+                }
+                for key, entry in self.entries.items()
+            ]
+            return {
+                **asdict(self.stats),
+                "memory": self.memory,
+                "bytes": self.nbytes,
+                "sessions": sessions,
+            }
+
+
+class RequestError(ValueError):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _one(query: dict, name: str, required: bool = False) -> Optional[str]:
+    values = query.get(name)
+    if not values:
+        if required:
+            raise RequestError(400, f"Missing parameter {name!r}")
+        return None
+    return values[-1]
+
+
+def _list(query: dict, name: str) -> Optional[List[str]]:
+    value = _one(query, name)
+    if value is None:
+        return None
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _selection(query: dict) -> Optional[Selection]:
+    channels = _list(query, "channels")
+    selection = Selection(
+        channels=None if channels is None else [int(c) for c in channels],
+        since=_one(query, "since"),
+        until=_one(query, "until"),
+        title=_one(query, "title"),
+        device=_one(query, "device"),
+    )
+    return selection or None
+
+
+def _json(obj) -> Tuple[str, bytes]:
+    def default(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        raise TypeError(f"Cannot encode {type(value).__name__}")
+
+    return "application/json", json.dumps(obj, default=default).encode("utf-8")
+
+
+def export_table(df: pd.DataFrame, fmt: str) -> bytes:
+    """`df` as the file the `fmt` serializer writes, or as JSON records."""
+    if fmt == "json":
+        return df.to_json(orient="records", date_format="iso").encode("utf-8")
+    serializer = get_serializer(fmt)
+    with tempfile.TemporaryDirectory() as tmp:
+        fp = os.path.join(tmp, f"table.{serializer.suffix}")
+        serializer.write(df, fp)
+        with open(fp, "rb") as f:
+            return f.read()
+
+
+class Server:
+    def __init__(
+        self,
+        address: str = DEFAULT_ADDRESS,
+        memory: int = DEFAULT_MEMORY,
+        root: Optional[str] = None,
+        parse_kwargs: Optional[dict] = None,
+    ):
+        """Serve the sessions under `root` (any readable path when None) at
+        `address`, keeping up to `memory` bytes of tables."""
+        self.cache = SessionCache(memory, parse_kwargs)
+        self.root = os.path.realpath(root) if root is not None else None
+        self.started = time.time()
+        self.requests = 0
+        self.routes: Dict[str, Callable[[dict], Tuple[str, bytes]]] = {
+            "/info": self.info,
+            "/tables": self.tables,
+            "/table": self.table,
+            "/stats": self.stats,
+        }
+        kind, target = parse_address(address)
+        if kind == "unix":
+            self.httpd = _UnixServer(target, _Handler)
+        else:
+            self.httpd = _TCPServer(target, _Handler)
+        self.httpd.app = self
+        self.kind = kind
+
+    @property
+    def address(self) -> str:
+        if self.kind == "unix":
+            return f"unix:{self.httpd.server_address}"
+        host, port = self.httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        """Stop `serve_forever`, from another thread."""
+        self.httpd.shutdown()
+
+    def close(self):
+        self.httpd.server_close()
+        if self.kind == "unix":
+            try:
+                os.unlink(self.httpd.server_address)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "Server":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def resolve(self, path: str) -> str:
+        if self.root is None:
+            return os.path.abspath(path)
+        fp = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, fp]) != self.root:
+            raise RequestError(403, f"{path} is outside {self.root}")
+        return fp
+
+    def measurements(self, query: dict) -> Measurements:
+        return self.cache.get(
+            self.resolve(_one(query, "path", required=True)),
+            methods=_list(query, "methods"),
+            select=_selection(query),
+        )
+
+    def info(self, query: dict) -> Tuple[str, bytes]:
+        # the sidecar index answers without building tables
+        return _json(info(self.resolve(_one(query, "path", required=True))))
+
+    def tables(self, query: dict) -> Tuple[str, bytes]:
+        measurements = self.measurements(query)
+        return _json(
+            {
+                k: {
+                    "rows": len(measurements.table(k)),
+                    "columns": list(measurements.table(k).columns),
+                }
+                for k in measurements.keys()
+            }
+        )
+
+    def table(self, query: dict) -> Tuple[str, bytes]:
+        measurements = self.measurements(query)
+        name = _one(query, "table", required=True).lower()
+        if name not in measurements.keys():
+            raise RequestError(
+                404, f"No table {name!r}, expected one of {measurements.keys()}"
+            )
+        df = measurements.table(name)
+        columns = _list(query, "columns")
+        if columns is not None:
+            missing = [c for c in columns if c not in df.columns]
+            if missing:
+                raise RequestError(400, f"No columns {missing} in {name!r}")
+            df = df[columns]
+        fmt = (_one(query, "format") or "npz").lower()
+        if fmt == "json":
+            return "application/json", export_table(df, fmt)
+        return "application/octet-stream", export_table(df, fmt)
+
+    def stats(self, query: dict) -> Tuple[str, bytes]:
+        return _json(
+            {
+                "address": self.address,
+                "uptime_seconds": time.time() - self.started,
+                "requests": self.requests,
+                **self.cache.to_dict(),
+            }
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "psession"
+    protocol_version = "HTTP/1.0"
+
+    def do_GET(self):
+        app: Server = self.server.app
+        url = urlsplit(self.path)
+        app.requests += 1
+        route = app.routes.get(url.path)
+        try:
+            if route is None:
+                raise RequestError(404, f"Unknown endpoint {url.path}")
+            content_type, body = route(parse_qs(url.query))
+            status = 200
+        except RequestError as e:
+            status, error = e.status, str(e)
+        except FileNotFoundError as e:
+            status, error = 404, str(e)
+        except (ValueError, KeyError, ImportError) as e:
+            status, error = 400, f"{type(e).__name__}: {e}"
+        except Exception as e:
+            log.exception("Failed to answer %s", self.path)
+            status, error = 500, f"{type(e).__name__}: {e}"
+        if status != 200:
+            content_type, body = _json({"error": error})
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # unix socket peers have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def log_message(self, format, *args):
+        log.debug("%s %s", self.address_string(), format % args)
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # a socket left by a server that did not shut down cleanly
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        super().server_bind()
@@ -0,0 +1,333 @@
+"""Keep per-technique exports of a directory of sessions up to date.
+
+`Watcher` follows a directory for `.pssession` files that appear or change
+and writes each one's tables to `<output>/<relative dir>/<stem>_<table>`.
+Changes come from filesystem notifications when `watchdog` is installed
+and from listing the directory every `interval` seconds otherwise.
+
+A session is parsed once its size and mtime have been stable for `settle`
+seconds, so files PSTrace is still writing are left alone. One that still
+fails to load (e.g. cut off mid measurement) is retried on its next change
+instead of being reported as broken. Parsing goes through `parse`, so a
+session that only gained measurements is refreshed incrementally. Every
+output is replaced atomically, and the signature of each exported session
+is kept in `<output>/.psession-watch.json` so a restarted watcher only
+re-exports what changed meanwhile.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from .cache import temp_path
+from .parse import parse
+from .serializers import get_serializer
+
+log = logging.getLogger(__name__)
+
+SESSION_SUFFIX = ".pssession"
+STATE_FILE = ".psession-watch.json"
+
+Signature = Tuple[int, int]
+
+
+def signature(fp: str) -> Optional[Signature]:
+    try:
+        st = os.stat(fp)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def scan(root: str, recursive: bool = True) -> Set[str]:
+    if not recursive:
+        return {
+            os.path.join(root, f)
+            for f in os.listdir(root)
+            if f.endswith(SESSION_SUFFIX)
+        }
+    return {
+        os.path.join(dirpath, f)
+        for dirpath, _, files in os.walk(root)
+        for f in files
+        if f.endswith(SESSION_SUFFIX)
+    }
+
+
+@dataclass
+class WatchStats:
+    """Counters of a `Watcher`; `latency` runs from a session's last write,
+    or from when the watcher first saw it if later, to its exports being in
+    place, settling included."""
+
+    updates: int = 0
+    failures: int = 0
+    # loads that failed on a file that may still be written
+    deferred: int = 0
+    bytes: int = 0
+    rows: int = 0
+    busy_seconds: float = 0.0
+    last_latency: Optional[float] = None
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+    started: float = field(default_factory=time.time)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def record(self, n_bytes: int, rows: int, seconds: float, latency: float):
+        self.updates += 1
+        self.bytes += n_bytes
+        self.rows += rows
+        self.busy_seconds += seconds
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+    def to_dict(self) -> dict:
+        out = asdict(self)
+        elapsed = time.time() - self.started
+        out.update(
+            {
+                "uptime_seconds": elapsed,
+                "updates_per_minute": 60 * self.updates / elapsed if elapsed else 0.0,
+                "throughput_mb_s": (
+                    self.bytes / self.busy_seconds / 1e6 if self.busy_seconds else 0.0
+                ),
+                "mean_latency": (
+                    self.total_latency / self.updates if self.updates else None
+                ),
+            }
+        )
+        return out
+
+
+class PollingSource:
+    """Reports every session under `root`, every `interval` seconds."""
+
+    def __init__(self, root: str, recursive: bool = True, interval: float = 1.0):
+        self.root = root
+        self.recursive = recursive
+        self.interval = interval
+
+    def changed(self, timeout: float) -> Iterable[str]:
+        time.sleep(min(timeout, self.interval))
+        return scan(self.root, self.recursive)
+
+    def close(self):
+        pass
+
+
+class NotifySource:
+    """Reports sessions created, modified or moved in, from watchdog."""
+
+    def __init__(self, root: str, recursive: bool = True):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        self.paths: Set[str] = set()
+        self.lock = threading.Lock()
+        self.event = threading.Event()
+        source = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    if path and str(path).endswith(SESSION_SUFFIX):
+                        with source.lock:
+                            source.paths.add(str(path))
+                        source.event.set()
+
+        self.observer = Observer()
+        self.observer.schedule(Handler(), root, recursive=recursive)
+        self.observer.start()
+
+    def changed(self, timeout: float) -> Iterable[str]:
+        self.event.wait(timeout)
+        with self.lock:
+            paths, self.paths = self.paths, set()
+            self.event.clear()
+        return paths
+
+    def close(self):
+        self.observer.stop()
+        self.observer.join()
+
+
+def event_source(
+    root: str, recursive: bool = True, interval: float = 1.0, poll: bool = False
+):
+    """Notifications when watchdog is installed (and `poll` is off), else
+    polling."""
+    if not poll:
+        try:
+            return NotifySource(root, recursive)
+        except ImportError:
+            log.info("watchdog is not installed, polling %s", root)
+    return PollingSource(root, recursive, interval)
+
+
+class Watcher:
+    def __init__(
+        self,
+        root: str,
+        output: str,
+        fmt: str = "csv",
+        settle: float = 2.0,
+        interval: float = 1.0,
+        recursive: bool = True,
+        poll: bool = False,
+        parse_kwargs: Optional[dict] = None,
+        on_update: Optional[Callable[[str, dict], None]] = None,
+    ):
+        """Export the sessions under `root` to `output` as `fmt` tables.
+
+        `parse_kwargs` go to `parse` (enrichments, opts, methods, ...) and
+        `on_update(path, tables)` is called with the row count of each table
+        written.
+        """
+        self.root = os.path.abspath(root)
+        self.output = os.path.abspath(output)
+        self.serializer = get_serializer(fmt)
+        self.settle = settle
+        self.interval = interval
+        self.recursive = recursive
+        self.poll = poll
+        self.parse_kwargs = parse_kwargs or {}
+        self.on_update = on_update
+        self.stats = WatchStats()
+        # path -> (signature, when it was last seen changing)
+        self.pending: Dict[str, Tuple[Signature, float]] = {}
+        # path -> when it was first seen, so files older than the watcher
+        # do not count their idle time as latency
+        self.first_seen: Dict[str, float] = {}
+        self.state_path = os.path.join(self.output, STATE_FILE)
+        self.exported: Dict[str, list] = self.load_state()
+
+    def load_state(self) -> Dict[str, list]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        tmp = temp_path(self.state_path)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.exported, f)
+        os.replace(tmp, self.state_path)
+
+    def output_path(self, fp: str, table: str) -> str:
+        rel = os.path.relpath(fp, self.root)
+        stem = rel[: -len(SESSION_SUFFIX)] if rel.endswith(SESSION_SUFFIX) else rel
+        return os.path.join(self.output, f"{stem}_{table}.{self.serializer.suffix}")
+
+    def observe(self, paths: Iterable[str], now: float):
+        """Note the sessions among `paths` that changed since last export."""
+        for fp in map(os.path.abspath, paths):
+            sig = signature(fp)
+            if sig is None:
+                self.pending.pop(fp, None)
+                self.first_seen.pop(fp, None)
+                continue
+            self.first_seen.setdefault(fp, now)
+            if self.exported.get(fp) == list(sig):
+                continue
+            seen = self.pending.get(fp)
+            if seen is None:
+                # a file untouched for a while is ready at once
+                self.pending[fp] = (sig, min(now, sig[1] / 1e9))
+            elif seen[0] != sig:
+                self.pending[fp] = (sig, now)
+
+    def ready(self, now: float) -> list:
+        return sorted(
+            fp for fp, (_, since) in self.pending.items() if now - since >= self.settle
+        )
+
+    def export(self, fp: str) -> bool:
+        """Parse `fp` and replace its outputs; False if it could not be loaded."""
+        sig, _ = self.pending.pop(fp)
+        t0 = time.perf_counter()
+        try:
+            measurements = parse(fp, **self.parse_kwargs)
+            tables = {k: measurements.table(k) for k in measurements.keys()}
+        except ValueError as e:
+            # usually a session cut off mid write; its next change retries it
+            log.info("Deferring %s: %s", fp, e)
+            self.stats.deferred += 1
+            self.stats.errors[fp] = f"{type(e).__name__}: {e}"
+            self.exported[fp] = list(sig)
+            return False
+        except Exception as e:
+            log.warning("Failed to parse %s: %s", fp, e)
+            self.stats.failures += 1
+            self.stats.errors[fp] = f"{type(e).__name__}: {e}"
+            self.exported[fp] = list(sig)
+            return False
+
+        rows = {}
+        for name, df in tables.items():
+            if df.empty:
+                continue
+            out_path = self.output_path(fp, name)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            self.serializer.write(df, out_path)
+            rows[name] = len(df)
+        if signature(fp) != sig:
+            # written to while we parsed: export again once it settles
+            self.observe([fp], time.time())
+        self.exported[fp] = list(sig)
+        self.stats.errors.pop(fp, None)
+        self.stats.record(
+            sig[0],
+            sum(rows.values()),
+            time.perf_counter() - t0,
+            time.time() - max(sig[1] / 1e9, self.first_seen.get(fp, 0.0)),
+        )
+        if self.on_update is not None:
+            self.on_update(fp, rows)
+        return True
+
+    def step(self, paths: Iterable[str]) -> int:
+        """Observe `paths` and export the sessions that settled."""
+        now = time.time()
+        self.observe(paths, now)
+        exported = 0
+        for fp in self.ready(now):
+            exported += self.export(fp)
+        if exported or self.stats.errors:
+            self.save_state()
+        return exported
+
+    def run(self, once: bool = False, stop: Optional[threading.Event] = None):
+        """Export changed sessions until `stop` is set, or, with `once`, until
+        those present now are exported."""
+        os.makedirs(self.output, exist_ok=True)
+        stop = stop or threading.Event()
+        self.step(scan(self.root, self.recursive))
+        if once:
+            while self.pending and not stop.is_set():
+                time.sleep(self.wait())
+                self.step(list(self.pending))
+            return
+
+        source = event_source(self.root, self.recursive, self.interval, self.poll)
+        try:
+            while not stop.is_set():
+                paths = source.changed(self.wait())
+                self.step(list(paths) + list(self.pending))
+        finally:
+            source.close()
+
+    def wait(self) -> float:
+        """Seconds until the next pending session settles, at most `interval`."""
+        now = time.time()
+        waits = [since + self.settle - now for _, since in self.pending.values()]
+        return max(0.0, min([self.interval] + waits))